@@ -44,18 +44,31 @@
 # Can you find your cousin's phone number?
 
 # %%
-from datetime import date, datetime
+import sys
+from datetime import date
 from enum import Enum
-from zipfile import ZipFile
 
-import pandas as pd
 import polars as pl
-import polars.selectors as cs
+import pyarrow.compute as pc
 import pyperclip
 
-
-def get_zipped_csv(zipped_filename: str) -> bytes:
-    return ZipFile(zipped_filename).open(zipped_filename[:-4]).read()
+sys.path.append("..")
+from noahs_market import (
+    ANIMAL_CODES,
+    COLLECTIBLES,
+    SIGN_CODES,
+    SUN_SIGNS,
+    NoahsDatabase,
+    NoahsSQLite,
+    PurchaseMatrix,
+    PuzzleGraph,
+    add_zodiac,
+    animal_years,
+    co_purchases,
+    get_dataset,
+    get_sun_sign,
+    keypad_expr,
+)
 
 
 def answer(df: pl.DataFrame) -> str:
@@ -75,28 +88,27 @@ def answer(df: pl.DataFrame) -> str:
     return result
 
 
-def preview_dfs() -> None:
-    for df in [orders, customers, products, orders_items]:
+def preview_dfs(db: NoahsDatabase) -> None:
+    for df in [db.orders, db.customers, db.products, db.orders_items]:
         print(df.pipe(z_namestr))
         df.head().collect().pipe(z_classy_print)
 
 
 # %%
-products = pl.scan_csv(get_zipped_csv("noahs-products.csv.zip"))
-customers = pl.scan_csv(get_zipped_csv("noahs-customers.csv.zip"), try_parse_dates=True)
-orders = pl.scan_csv(get_zipped_csv("noahs-orders.csv.zip"), try_parse_dates=True)
-orders_items = pl.scan_csv(get_zipped_csv("noahs-orders_items.csv.zip"))
+db = get_dataset("2024").database(frontend="polars")
+puzzles = PuzzleGraph()
 
 
 # %%
-def one(customers_df: pl.LazyFrame) -> pl.DataFrame:
-    return customers_df.filter(
+@puzzles.puzzle()
+def one(db: NoahsDatabase) -> pl.DataFrame:
+    return db.customers.filter(
         pl.col("name").str.contains("Alexander Carpenter")
     ).collect()
 
 
 # %%
-customers.pipe(one)
+puzzles.solve(db, "one")
 
 # %%
 _.pipe(answer)
@@ -146,86 +158,16 @@ _.pipe(answer)
 
 
 # %%
-def translate_to_phone_num(text: str) -> str:
-    """
-    Translate string characters to phone numbers.
-
-    Parameters
-    ----------
-    text : str
-        Input string to be translated to phone numbers
-
-    Returns
-    -------
-    str
-        String of digits corresponding to the input text
-
-    Examples
-    --------
-    >>> translate_to_phone_num("a")
-    "2"
-    >>> translate_to_phone_num("hello")
-    "43556"
-    """
-
-    def translate_char(char: str) -> str:
-        char = char.lower()
-        match char:
-            case "a" | "b" | "c":
-                digit = "2"
-            case "d" | "e" | "f":
-                digit = "3"
-            case "g" | "h" | "i":
-                digit = "4"
-            case "j" | "k" | "l":
-                digit = "5"
-            case "m" | "n" | "o":
-                digit = "6"
-            case "p" | "q" | "r" | "s":
-                digit = "7"
-            case "t" | "u" | "v":
-                digit = "8"
-            case "w" | "x" | "y" | "z":
-                digit = "9"
-            case _:
-                digit = char
-        return digit
-
-    return "".join(translate_char(char) for char in text)
-
-
-# %%
-def the_investigator(customers_df: pl.LazyFrame) -> pl.DataFrame:
-    return (
-        customers_df.filter(
-            ~pl.col("name").str.contains_any(["II", "III", "IV", "Jr."])
-        )
-        .with_columns(
-            lastname_translated=(
-                pl.col("name")
-                .str.split(by=" ")
-                .list.get(-1)
-                .str.to_lowercase()
-                .map_elements(translate_to_phone_num, return_dtype=pl.String)
-            )
-        )
-        .with_columns(
-            phone_test=(
-                pl.col("lastname_translated").str.slice(0, length=3)
-                + "-"
-                + pl.col("lastname_translated").str.slice(3, length=3)
-                + "-"
-                + pl.col("lastname_translated").str.slice(6, length=4)
-            )
-        )
-        .filter(pl.col("phone") == pl.col("phone_test"))
-        .select(customers_df.collect_schema().names())
-        .collect()
-    )
+@puzzles.puzzle()
+def the_investigator(db: NoahsDatabase) -> pl.DataFrame:
+    return db.customers.filter(
+        ~pl.col("name").str.contains_any(["II", "III", "IV", "Jr."]),
+        keypad_expr(pl.col("name"), word=-1) == keypad_expr(pl.col("phone")),
+    ).collect()
 
 
 # %%
-customers.pipe(the_investigator)
+puzzles.solve(db, "the_investigator")
 
 # %%
 _.pipe(answer)
@@ -262,20 +204,19 @@ _.pipe(answer)
 
 
 # %%
+@puzzles.puzzle()
 def the_contractor(
-    products_df: pl.LazyFrame,
-    orders_items_df: pl.LazyFrame,
-    orders_df: pl.LazyFrame,
-    customers_df: pl.LazyFrame,
+    db: NoahsDatabase, initials: str = "DS", year: int = 2017
 ) -> pl.DataFrame:
+    customerids = db.initials[initials]
     return (
-        products_df.filter(
-            pl.col("desc").str.contains("(?i)bagel|(?i)coffee|(?i)clean")
+        db.order_lines.filter(
+            pl.col("customerid").is_in(customerids),
+            pl.col("desc").str.contains("(?i)bagel|(?i)coffee|(?i)clean"),
+            pl.col("ordered").dt.year() == year,
         )
-        .join(orders_items_df, on="sku")
-        .join(orders_df.filter(pl.col("ordered").dt.year() == 2017), on="orderid")
         .join(
-            customers_df.filter(pl.col("name").str.contains(r"^D.*\sS.*$")),
+            db.customers.filter(pl.col("customerid").is_in(customerids)),
             on="customerid",
         )
         .group_by(["name", "phone", "ordered"])
@@ -285,13 +226,13 @@ def the_contractor(
             & (pl.col("desc").str.contains("(?i)clean").sum() > 0)
         )
         .filter("bagel_coffee_clean")
-        .join(customers, on="phone")
-        .select(customers_df.collect_schema().names())
+        .join(db.customers, on="phone")
+        .select(db.customers.collect_schema().names())
     ).collect()
 
 
 # %%
-products.pipe(the_contractor, orders_items, orders, customers)
+puzzles.solve(db, "the_contractor")
 
 # %%
 _.pipe(answer)
@@ -355,44 +296,38 @@ class ChineseZodiac(Enum):
 
     Explanation
     -----------
-    This class defines an enumeration of the twelve Chinese zodiac signs and
-    return the respective Wikipedia link.
+    This class defines an enumeration of the twelve Chinese zodiac signs.
     """
 
-    Rat = "https://en.wikipedia.org/wiki/Rat_(zodiac)"
-    Ox = "https://en.wikipedia.org/wiki/Ox_(zodiac)"
-    Tiger = "https://en.wikipedia.org/wiki/Tiger_(zodiac)"
-    Rabbit = "https://en.wikipedia.org/wiki/Rabbit_(zodiac)"
-    Dragon = "https://en.wikipedia.org/wiki/Dragon_(zodiac)"
-    Snake = "https://en.wikipedia.org/wiki/Snake_(zodiac)"
-    Horse = "https://en.wikipedia.org/wiki/Horse_(zodiac)"
-    Goat = "https://en.wikipedia.org/wiki/Goat_(zodiac)"
-    Monkey = "https://en.wikipedia.org/wiki/Monkey_(zodiac)"
-    Rooster = "https://en.wikipedia.org/wiki/Rooster_(zodiac)"
-    Dog = "https://en.wikipedia.org/wiki/Dog_(zodiac)"
-    Pig = "https://en.wikipedia.org/wiki/Pig_(zodiac)"
+    Rat = "Rat"
+    Ox = "Ox"
+    Tiger = "Tiger"
+    Rabbit = "Rabbit"
+    Dragon = "Dragon"
+    Snake = "Snake"
+    Horse = "Horse"
+    Goat = "Goat"
+    Monkey = "Monkey"
+    Rooster = "Rooster"
+    Dog = "Dog"
+    Pig = "Pig"
 
 
 # %%
-ZODIAC_LINK = "https://en.wikipedia.org/wiki/Astrological_sign"
-zodiac = pl.from_pandas(pd.read_html(ZODIAC_LINK)[0])
+zodiac = pl.DataFrame(list(SUN_SIGNS.values()), orient="row")
 
 zodiac
 
 
 # %%
 def zodiac_characteristics(
-    zodiac_df: pl.LazyFrame = zodiac, zodiac_sign: ZodiacSign = ZodiacSign.Libra
+    zodiac_sign: ZodiacSign = ZodiacSign.Libra,
 ) -> dict[str, list[str | int]]:
     """
-    Extracts zodiac characteristics from a DataFrame based on the specified
-    zodiac sign.
+    Extracts the sun sign dates of the specified zodiac sign.
 
     Parameters
     ----------
-    zodiac_df : pl.LazyFrame, optional
-        The DataFrame containing zodiac information. By default, uses a
-        predefined zodiac DataFrame.
     zodiac_sign : ZodiacSign, optional
         The zodiac sign for which characteristics are extracted. By default,
         uses ZodiacSign.Libra.
@@ -405,24 +340,14 @@ def zodiac_characteristics(
         - 'month': List of month values.
         - 'days': List of day values.
     """
-    return (
-        zodiac_df.filter(pl.col("Sign") == zodiac_sign.value)
-        .select(cs.contains("Sun"))
-        .transpose()
-        .rename({"column_0": "dates"})
-        .with_columns(
-            timestamp_fmt=pl.col("dates").map_elements(
-                lambda _: datetime.strptime(f"{_} 1900", "%d %B %Y"),
-                return_dtype=pl.Datetime,
-            )
-        )
-        .with_columns(
-            month=pl.col("timestamp_fmt").dt.month(),
-            days=pl.col("timestamp_fmt").dt.day(),
-        )
-        .select(["dates", "month", "days"])
-        .to_dict(as_series=False)
-    )
+    sign = get_sun_sign(zodiac_sign.value)
+    return {
+        "dates": [
+            f"{day} {date(1900, month, 1):%B}" for month, day in (sign.start, sign.end)
+        ],
+        "month": [sign.start[0], sign.end[0]],
+        "days": [sign.start[1], sign.end[1]],
+    }
 
 
 # %%
@@ -431,7 +356,7 @@ zodiac_characteristics()
 
 # %%
 def chinese_sign_years(
-    customers_df: pl.LazyFrame = customers,
+    db: NoahsDatabase,
     chinese_zodiac_animal: ChineseZodiac = ChineseZodiac.Goat,
 ) -> set[int]:
     """
@@ -440,9 +365,8 @@ def chinese_sign_years(
 
     Parameters
     ----------
-    customers_df : pd.DataFrame, optional
-        The DataFrame containing customer information. By default, uses a
-        predefined 'customers' DataFrame.
+    db : NoahsDatabase
+        Noah's Market database, of which only customers is used.
     chinese_zodiac_animal : ChineseZodiac, optional
         The Chinese zodiac animal for which to retrieve birth years.
         By default, uses the ChineseZodiac.Rabbit.
@@ -454,25 +378,17 @@ def chinese_sign_years(
         Chinese zodiac sign.
     """
 
-    tables = [
-        pl.from_pandas(table) for table in pd.read_html(chinese_zodiac_animal.value)
-    ]
-
-    for i, d in enumerate(tables):
-        cols = list(d.columns)
-        if "Start date" in cols:
-            date_table_index = i
-
     return (
-        tables[date_table_index]
-        .select(pl.col("Start date").str.slice(-4).cast(pl.Int16))
+        pl.DataFrame(
+            {"Chinese Sign Years": animal_years(chinese_zodiac_animal.value)},
+            schema={"Chinese Sign Years": pl.Int16},
+        )
         .join(
-            customers.select(pl.col("birthdate").dt.year().cast(pl.Int16)).collect(),
-            left_on="Start date",
+            db.customers.select(pl.col("birthdate").dt.year().cast(pl.Int16)).collect(),
+            left_on="Chinese Sign Years",
             right_on="birthdate",
         )
         .unique()
-        .rename({"Start date": "Chinese Sign Years"})
         .sort("Chinese Sign Years")
         .to_series()
         .to_list()
@@ -480,91 +396,59 @@ def chinese_sign_years(
 
 
 # %%
-chinese_sign_years()
-
-
-# %%
-def western_astrology_with_chinese_dates(
-    western_astrology_sign: ZodiacSign = ZodiacSign.Libra,
-    chinese_astrology_animal: ChineseZodiac = ChineseZodiac.Goat,
-) -> pl.Series:
-    """
-    Retrieves a list of timestamps representing the overlapping periods between
-    Western astrology sign dates and Chinese astrology birth years.
-
-    Parameters
-    ----------
-    western_astrology_sign : ZodiacSign, optional
-        The Western astrology sign for which to retrieve overlapping dates.
-        By default, uses ZodiacSign.Cancer.
-    chinese_astrology_animal : ChineseZodiac, optional
-        The Chinese astrology animal for which to retrieve overlapping dates.
-        By default, uses ChineseZodiac.Rabbit.
-
-    Returns
-    -------
-    list[pd.Timestamp]
-        A list of timestamps representing the overlapping periods between the
-        specified Western astrology sign and Chinese astrology birth years.
-    """
-
-    sign_dict: dict[str, list[str | int]] = zodiac_characteristics(
-        zodiac_sign=western_astrology_sign
-    )
-    animal_years: list[int] = chinese_sign_years(
-        chinese_zodiac_animal=chinese_astrology_animal
-    )
-
-    months: list[int] = sign_dict["month"]
-    start_month, end_month = months
-
-    days: list[int] = sign_dict["days"]
-    start_day, end_day = days
-
-    return pl.concat(
-        [
-            pl.date_range(
-                start=date(year=animal_year, month=start_month, day=start_day),
-                end=date(year=animal_year, month=end_month, day=end_day),
-                eager=True,
-            )
-            for animal_year in animal_years
-        ]
-    ).unique()
+chinese_sign_years(db)
 
 
 # %%
+@puzzles.puzzle("the_contractor")
 def the_neighbor(
-    customers_df: pd.DataFrame = customers,
+    db: NoahsDatabase,
+    the_contractor: pl.DataFrame,
     western_astrology_sign: ZodiacSign = ZodiacSign.Libra,
     chinese_astrology_animal: ChineseZodiac = ChineseZodiac.Goat,
-) -> pd.DataFrame:
-    dates = western_astrology_with_chinese_dates(
-        western_astrology_sign, chinese_astrology_animal
-    )
-    the_contractor_contact = the_contractor(
-        products, orders_items, orders, customers_df
-    )
+) -> pl.DataFrame:
     return (
-        customers_df.filter(pl.col("birthdate").is_in(dates))
+        add_zodiac(db.customers)
+        .filter(
+            pl.col("western_sign") == SIGN_CODES[western_astrology_sign.value],
+            pl.col("chinese_animal") == ANIMAL_CODES[chinese_astrology_animal.value],
+        )
         .with_columns(
             zip_code=pl.col("citystatezip").str.slice(-5),
         )
         .filter(
             pl.col("zip_code").is_in(
-                the_contractor_contact.select(pl.col("citystatezip").str.slice(-5)),
+                the_contractor.select(pl.col("citystatezip").str.slice(-5)),
             )
         )
-        .select(customers_df.collect_schema().names())
+        .select(db.customers.collect_schema().names())
     ).collect()
 
 
 # %%
-the_neighbor(customers)
+puzzles.solve(db, "the_neighbor")
 
 # %%
 _.pipe(answer)
 
+# %% [markdown]
+# A shared zip code stands in for living nearby. With the customers' coordinates
+# indexed, the same sign and animal can be looked up within a kilometre of the
+# contractor instead.
+
+# %%
+lat, long = db.locations.locate(puzzles.solve(db, "the_contractor")["customerid"])
+(
+    add_zodiac(db.customers)
+    .filter(
+        pl.col("customerid").is_in(db.locations.within(lat[0], long[0], radius=1.0)),
+        pl.col("western_sign") == SIGN_CODES["Libra"],
+        pl.col("chinese_animal") == ANIMAL_CODES["Goat"],
+    )
+    .select(db.customers.collect_schema().names())
+    .collect()
+)
+
 
 # %% [markdown]
 # ## 4. The Early Bird
@@ -593,31 +477,18 @@ _.pipe(answer)
 
 
 # %%
-def the_early_bird(
-    products_df: pl.LazyFrame,
-    orders_items_df: pl.LazyFrame,
-    orders_df: pl.LazyFrame,
-    customers_df: pl.LazyFrame,
-) -> pl.DataFrame:
-    return (
-        products_df.filter(pl.col("sku").str.contains("BKY"))
-        .join(orders_items_df, on="sku")
-        .join(
-            orders_df.filter(
-                pl.col("ordered").dt.hour() < 5, pl.col("shipped").dt.hour() < 5
-            ),
-            on="orderid",
-        )
-        .group_by("customerid")
-        .len()
-        .top_k(1, by="len")
-        .join(customers_df, on="customerid")
-        .select(customers_df.collect_schema().names())
-    ).collect()
+@puzzles.puzzle()
+def the_early_bird(db: NoahsDatabase) -> pl.DataFrame:
+    pre_dawn = PurchaseMatrix.from_database(
+        db,
+        where=(pc.hour(pc.field("ordered")) < 5) & (pc.hour(pc.field("shipped")) < 5),
+    )
+    customerids, _ = pre_dawn.top(pc.field("department") == "BKY")
+    return db.customers.filter(pl.col("customerid").is_in(customerids)).collect()
 
 
 # %%
-the_early_bird(products, orders_items, orders, customers)
+puzzles.solve(db, "the_early_bird")
 
 # %%
 _.pipe(answer)
@@ -645,26 +516,16 @@ _.pipe(answer)
 
 
 # %%
-def the_cat_lady(
-    products_df: pl.LazyFrame,
-    orders_items_df: pl.LazyFrame,
-    orders_df: pl.LazyFrame,
-    customers_df: pl.LazyFrame,
-) -> pl.DataFrame:
-    return (
-        products_df.filter(pl.col("desc").str.contains("(?i)senior cat"))
-        .join(orders_items_df, on="sku")
-        .join(orders_df, on="orderid")
-        .group_by("customerid")
-        .len()
-        .top_k(1, by="len")
-        .join(customers, on="customerid")
-        .select(customers.collect_schema().names())
-    ).collect()
+@puzzles.puzzle()
+def the_cat_lady(db: NoahsDatabase) -> pl.DataFrame:
+    customerids, _ = db.purchases.top(
+        pc.match_substring(pc.field("desc"), "senior cat", ignore_case=True)
+    )
+    return db.customers.filter(pl.col("customerid").is_in(customerids)).collect()
 
 
 # %%
-the_cat_lady(products, orders_items, orders, customers)
+puzzles.solve(db, "the_cat_lady")
 
 # %%
 _.pipe(answer)
@@ -691,31 +552,25 @@ _.pipe(answer)
 #
 # Can you find her cousin's phone number?
 # %%
-def the_bargain_hunter(
-    customers_df: pl.LazyFrame = customers,
-    products_df: pl.LazyFrame = products,
-    orders_items_df: pl.LazyFrame = orders_items,
-    orders_df: pl.LazyFrame = orders,
-) -> pl.DataFrame:
-    return (
-        orders_items_df.join(products_df, on="sku")
-        .filter(pl.col("unit_price") < pl.col("wholesale_cost"))
-        .join(orders_df, on="orderid")
-        .join(customers_df, on="customerid")
-        .group_by("customerid")
-        .len()
-        .top_k(1, by="len")
-        .join(customers_df, on="customerid")
-        .select(customers_df.collect_schema().names())
-    ).collect()
+@puzzles.puzzle()
+def the_bargain_hunter(db: NoahsDatabase) -> pl.DataFrame:
+    customerids = db.margins.top()
+    return db.customers.filter(pl.col("customerid").is_in(customerids)).collect()
 
 
 # %%
-customers.pipe(the_bargain_hunter)
+puzzles.solve(db, "the_bargain_hunter")
 
 # %%
 _.pipe(answer)
 
+# %% [markdown]
+# Every customer ranked by the lines Noah sold them below cost, with the
+# discount they captured and the share of their lines sold at a loss.
+
+# %%
+pl.from_arrow(db.margins.ranking()).head()
+
 
 # %% [markdown]
 # ## 7. The Meet Cute
@@ -741,191 +596,97 @@ _.pipe(answer)
 
 
 # %%
-def color_agnostic_item_name(products_df: pl.LazyFrame = products) -> pl.DataFrame:
+def in_store_color_lines(db: NoahsDatabase) -> pl.LazyFrame:
     """
-    Generates a new column for items, removing color information to create
-    color-agnostic names.
+    Selects the order lines of items sold in several colors, bought in store.
 
     Parameters
     ----------
-    products_df : pd.DataFrame, optional
-        DataFrame containing product information, by default products.
+    db : NoahsDatabase
+        Noah's Market database.
 
     Returns
     -------
-    pd.DataFrame
-        DataFrame with an additional 'desc_color_agnostic' column representing
-        color-agnostic item names.
+    pl.LazyFrame
+        Order lines with an additional 'color_agnostic_desc' column, the item
+        name without its color.
 
     Notes
     -----
-    This function creates a new column 'desc_color_agnostic' by removing color
-    information from the 'desc' column. It ensures that item names are
-    represented without specific color details.
+    In-store orders are shipped as soon as they are placed, see the
+    'in_store' flag of `order_lines`. Items that do not come in colors have no
+    'color_id'.
 
     Examples
     --------
-    >>> color_agnostic_item_name(df)
-    # Returns a DataFrame with 'desc_color_agnostic' column:
+    >>> in_store_color_lines(db)
     # 'Manual Mixer (orange)' -> 'Manual Mixer'
-
     """
-    return (
-        products_df.filter(pl.col("desc").str.contains(r"\(\w+\)"))
-        .with_columns(
-            color=pl.col("desc")
-            .str.split("(")
-            .list.last()
-            .str.replace_all(")", "", literal=True)
-        )
-        .with_columns(
-            color_agnostic_desc=pl.col("desc").str.replace_all(r"\s(\(\w+\))", "")
-        )
-    )
+    return db.order_lines.filter(
+        pl.col("in_store"), pl.col("color_id").is_not_null()
+    ).with_columns(color_agnostic_desc=pl.col("item"))
 
 
 # %%
-def date_hour_mm(orders_df: pl.LazyFrame = orders) -> pl.LazyFrame:
+@puzzles.puzzle("the_bargain_hunter")
+def the_order_of_the_meet(
+    db: NoahsDatabase, the_bargain_hunter: pl.DataFrame, tolerance: int = 0
+) -> pl.DataFrame:
     """
-    Extracts and formats the date and hour from the 'ordered' column in a
-    DataFrame of order information.
+    Finds who bought the same item as the bargain hunter, in store, at the
+    same time.
 
     Parameters
     ----------
-    orders_df : pl.LazyFrame, optional
-        DataFrame containing order information, by default orders.
+    db : NoahsDatabase
+        Noah's Market database.
+    the_bargain_hunter : pl.DataFrame
+        Result of `the_bargain_hunter`.
+    tolerance : int, optional
+        Minutes between the two purchases, by default 0, the same minute.
 
     Returns
     -------
-    pl.LazyFrame
-        DataFrame with an additional 'date_hour' column representing the
-        formatted date and hour.
+    pl.DataFrame
+        The bargain hunter's matched order lines, then the other customer's.
 
     Notes
     -----
-    This function extracts the date and hour information from the 'ordered'
-    column and adds a new column 'date_hour' to the DataFrame. The 'date_hour'
-    column is formatted as 'MM/DD/YYYY HH:MM' to represent the month, day,
-    year, and hour of each order.
+    Purchases are matched on the item's 'base_product_id' from the catalog and
+    the minute they were placed in, both integers, see `co_purchases`.
     """
-    return orders_df.with_columns(
-        date_hour=pl.col("ordered").dt.strftime("%m/%d/%Y %H:%M")
+    return co_purchases(
+        in_store_color_lines(db), the_bargain_hunter["customerid"], tolerance
     )
 
 
 # %%
-def filter_in_store_orders(orders_df: pl.LazyFrame = orders) -> pl.LazyFrame:
-    """
-    Filters out in-store orders from a DataFrame of order information.
-
-    Parameters
-    ----------
-    orders_df : pl.LazyFrame, optional
-        DataFrame containing order information, by default orders.
-
-    Returns
-    -------
-    pl.LazyFrame
-        DataFrame with in-store orders removed.
-
-    Notes
-    -----
-    This function filters out orders that were bought in-store by comparing the
-    'ordered' and 'shipped' columns. Only orders with distinct 'ordered' and
-    'shipped' timestamps are retained.
-
-    Example
-    -------
-    >>> filter_in_store_orders(df)
-    # Returns a DataFrame with in-store orders removed.
-    """
-    return orders_df.filter(pl.col("ordered") == pl.col("shipped"))
-
-
-# %%
-def bargain_hunter_color_items(
-    products_df: pl.LazyFrame = products,
-    orders_items_df: pl.LazyFrame = orders_items,
-    orders_df: pl.LazyFrame = orders,
-) -> pl.DataFrame:
-    return (
-        products_df.pipe(color_agnostic_item_name)
-        .join(orders_items_df, on="sku")
-        .join(orders_df, on="orderid")
-        .filter(
-            pl.col("customerid")
-            == customers.pipe(
-                the_bargain_hunter, products, orders_items, orders
-            ).select("customerid")
-        )
-        .pipe(filter_in_store_orders)
-        .pipe(date_hour_mm)
-    )
+puzzles.solve(db, "the_order_of_the_meet")
 
 
 # %%
-def the_order_of_the_meet(
-    orders_df: pl.LazyFrame = orders,
-    orders_items_df: pl.LazyFrame = orders_items,
-    products_df: pl.LazyFrame = products,
+@puzzles.puzzle("the_order_of_the_meet", "the_bargain_hunter")
+def the_meet_cute(
+    db: NoahsDatabase,
+    the_order_of_the_meet: pl.DataFrame,
+    the_bargain_hunter: pl.DataFrame,
 ) -> pl.DataFrame:
-    bargain_hunter = bargain_hunter_color_items()
-
-    return (
-        orders_df.pipe(filter_in_store_orders)
-        .join(orders_items_df, on="orderid")
-        .pipe(date_hour_mm)
-        .join(products_df.pipe(color_agnostic_item_name), on="sku")
-        .join(
-            bargain_hunter.select(["color_agnostic_desc", "date_hour"]),
-            on=["color_agnostic_desc", "date_hour"],
-        )
-        .filter(
-            ~pl.col("customerid").is_in(
-                bargain_hunter.select("customerid").collect().to_series()
-            )
-        )
-        .select(bargain_hunter.collect_schema().names())
-        .collect()
-        .pipe(
-            lambda cute_guy: pl.concat(
-                [
-                    bargain_hunter.collect().filter(
-                        pl.col("color_agnostic_desc").is_in(
-                            cute_guy.select("color_agnostic_desc").to_series()
-                        ),
-                        pl.col("date_hour").is_in(
-                            cute_guy.select("date_hour").to_series()
-                        ),
-                    ),
-                    cute_guy,
-                ]
-            )
-        )
+    the_couple_customer_ids = (
+        the_order_of_the_meet.select("customerid").to_series().to_list()
     )
-
-
-# %%
-the_order_of_the_meet()
-
-
-# %%
-def the_meet_cute(customers_df: pl.LazyFrame = customers) -> pl.DataFrame:
-    the_meet = the_order_of_the_meet()
-    the_couple_customer_ids = the_meet.select("customerid").to_series().to_list()
     the_bargain_hunter_customer_id = (
-        customers_df.pipe(the_bargain_hunter).select("customerid").to_series().to_list()
+        the_bargain_hunter.select("customerid").to_series().to_list()
     )
     the_meet_cute_id = set(the_couple_customer_ids) - set(
         the_bargain_hunter_customer_id
     )
-    return customers_df.filter(
+    return db.customers.filter(
         pl.col("customerid").is_in(list(the_meet_cute_id))
     ).collect()
 
 
 # %%
-customers.pipe(the_meet_cute)
+puzzles.solve(db, "the_meet_cute")
 
 # %%
 _.pipe(answer)
@@ -956,27 +717,20 @@ _.pipe(answer)
 
 
 # %%
-def the_collector(
-    customers_df: pl.LazyFrame = customers,
-    products_df: pl.LazyFrame = products,
-    orders_items_df: pl.LazyFrame = orders_items,
-    orders_df: pl.LazyFrame = orders,
-) -> pl.DataFrame:
-    return (
-        products_df.filter(pl.col("desc").str.contains("Noah"))
-        .join(orders_items_df, on="sku")
-        .join(orders_df, on="orderid")
-        .join(customers_df, on="customerid")
-        .group_by("customerid")
-        .len()
-        .top_k(1, by="len")
-        .join(customers_df, on="customerid")
-        .select(customers_df.collect_schema().names())
-    ).collect()
+@puzzles.puzzle()
+def the_collector(db: NoahsDatabase) -> pl.DataFrame:
+    collectors = set(db.collectibles.missing(0, COLLECTIBLES)["customerid"].to_pylist())
+    # The former ranking, by lines of Noah's products, breaks ties between
+    # collectors and stands in if nobody owns every collectible.
+    ranked, _ = db.purchases.top(
+        pc.match_substring(pc.field("desc"), "Noah"), k=len(db.purchases)
+    )
+    top_buyer, *_ = [c for c in ranked if c in collectors] or ranked
+    return db.customers.filter(pl.col("customerid") == top_buyer).collect()
 
 
 # %%
-customers.pipe(the_collector)
+puzzles.solve(db, "the_collector")
 
 # %%
 _.pipe(answer)
@@ -1002,3 +756,49 @@ _.pipe(answer)
 
 # %% [markdown]
 # ![](tapestry.gif)
+
+# %% [markdown]
+# ## Appendix: SQLite Backend
+#
+# The same puzzles as indexed SQL queries, over an on-disk SQLite copy of the
+# tables. Both solvers should agree on every answer.
+
+# %%
+sqlite = NoahsSQLite.from_database(db)
+results = puzzles.run(db).results
+
+pl.DataFrame(
+    [
+        {
+            "puzzle": name,
+            "polars": results[name].select("phone").item(),
+            "sqlite": getattr(sqlite, name)()["phone"].item(),
+        }
+        for name in [
+            "one",
+            "the_investigator",
+            "the_contractor",
+            "the_neighbor",
+            "the_early_bird",
+            "the_cat_lady",
+            "the_bargain_hunter",
+            "the_meet_cute",
+            "the_collector",
+        ]
+    ]
+).with_columns(agree=pl.col("polars") == pl.col("sqlite"))
+
+# %% [markdown]
+# ## Appendix: Parallel Solve
+#
+# Solving every puzzle of a fresh database on a thread pool, each as soon as the
+# puzzles it builds on are solved. Polars releases the GIL, so the whole solve
+# takes about as long as its critical path, the slowest chain of dependent
+# puzzles.
+
+# %%
+print(
+    puzzles.run(
+        get_dataset("2024").database(frontend="polars"), executor="thread"
+    ).report()
+)
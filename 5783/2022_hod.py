@@ -1,6 +1,6 @@
 # %%
 # pylint: disable=wrong-import-position missing-module-docstring invalid-name
-import os
+import sys
 
 # %% [markdown]
 # # Hanukkah of Data/5783
@@ -66,9 +66,6 @@ import os
 password = 5783 - 6
 print(password)
 
-# %%
-os.system(f"unzip -P {password} noahs-csv")
-
 # %% [markdown]
 # # Puzzle 1
 #
@@ -112,56 +109,30 @@ for _ in "Skilled Private Investigator".split():
 # So much for that. Time to use Pandas
 
 # %%
-from datetime import datetime
-
 # from typing import Union
 import numpy as np
 import pandas as pd
 import pyperclip
 from IPython.display import display
 
-customers = pd.read_csv(
-    "noahs-csv/noahs-customers.zip", parse_dates=["birthdate"]
-).drop_duplicates(subset=["customerid"])
+sys.path.append("..")
+from noahs_market import (
+    SUN_SIGNS,
+    animal_years,
+    get_dataset,
+    get_sun_sign,
+    keypad_series,
+)
+
+customers, orders, orders_items, products = get_dataset("5783").load()
+customers = customers.drop_duplicates(subset=["customerid"])
 
 
 # %% [markdown]
 # ### Idea
 #
-# Filter out for names that together are 10 characters.
-
-
-# %%
-def translate_char_to_phone_num(char: str) -> int:
-    r"""
-    Translate characters to phone number.
-
-    Parameters
-    ----------
-    chr : str
-
-    Returns
-    -------
-    int
-    """
-    match char:
-        case "a" | "b" | "c":
-            digit = 2
-        case "d" | "e" | "f":
-            digit = 3
-        case "g" | "h" | "i":
-            digit = 4
-        case "j" | "k" | "l":
-            digit = 5
-        case "m" | "n" | "o":
-            digit = 6
-        case "p" | "q" | "r" | "s":
-            digit = 7
-        case "t" | "u" | "v":
-            digit = 8
-        case "w" | "x" | "y" | "z":
-            digit = 9
-    return digit
+# Spell the last names on a phone keypad and compare them with the phone
+# numbers.
 
 
 # %%
@@ -170,28 +141,11 @@ def set_customer_id_index(df):
 
 
 # %%
-puzzle_1 = (
-    customers.loc[~customers["name"].str.endswith(("II", "III", "IV", "Jr."))]
-    .copy()
-    .assign(
-        last_name=customers["name"].str.split().str[-1].str.lower(),
-        length=lambda df: df["last_name"].str.len(),
-    )
-    .query("length == 10")
-    .assign(
-        name_char=lambda df: df["last_name"].apply(list),
-        phone_num=lambda df: df["name_char"].apply(
-            lambda _: "".join([str(translate_char_to_phone_num(x)) for x in _])
-        ),
-        test=lambda df: df["phone_num"].str.slice(stop=3)
-        + "-"
-        + df["phone_num"].str.slice(start=3, stop=6)
-        + "-"
-        + df["phone_num"].str.slice(start=6),
-    )
-    .query("phone == test")
-    .filter(customers.columns)
-)
+names = customers["name"].astype("string[pyarrow]")
+puzzle_1 = customers.loc[
+    ~names.str.endswith(("II", "III", "IV", "Jr."))
+    & (keypad_series(names, word=-1) == keypad_series(customers["phone"]))
+]
 
 # %%
 display(puzzle_1.pipe(set_customer_id_index))
@@ -249,11 +203,6 @@ print(answer(puzzle_1))
 # hand. She said, “I know it’s a long shot, but is there any chance you could
 # find their phone number?”
 
-# %%
-orders = pd.read_csv("noahs-csv/noahs-orders.zip", parse_dates=["ordered", "shipped"])
-orders_items = pd.read_csv("noahs-csv/noahs-orders_items.zip")
-products = pd.read_csv("noahs-csv/noahs-products.zip")
-
 # %%
 puzzle_2 = (
     customers.replace([" II", " III", " IV", " Jr."], "")
@@ -315,58 +264,21 @@ print(answer(puzzle_2))
 # - It's a Guy
 
 # %%
-ZODIAC_LINK = "https://en.wikipedia.org/wiki/Astrological_sign"
-DOG_ZODIAC_LINK = "https://en.wikipedia.org/wiki/Dog_(zodiac)"
-
-# %%
-zodiac = pd.read_html(ZODIAC_LINK)[0]
+zodiac = pd.DataFrame(SUN_SIGNS.values())
 
 # %%
 display(zodiac)
 
-
 # %%
-def month_day(date: str) -> datetime:
-    r"""
-    Convert "Month Day" string to datetime
-
-    e.g., December 11 -> datetime.datetime(1900, 12, 11, 0, 0)
-
-
-    Parameters
-    ----------
-    date : str
-
-    Returns
-    -------
-    datetime.datetime
-    """
-    return datetime.strptime(date, "%B %d")
-
-
-# %%
-aries = (
-    (
-        zodiac.query("Sign == 'Aries'")["Approximate Sun Sign Dates"]
-        .str.split(" – ", expand=True)
-        .T
-    )
-    .rename(columns={0: "text"})
-    .assign(
-        month=lambda df: df["text"].apply(month_day).apply(lambda _: _.month),
-        day=lambda df: df["text"].apply(month_day).apply(lambda _: _.day),
-    )
-    .copy()
-    .to_dict("list")
-)
+# Solved against an earlier edition of Wikipedia's sun sign table, in which
+# Aries ends on April 19.
+aries = get_sun_sign("Aries")._replace(end=(4, 19))
 
 # %%
 display(aries)
 
 # %%
-dog = set(pd.to_numeric(pd.read_html(DOG_ZODIAC_LINK)[2]["Start date"].str[-4:])) & set(
-    customers["birthdate"].dt.year
-)
+dog = set(animal_years("Dog")) & set(customers["birthdate"].dt.year)
 
 # %%
 print(dog)
@@ -377,8 +289,8 @@ aries_dog = [
     for date in np.concatenate(
         [
             pd.period_range(
-                start=pd.Timestamp(f'{aries["month"][0]}/{aries["day"][0]}/{y}'),
-                end=pd.Timestamp(f'{aries["month"][1]}/{aries["day"][1]}/{y}'),
+                start=pd.Timestamp(y, *aries.start),
+                end=pd.Timestamp(y, *aries.end),
             )
             for y in sorted(dog)
         ],
@@ -522,7 +434,9 @@ print(answer(puzzle_5))
 # %%
 puzzle_6 = customers.loc[
     customers["customerid"]
-    == orders_items.groupby(["sku", "orderid"], as_index=False)["unit_price"]
+    == orders_items.groupby(["sku", "orderid"], as_index=False, observed=True)[
+        "unit_price"
+    ]
     .min()
     .merge(products, on="sku")
     .query("unit_price <= wholesale_cost")
@@ -709,8 +623,14 @@ puzzle_7 = customers.loc[
         .merge(orders_items.merge(colored_products, on="sku"), on="orderid")
         .pipe(date_hour)
         .loc[
-            lambda df: (df["date_hour"].isin(emily_in_color["date_hour"].unique()))
-            & (df["desc_color_agnostic"].isin(emily_in_color["desc_color_agnostic"]))
+            lambda df: (
+                (df["date_hour"].isin(emily_in_color["date_hour"].unique()))
+                & (
+                    df["desc_color_agnostic"].isin(
+                        emily_in_color["desc_color_agnostic"]
+                    )
+                )
+            )
         ]
         .groupby("date_hour")["customerid"]
         .sum()
@@ -758,9 +678,11 @@ puzzle_7 = customers.loc[
         orders.merge(orders_items, on="orderid")
         .set_index("customerid")
         .loc[
-            lambda df: orders.merge(orders_items, on="orderid")["customerid"]
-            .value_counts()
-            .index
+            lambda df: (
+                orders.merge(orders_items, on="orderid")["customerid"]
+                .value_counts()
+                .index
+            )
         ]
         .reset_index()["index"]
         .iloc[0]
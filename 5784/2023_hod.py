@@ -1,7 +1,7 @@
 # %%
 # ruff: noqa: E402
 # pylint: disable=wrong-import-position missing-module-docstring invalid-name missing-function-docstring too-many-lines
-import os
+import sys
 
 # %% [markdown]
 # # Hanukkah of Data/5784
@@ -49,9 +49,6 @@ import os
 password = 5783 - 6
 print(password)
 
-# %%
-os.system(f"unzip -P {password} noahs-csv")
-
 # %% [markdown]
 # ## 1. The Investigator
 #
@@ -82,21 +79,36 @@ os.system(f"unzip -P {password} noahs-csv")
 # “Can you find this investigator’s phone number?”
 
 # %%
+import calendar
 from enum import Enum
 
 import numpy as np
 import pandas as pd
+import pyarrow.compute as pc
 import pyperclip
 from IPython.display import display
 
-# %%
-customers = pd.read_csv("5784/noahs-customers.csv.zip", parse_dates=["birthdate"])
-orders = pd.read_csv("5784/noahs-orders.csv.zip", parse_dates=["ordered", "shipped"])
-orders_items = pd.read_csv("5784/noahs-orders_items.csv.zip")
-products = pd.read_csv("5784/noahs-products.csv.zip")
+sys.path.append("..")
+from noahs_market import (
+    ANIMAL_CODES,
+    COLLECTIBLES,
+    SIGN_CODES,
+    SUN_SIGNS,
+    CustomerMargins,
+    NoahsDatabase,
+    PurchaseMatrix,
+    PuzzleGraph,
+    add_zodiac,
+    animal_years,
+    co_purchases,
+    get_dataset,
+    get_sun_sign,
+    keypad_series,
+)
 
 # %%
-os.system("rm -rf 5784")
+db = get_dataset("5784").database()
+puzzles = PuzzleGraph()
 
 
 # %%
@@ -118,70 +130,21 @@ def answer(df: pd.DataFrame | pd.Series) -> str:
 
 
 # %%
-def translate_char_to_phone_num(char: str) -> int:
-    r"""
-    Translate characters to phone number.
-
-    Parameters
-    ----------
-    chr : str
-
-    Returns
-    -------
-    int
-    """
-    match char:
-        case "a" | "b" | "c":
-            digit = 2
-        case "d" | "e" | "f":
-            digit = 3
-        case "g" | "h" | "i":
-            digit = 4
-        case "j" | "k" | "l":
-            digit = 5
-        case "m" | "n" | "o":
-            digit = 6
-        case "p" | "q" | "r" | "s":
-            digit = 7
-        case "t" | "u" | "v":
-            digit = 8
-        case "w" | "x" | "y" | "z":
-            digit = 9
-    return digit
-
-
-# %%
-def one_the_investigator(df: pd.DataFrame) -> pd.DataFrame:
-    return (
-        df.loc[~df["name"].str.endswith(("II", "III", "IV", "Jr."))]
-        .assign(
-            last_name=df["name"].str.split().str[-1].str.lower(),
-            last_name_len=lambda d: d["last_name"].str.len(),
-        )
-        .query("last_name_len == 10")
-        .assign(
-            name_char=lambda df: df["last_name"].map(list),
-            phone_num=lambda df: df["name_char"].map(
-                lambda _: "".join([str(translate_char_to_phone_num(x)) for x in _])
-            ),
-            test=lambda d: (
-                d["phone_num"].str.slice(stop=3)
-                + "-"
-                + d["phone_num"].str.slice(start=3, stop=6)
-                + "-"
-                + d["phone_num"].str.slice(start=6)
-            ),
-        )
-        .loc[lambda d: d["phone"] == d["test"], customers.columns]
-        .set_index("customerid")
-    )
+@puzzles.puzzle()
+def one_the_investigator(db: NoahsDatabase) -> pd.DataFrame:
+    customers = db.customers
+    names = customers["name"].astype("string[pyarrow]")
+    return customers.loc[
+        ~names.str.endswith(("II", "III", "IV", "Jr."))
+        & (keypad_series(names, word=-1) == keypad_series(customers["phone"]))
+    ].set_index("customerid")
 
 
 # %%
-customers.pipe(one_the_investigator)
+puzzles.solve(db, "one_the_investigator")
 
 # %%
-customers.pipe(one_the_investigator).pipe(answer)
+puzzles.solve(db, "one_the_investigator").pipe(answer)
 
 # %% [markdown]
 # ## 2. The Contractor
@@ -215,38 +178,27 @@ customers.pipe(one_the_investigator).pipe(answer)
 
 
 # %%
+@puzzles.puzzle()
 def two_the_contractor(
-    customers_df: pd.DataFrame = customers,
-    orders_df: pd.DataFrame = orders,
-    orders_items_df: pd.DataFrame = orders_items,
-    products_df: pd.DataFrame = products,
+    db: NoahsDatabase,
     initials: str = "JP",
 ) -> pd.DataFrame:
+    customerids = db.initials[initials]
     return (
         (
-            customers_df.replace([" II", " III", " IV", " Jr."], "", regex=True)
-            .assign(
-                initials=lambda d: (
-                    d["name"].str.split(" ").str[0].str[0]
-                    + d["name"].str.split(" ").str[-1].str[0]
-                )
-            )
+            db.customers.loc[lambda d: d["customerid"].isin(customerids)]
             .merge(
-                orders_df.loc[
-                    (orders_df["ordered"].dt.year == 2017)
-                    & ((orders_df["ordered"] - orders_df["shipped"]).dt.seconds <= 60)
+                db.order_lines.loc[
+                    lambda d: (
+                        d["customerid"].isin(customerids)
+                        & (d["ordered"].dt.year == 2017)
+                        & ((d["ordered"] - d["shipped"]).dt.seconds <= 60)
+                        & d["desc"].str.contains("coffee|bagel&clean", case=False)
+                    )
                 ],
                 on="customerid",
             )
-            .loc[lambda d: d["initials"] == initials]
-            .merge(orders_items_df, on="orderid")
-            .merge(
-                products_df.loc[
-                    products_df["desc"].str.contains("coffee|bagel&clean", case=False)
-                ],
-                on="sku",
-            )
-            .filter(customers.columns)
+            .filter(db.customers.columns)
         )
         .drop_duplicates()
         .set_index("customerid")
@@ -254,10 +206,10 @@ def two_the_contractor(
 
 
 # %%
-two_the_contractor().pipe(display)
+puzzles.solve(db, "two_the_contractor").pipe(display)
 
 # %%
-two_the_contractor().pipe(answer)
+puzzles.solve(db, "two_the_contractor").pipe(answer)
 
 # %% [markdown]
 # ## 3. The Neighbor
@@ -287,10 +239,7 @@ two_the_contractor().pipe(answer)
 # to?
 
 # %%
-ZODIAC_LINK = "https://en.wikipedia.org/wiki/Astrological_sign"
-
-# %%
-zodiac = pd.read_html(ZODIAC_LINK)[0]
+zodiac = pd.DataFrame(SUN_SIGNS.values())
 
 # %%
 zodiac
@@ -327,37 +276,32 @@ class ChineseZodiac(Enum):
 
     Explanation
     -----------
-    This class defines an enumeration of the twelve Chinese zodiac signs and
-    return the respective Wikipedia link.
+    This class defines an enumeration of the twelve Chinese zodiac signs.
     """
 
-    Rat = "https://en.wikipedia.org/wiki/Rat_(zodiac)"
-    Ox = "https://en.wikipedia.org/wiki/Ox_(zodiac)"
-    Tiger = "https://en.wikipedia.org/wiki/Tiger_(zodiac)"
-    Rabbit = "https://en.wikipedia.org/wiki/Rabbit_(zodiac)"
-    Dragon = "https://en.wikipedia.org/wiki/Dragon_(zodiac)"
-    Snake = "https://en.wikipedia.org/wiki/Snake_(zodiac)"
-    Horse = "https://en.wikipedia.org/wiki/Horse_(zodiac)"
-    Goat = "https://en.wikipedia.org/wiki/Goat_(zodiac)"
-    Monkey = "https://en.wikipedia.org/wiki/Monkey_(zodiac)"
-    Rooster = "https://en.wikipedia.org/wiki/Rooster_(zodiac)"
-    Dog = "https://en.wikipedia.org/wiki/Dog_(zodiac)"
-    Pig = "https://en.wikipedia.org/wiki/Pig_(zodiac)"
+    Rat = "Rat"
+    Ox = "Ox"
+    Tiger = "Tiger"
+    Rabbit = "Rabbit"
+    Dragon = "Dragon"
+    Snake = "Snake"
+    Horse = "Horse"
+    Goat = "Goat"
+    Monkey = "Monkey"
+    Rooster = "Rooster"
+    Dog = "Dog"
+    Pig = "Pig"
 
 
 # %%
 def zodiac_characteristics(
-    zodiac_df: pd.DataFrame = zodiac, zodiac_sign: ZodiacSign = ZodiacSign.Cancer
+    zodiac_sign: ZodiacSign = ZodiacSign.Cancer,
 ) -> dict[str, list[str | int]]:
     """
-    Extracts zodiac characteristics from a DataFrame based on the specified
-    zodiac sign.
+    Extracts the sun sign dates of the specified zodiac sign.
 
     Parameters
     ----------
-    zodiac_df : pd.DataFrame, optional
-        The DataFrame containing zodiac information. By default, uses a
-        predefined zodiac DataFrame.
     zodiac_sign : ZodiacSign, optional
         The zodiac sign for which characteristics are extracted. By default,
         uses ZodiacSign.Cancer.
@@ -370,30 +314,24 @@ def zodiac_characteristics(
         - 'month': List of month values.
         - 'days': List of day values.
     """
-    return (
-        (
-            zodiac_df.loc[zodiac_df["Sign"] == zodiac_sign.value]
-            .filter(like="Sun", axis=1)
-            .T
-        )
-        .set_axis(["dates"], axis="columns")
-        .assign(
-            timestamp_fmt=lambda d: pd.to_datetime(d["dates"], format="%d %B"),
-            month=lambda d: d["timestamp_fmt"].dt.month,
-            days=lambda d: d["timestamp_fmt"].dt.day,
-        )
-        .filter(regex="^(?!.*timestamp).*$")
-        .to_dict("list")
-    )
+    sign = get_sun_sign(zodiac_sign.value)
+    return {
+        "dates": [
+            f"{day} {calendar.month_name[month]}"
+            for month, day in (sign.start, sign.end)
+        ],
+        "month": [sign.start[0], sign.end[0]],
+        "days": [sign.start[1], sign.end[1]],
+    }
 
 
 # %%
-zodiac.pipe(zodiac_characteristics, ZodiacSign.Sagittarius)
+zodiac_characteristics(ZodiacSign.Sagittarius)
 
 
 # %%
 def chinese_sign_years(
-    customers_df: pd.DataFrame = customers,
+    db: NoahsDatabase,
     chinese_zodiac_animal: ChineseZodiac = ChineseZodiac.Rabbit,
 ) -> set[int]:
     """
@@ -402,9 +340,8 @@ def chinese_sign_years(
 
     Parameters
     ----------
-    customers_df : pd.DataFrame, optional
-        The DataFrame containing customer information. By default, uses a
-        predefined 'customers' DataFrame.
+    db : NoahsDatabase
+        Noah's Market database.
     chinese_zodiac_animal : ChineseZodiac, optional
         The Chinese zodiac animal for which to retrieve birth years.
         By default, uses the ChineseZodiac.Rabbit.
@@ -416,24 +353,18 @@ def chinese_sign_years(
         Chinese zodiac sign.
     """
 
-    tables = pd.read_html(chinese_zodiac_animal.value)
-
-    for i, d in enumerate(tables):
-        cols = list(d.columns)
-        if "Start date" in cols:
-            date_table_index = i
-
-    return set(pd.to_numeric(tables[date_table_index]["Start date"].str[-4:])) & set(
-        customers_df["birthdate"].dt.year
+    return set(animal_years(chinese_zodiac_animal.value)) & set(
+        db.customers["birthdate"].dt.year
     )
 
 
 # %%
-chinese_sign_years(customers, ChineseZodiac.Dragon)
+chinese_sign_years(db, ChineseZodiac.Dragon)
 
 
 # %%
 def western_astrology_with_chinese_dates(
+    db: NoahsDatabase,
     western_astrology_sign: ZodiacSign = ZodiacSign.Cancer,
     chinese_astrology_animal: ChineseZodiac = ChineseZodiac.Rabbit,
 ) -> list[pd.Timestamp]:
@@ -443,6 +374,8 @@ def western_astrology_with_chinese_dates(
 
     Parameters
     ----------
+    db : NoahsDatabase
+        Noah's Market database, whose customers' birth years are matched.
     western_astrology_sign : ZodiacSign, optional
         The Western astrology sign for which to retrieve overlapping dates.
         By default, uses ZodiacSign.Cancer.
@@ -461,7 +394,7 @@ def western_astrology_with_chinese_dates(
         zodiac_sign=western_astrology_sign
     )
     animal_years: set[int] = chinese_sign_years(
-        chinese_zodiac_animal=chinese_astrology_animal
+        db, chinese_zodiac_animal=chinese_astrology_animal
     )
 
     months: list[int] = sign_dict["month"]
@@ -487,37 +420,44 @@ def western_astrology_with_chinese_dates(
 
 # %%
 pd.Series(
-    western_astrology_with_chinese_dates(ZodiacSign.Sagittarius, ChineseZodiac.Dragon)
+    western_astrology_with_chinese_dates(
+        db, ZodiacSign.Sagittarius, ChineseZodiac.Dragon
+    )
 )
 
 
 # %%
+@puzzles.puzzle("two_the_contractor")
 def three_the_neighbor(
-    customers_df: pd.DataFrame = customers,
+    db: NoahsDatabase,
+    two_the_contractor: pd.DataFrame,
     western_astrology_sign: ZodiacSign = ZodiacSign.Cancer,
     chinese_astrology_animal: ChineseZodiac = ChineseZodiac.Rabbit,
 ) -> pd.DataFrame:
-    dates = western_astrology_with_chinese_dates(
-        western_astrology_sign, chinese_astrology_animal
-    )
-    the_contractor = two_the_contractor()
     return (
-        customers_df.loc[customers_df["birthdate"].isin(dates)]
+        add_zodiac(db.customers)
+        .loc[
+            lambda d: (
+                (d["western_sign"] == SIGN_CODES[western_astrology_sign.value])
+                & (d["chinese_animal"] == ANIMAL_CODES[chinese_astrology_animal.value])
+            )
+        ]
         .assign(
             zip_code=lambda d: d["citystatezip"].str[-5:],
-            neighbor=lambda d: d["zip_code"]
-            == the_contractor["citystatezip"].str[-5:].iloc[0],
+            neighbor=lambda d: (
+                d["zip_code"] == two_the_contractor["citystatezip"].str[-5:].iloc[0]
+            ),
         )
         .loc[lambda d: d["neighbor"]]
-        .filter(customers_df.columns)
+        .filter(db.customers.columns)
     )
 
 
 # %%
-customers.pipe(three_the_neighbor).pipe(display)
+puzzles.solve(db, "three_the_neighbor").pipe(display)
 
 # %%
-customers.pipe(three_the_neighbor).pipe(answer)
+puzzles.solve(db, "three_the_neighbor").pipe(answer)
 
 
 # %%
@@ -550,35 +490,33 @@ del zodiac
 
 
 # %%
-def earlybird_customer_id(
-    orders_df: pd.DataFrame = orders, orders_items_df: pd.DataFrame = orders_items
-) -> int:
-    return (
-        orders_df.loc[
-            (orders_df["ordered"].dt.hour < 5) & (orders_df["shipped"].dt.hour < 5)
-        ]
-        .merge(orders_items_df, on="orderid")
-        .loc[lambda d: (d["sku"].str[:3] == "BKY") & (d["qty"] > 1), "customerid"]
-        .mode()
-        .iloc[0]
+@puzzles.puzzle()
+def earlybird_customer_id(db: NoahsDatabase) -> int:
+    pre_dawn = PurchaseMatrix.from_database(
+        db,
+        where=(pc.hour(pc.field("ordered")) < 5)
+        & (pc.hour(pc.field("shipped")) < 5)
+        & (pc.field("qty") > 1),
     )
+    customerids, _ = pre_dawn.top(pc.field("department") == "BKY")
+    return customerids[0]
 
 
 # %%
-earlybird_customer_id()
+puzzles.solve(db, "earlybird_customer_id")
 
 
 # %%
-def four_the_early_bird(customers_df: pd.DataFrame = customers) -> pd.DataFrame:
-    earlybird_customer: int = earlybird_customer_id()
-    return customers_df.loc[customers_df["customerid"] == earlybird_customer]
+@puzzles.puzzle("earlybird_customer_id")
+def four_the_early_bird(db: NoahsDatabase, earlybird_customer_id: int) -> pd.DataFrame:
+    return db.customers.loc[db.customers["customerid"] == earlybird_customer_id]
 
 
 # %%
-customers.pipe(four_the_early_bird).pipe(display)
+puzzles.solve(db, "four_the_early_bird").pipe(display)
 
 # %%
-customers.pipe(four_the_early_bird).pipe(answer)
+puzzles.solve(db, "four_the_early_bird").pipe(answer)
 
 
 # %% [markdown]
@@ -603,11 +541,9 @@ customers.pipe(four_the_early_bird).pipe(answer)
 
 
 # %%
+@puzzles.puzzle()
 def top_customers_id_cat_products(
-    customers_df: pd.DataFrame = customers,
-    orders_df: pd.DataFrame = orders,
-    orders_items_df: pd.DataFrame = orders_items,
-    products_df: pd.DataFrame = products,
+    db: NoahsDatabase,
     new_york_borough: str = "Staten Island",
 ) -> pd.Series:
     """
@@ -617,14 +553,8 @@ def top_customers_id_cat_products(
 
     Parameters
     ----------
-    customers_df : pd.DataFrame, optional
-        DataFrame containing customer information, by default customers
-    orders_df : pd.DataFrame, optional
-        DataFrame containing order information, by default orders
-    orders_items_df : pd.DataFrame, optional
-        DataFrame containing order items information, by default orders_items
-    products_df : pd.DataFrame, optional
-        DataFrame containing product information, by default products
+    db : NoahsDatabase
+        Noah's Market database.
     new_york_borough : str, optional
         Name of the New York borough to filter customers, by default "Staten
         Island"
@@ -636,32 +566,29 @@ def top_customers_id_cat_products(
         specified criteria.
     """
     return pd.Series(
-        customers_df.loc[
-            customers_df["citystatezip"].str.split(",").str[0] == new_york_borough
-        ]
-        .merge(orders_df, on="customerid")
-        .merge(orders_items_df, on="orderid")
-        .merge(products_df, on="sku")
-        .loc[
-            lambda d: d["sku"].isin(
-                products_df.loc[
-                    products_df["desc"].str.contains("senior cat", case=False)
-                ]
-                .agg({"sku": "unique"})
-                .squeeze()
-            )
+        db.customers.loc[
+            db.customers["citystatezip"].str.split(",").str[0] == new_york_borough
         ]
+        .merge(
+            db.order_lines.loc[
+                db.order_lines["desc"].str.contains("senior cat", case=False)
+            ],
+            on="customerid",
+        )
         .agg({"customerid": "mode"})
         .squeeze()
     )
 
 
 # %%
-customers.pipe(top_customers_id_cat_products)
+puzzles.solve(db, "top_customers_id_cat_products")
 
 
 # %%
-def five_the_cat_lady(customers_df: pd.DataFrame = customers) -> pd.DataFrame:
+@puzzles.puzzle("top_customers_id_cat_products")
+def five_the_cat_lady(
+    db: NoahsDatabase, top_customers_id_cat_products: pd.Series
+) -> pd.DataFrame:
     """
     Filters and returns a DataFrame containing information about customers who
     are identified as top customers based on their purchase history of products
@@ -669,8 +596,10 @@ def five_the_cat_lady(customers_df: pd.DataFrame = customers) -> pd.DataFrame:
 
     Parameters
     ----------
-    customers_df : pd.DataFrame, optional
-        DataFrame containing customer information, by default customers
+    db : NoahsDatabase
+        Noah's Market database.
+    top_customers_id_cat_products : pd.Series
+        Result of `top_customers_id_cat_products`.
 
     Returns
     -------
@@ -678,20 +607,19 @@ def five_the_cat_lady(customers_df: pd.DataFrame = customers) -> pd.DataFrame:
         DataFrame containing information about customers identified as top
         customers based on their purchase history of "cat" products.
     """
-    top_customers_id_cat_products_series: pd.Series = top_customers_id_cat_products()
-    return customers_df.loc[
-        customers_df["customerid"].isin(top_customers_id_cat_products_series)
+    return db.customers.loc[
+        db.customers["customerid"].isin(top_customers_id_cat_products)
     ]
 
 
 # %%
-customers.pipe(five_the_cat_lady)
+puzzles.solve(db, "five_the_cat_lady")
 
 # %%
-(customers.pipe(five_the_cat_lady).pipe(display))
+(puzzles.solve(db, "five_the_cat_lady").pipe(display))
 
 # %%
-(customers.pipe(five_the_cat_lady).pipe(answer))
+(puzzles.solve(db, "five_the_cat_lady").pipe(answer))
 
 
 # %% [markdown]
@@ -717,26 +645,16 @@ customers.pipe(five_the_cat_lady)
 
 
 # %%
-def six_the_bargain_hunter(
-    customers_df: pd.DataFrame = customers,
-    orders_df: pd.DataFrame = orders,
-    orders_items_df: pd.DataFrame = orders_items,
-    products_df: pd.DataFrame = products,
-) -> pd.DataFrame:
+@puzzles.puzzle()
+def six_the_bargain_hunter(db: NoahsDatabase) -> pd.DataFrame:
     """
     Filters a DataFrame of customers to include only those who are identified as
     savvy bargain hunters.
 
     Parameters
     ----------
-    customers_df : pd.DataFrame, optional
-        DataFrame containing customer information, by default customers.
-    orders_df : pd.DataFrame, optional
-        DataFrame containing order information, by default orders.
-    orders_items_df : pd.DataFrame, optional
-        DataFrame containing order items information, by default orders_items.
-    products_df : pd.DataFrame, optional
-        DataFrame containing product information, by default products.
+    db : NoahsDatabase
+        Noah's Market database.
 
     Returns
     -------
@@ -750,26 +668,19 @@ def six_the_bargain_hunter(
     on their purchase behavior. The criteria include purchasing products at a
     unit price less than or equal to the wholesale cost. The resulting DataFrame
     includes customer information for those who meet the specified criteria.
+    Lines are counted once per product and order, at their lowest margin, and
+    then per customer, see `CustomerMargins`.
     """
-    bh_customer_id = (
-        orders_items_df.groupby(["sku", "orderid"], as_index=False)
-        .agg({"unit_price": "min"})
-        .merge(products_df, on="sku")
-        .loc[lambda d: d["unit_price"] <= d["wholesale_cost"]]
-        .merge(orders_df, on="orderid")
-        .merge(customers_df, on="customerid")
-        .agg({"customerid": "mode"})
-        .iloc[0]
-    )
+    bh_customer_id = CustomerMargins.from_database(db, at_cost=True).top()
 
-    return customers_df.loc[customers_df["customerid"].isin(bh_customer_id)]
+    return db.customers.loc[db.customers["customerid"].isin(bh_customer_id)]
 
 
 # %%
-customers.pipe(six_the_bargain_hunter).pipe(display)
+puzzles.solve(db, "six_the_bargain_hunter").pipe(display)
 
 # %%
-customers.pipe(six_the_bargain_hunter).pipe(answer)
+puzzles.solve(db, "six_the_bargain_hunter").pipe(answer)
 
 
 # %% [markdown]
@@ -796,202 +707,92 @@ customers.pipe(six_the_bargain_hunter).pipe(answer)
 
 
 # %%
-def date_hour_mm(orders_df: pd.DataFrame = orders) -> pd.DataFrame:
+def in_store_color_lines(db: NoahsDatabase) -> pd.DataFrame:
     """
-    Extracts and formats the date and hour from the 'ordered' column in a
-    DataFrame of order information.
+    Selects the order lines of items sold in several colors, bought in store.
 
     Parameters
     ----------
-    orders_df : pd.DataFrame, optional
-        DataFrame containing order information, by default orders.
+    db : NoahsDatabase
+        Noah's Market database.
 
     Returns
     -------
     pd.DataFrame
-        DataFrame with an additional 'date_hour' column representing the
-        formatted date and hour.
+        Order lines with an additional 'desc_color_agnostic' column, the item
+        name without its color.
 
     Notes
     -----
-    This function extracts the date and hour information from the 'ordered'
-    column and adds a new column 'date_hour' to the DataFrame. The 'date_hour'
-    column is formatted as 'MM/DD/YYYY HH:MM' to represent the month, day,
-    year, and hour of each order.
-    """
-    return orders_df.assign(
-        date_hour=lambda df: df["ordered"].dt.strftime("%m/%d/%Y %H:%M")
-    )
-
-
-# %%
-def color_agnostic_item_name(products_df: pd.DataFrame = products) -> pd.DataFrame:
-    """
-    Generates a new column for items, removing color information to create
-    color-agnostic names.
-
-    Parameters
-    ----------
-    products_df : pd.DataFrame, optional
-        DataFrame containing product information, by default products.
-
-    Returns
-    -------
-    pd.DataFrame
-        DataFrame with an additional 'desc_color_agnostic' column representing
-        color-agnostic item names.
-
-    Notes
-    -----
-    This function creates a new column 'desc_color_agnostic' by removing color
-    information from the 'desc' column. It ensures that item names are
-    represented without specific color details.
+    In-store orders are shipped as soon as they are placed, see the
+    'in_store' flag of `order_lines`. Items that do not come in colors have no
+    'color_id'.
 
     Examples
     --------
-    >>> color_agnostic_item_name(df)
-    # Returns a DataFrame with 'desc_color_agnostic' column:
+    >>> in_store_color_lines(db)
     # 'Manual Mixer (orange)' -> 'Manual Mixer'
-
     """
-    return (
-        products_df.assign(
-            color_list=lambda df: df["desc"]
-            .str.split("(")
-            .str[1]
-            .str.replace(")", "")
-            .str.split()
-        )
-        .assign(color=lambda df: df["color_list"].str[0])
-        .dropna()
-        .loc[lambda df: df["color"].str[0].str.islower()]
-        .drop(columns=["color_list"])
-        .assign(desc_color_agnostic=lambda df: df["desc"].str.split(r" \(").str[0])
-    )
+    return db.order_lines.loc[
+        db.order_lines["in_store"] & db.order_lines["color_id"].notna()
+    ].assign(desc_color_agnostic=lambda df: df["item"])
 
 
 # %%
-def filter_in_store_orders(orders_df: pd.DataFrame = orders) -> pd.DataFrame:
+@puzzles.puzzle("six_the_bargain_hunter")
+def the_order_of_the_meet(
+    db: NoahsDatabase, six_the_bargain_hunter: pd.DataFrame, tolerance: int = 0
+) -> pd.DataFrame:
     """
-    Filters out in-store orders from a DataFrame of order information.
+    Finds who bought the same item as the bargain hunter, in store, at the
+    same time.
 
     Parameters
     ----------
-    orders_df : pd.DataFrame, optional
-        DataFrame containing order information, by default orders.
+    db : NoahsDatabase
+        Noah's Market database.
+    six_the_bargain_hunter : pd.DataFrame
+        Result of `six_the_bargain_hunter`.
+    tolerance : int, optional
+        Minutes between the two purchases, by default 0, the same minute.
 
     Returns
     -------
     pd.DataFrame
-        DataFrame with in-store orders removed.
+        The bargain hunter's matched order lines, then the other customer's.
 
     Notes
     -----
-    This function filters out orders that were bought in-store by comparing the
-    'ordered' and 'shipped' columns. Only orders with distinct 'ordered' and
-    'shipped' timestamps are retained.
-
-    Example
-    -------
-    >>> filter_in_store_orders(df)
-    # Returns a DataFrame with in-store orders removed.
+    Purchases are matched on the item's 'base_product_id' from the catalog and
+    the minute they were placed in, both integers, see `co_purchases`.
     """
-    return orders_df.loc[orders_df["ordered"] == orders_df["shipped"]]
-
-
-# %%
-def bargain_hunter_in_store_color_items(
-    products_df: pd.DataFrame = products,
-    orders_items_df: pd.DataFrame = orders_items,
-    orders_df: pd.DataFrame = orders,
-) -> pd.DataFrame:
-    return (
-        products_df.pipe(color_agnostic_item_name)
-        .merge(orders_items_df, on="sku")
-        .merge(orders_df, on="orderid")
-        .loc[
-            lambda d: (
-                d["customerid"].isin(six_the_bargain_hunter().loc[:, "customerid"])
-            )
-        ]
-        .pipe(filter_in_store_orders)
-        .pipe(date_hour_mm)
+    return co_purchases(
+        in_store_color_lines(db), six_the_bargain_hunter["customerid"], tolerance
     )
 
 
 # %%
-def the_order_of_the_meet(
-    orders_df: pd.DataFrame = orders,
-    orders_items_df: pd.DataFrame = orders_items,
-    products_df: pd.DataFrame = products,
-) -> pd.DataFrame:
-    """
-    Combines and filters various DataFrames to create a comprehensive dataset
-    of order information.
-
-    Parameters
-    ----------
-    orders_df : pd.DataFrame, optional
-        DataFrame containing order information, by default orders.
-    orders_items_df : pd.DataFrame, optional
-        DataFrame containing order items information, by default orders_items.
-    products_df : pd.DataFrame, optional
-        DataFrame containing product information, by default products.
-
-    Returns
-    -------
-    pd.DataFrame
-        DataFrame with a filtered and merged dataset representing comprehensive
-        order information.
-    """
-    bargain_hunter = bargain_hunter_in_store_color_items()
-    return (
-        orders_df.pipe(filter_in_store_orders)
-        .merge(orders_items_df, on="orderid")
-        .pipe(date_hour_mm)
-        .merge(products_df.pipe(color_agnostic_item_name), on="sku")
-        .merge(
-            bargain_hunter.loc[:, ["desc_color_agnostic", "date_hour"]],
-            on=["desc_color_agnostic", "date_hour"],
-        )
-        .loc[lambda df: ~df["customerid"].isin(bargain_hunter["customerid"])]
-        .filter(bargain_hunter.columns)
-        .pipe(
-            lambda cute_guy: pd.concat(
-                [
-                    bargain_hunter.loc[
-                        lambda b: (
-                            b["desc_color_agnostic"].isin(
-                                cute_guy["desc_color_agnostic"]
-                            )
-                        )
-                        & (b["date_hour"].isin(cute_guy["date_hour"]))
-                    ],
-                    cute_guy,
-                ]
-            )
-        )
-    )
-
-
-# %%
-orders.pipe(the_order_of_the_meet)
+puzzles.solve(db, "the_order_of_the_meet")
 
 
 # %%
-def seven_the_meet_cute(customers_df: pd.DataFrame = customers) -> pd.DataFrame:
-    the_meet = the_order_of_the_meet()
-    the_couple_customer_ids = the_meet["customerid"]
-    the_bargain_hunter = six_the_bargain_hunter()["customerid"]
+@puzzles.puzzle("the_order_of_the_meet", "six_the_bargain_hunter")
+def seven_the_meet_cute(
+    db: NoahsDatabase,
+    the_order_of_the_meet: pd.DataFrame,
+    six_the_bargain_hunter: pd.DataFrame,
+) -> pd.DataFrame:
+    the_couple_customer_ids = the_order_of_the_meet["customerid"]
+    the_bargain_hunter = six_the_bargain_hunter["customerid"]
     the_meet_cute_id = set(the_couple_customer_ids) - set(the_bargain_hunter)
-    return customers_df.loc[customers_df["customerid"].isin(list(the_meet_cute_id))]
+    return db.customers.loc[db.customers["customerid"].isin(list(the_meet_cute_id))]
 
 
 # %%
-customers.pipe(seven_the_meet_cute).pipe(display)
+puzzles.solve(db, "seven_the_meet_cute").pipe(display)
 
 # %%
-customers.pipe(seven_the_meet_cute).pipe(answer)
+puzzles.solve(db, "seven_the_meet_cute").pipe(answer)
 
 
 # %% [markdown]
@@ -1020,25 +821,22 @@ customers.pipe(seven_the_meet_cute).pipe(answer)
 
 
 # %%
-def eight_the_collector(
-    customers_df: pd.DataFrame = customers,
-    orders_df: pd.DataFrame = orders,
-    orders_items_df: pd.DataFrame = orders_items,
-):
-    top_buyer = (
-        orders_df.merge(orders_items_df, on="orderid")["customerid"]
-        .value_counts()
-        .idxmax()
-    )
+@puzzles.puzzle()
+def eight_the_collector(db: NoahsDatabase):
+    collectors = set(db.collectibles.missing(0, COLLECTIBLES)["customerid"].to_pylist())
+    # The former ranking, by order lines, breaks ties between collectors and
+    # stands in if nobody owns every collectible.
+    ranked, _ = db.purchases.top(k=len(db.purchases))
+    top_buyer, *_ = [c for c in ranked if c in collectors] or ranked
 
-    return customers_df.loc[customers["customerid"] == top_buyer]
+    return db.customers.loc[db.customers["customerid"] == top_buyer]
 
 
 # %%
-customers.pipe(eight_the_collector).pipe(display)
+puzzles.solve(db, "eight_the_collector").pipe(display)
 
 # %%
-customers.pipe(eight_the_collector).pipe(answer)
+puzzles.solve(db, "eight_the_collector").pipe(answer)
 
 # %% [markdown]
 # ## 9. Epilogue
@@ -1066,3 +864,14 @@ customers.pipe(eight_the_collector).pipe(answer)
 #
 #
 # ![hod_5784_finish](hod_5784_finish.gif)
+
+# %% [markdown]
+# ## Appendix: Parallel Solve
+#
+# Solving every puzzle of a fresh database on a process pool, each as soon as
+# the puzzles it builds on are solved. The workers open the cached tables
+# memory-mapped, so the whole solve takes about as long as its critical path,
+# the slowest chain of dependent puzzles, plus starting the pool.
+
+# %%
+print(puzzles.run(get_dataset("5784").database(), executor="process").report())
@@ -0,0 +1,74 @@
+"""
+Appending a batch of orders versus caching the grown archive again.
+
+A 1% batch is made up from the last orders of the 2024 data, with shifted
+order ids. In an empty cache, the tables and derived tables are built once,
+then the batch is appended with `append_orders`. That is compared with a full
+rebuild, i.e. converting the four tables and building the derived tables from
+scratch, which is what a changed archive costs.
+
+Usage: python benchmarks/append.py [DATA_DIR]
+"""
+
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pyarrow.compute as pc
+from pyarrow import csv
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+
+BATCH_FRACTION = 0.01
+
+
+def seconds(f) -> float:
+    start = time.perf_counter()
+    f()
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    data_dir = Path(sys.argv[1]) if len(sys.argv) > 1 else ROOT / "2024"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["NOAHS_CACHE_DIR"] = str(Path(tmp) / "cache")
+        from noahs_market.derived import build_derived
+        from noahs_market.ingest import append_orders
+        from noahs_market.loader import cache_tables, table_sources
+        from noahs_market.store import open_arrow
+
+        sources = table_sources(str(data_dir / "noahs-{table}.csv.zip"))
+        paths = {}
+
+        def rebuild():
+            paths.update(cache_tables(sources))
+            build_derived(paths)
+
+        rebuild_seconds = seconds(rebuild)
+
+        # The batch: the last 1% of orders and their items, renumbered.
+        orders = open_arrow(paths["orders"])
+        n_batch = int(orders.num_rows * BATCH_FRACTION)
+        batch_orders = orders.slice(orders.num_rows - n_batch)
+        first = batch_orders["orderid"][0].as_py()
+        items = open_arrow(paths["orders_items"])
+        items = items.filter(pc.greater_equal(items["orderid"], first))
+        offset = 10 ** len(str(orders["orderid"][-1].as_py()))
+        batch = {}
+        for name, table in (("orders", batch_orders), ("orders_items", items)):
+            table = table.set_column(0, "orderid", pc.add(table["orderid"], offset))
+            batch[name] = Path(tmp) / f"{name}-batch.csv"
+            csv.write_csv(table, batch[name])
+
+        append_seconds = seconds(
+            lambda: append_orders(paths, batch["orders"], batch["orders_items"])
+        )
+
+    print(f"{'batch':<22}{n_batch:>8} orders")
+    print(f"{'full rebuild':<22}{rebuild_seconds:>8.3f} s")
+    print(f"{'append':<22}{append_seconds:>8.3f} s")
+    print(f"{'ratio':<22}{append_seconds / rebuild_seconds:>8.1%}")
@@ -0,0 +1,97 @@
+"""
+Complete and nearly complete collections on 10x the 2024 lines, join vs bits.
+
+The 2024 order lines are repeated `SCALE` times, each copy with its own
+customers. The join counts the distinct skus every customer bought of every
+collection with a pandas merge and group-by, and compares them with the size
+of the collection; `CollectionIndex` ANDs every customer's bitset with every
+collection's and counts the bits. Both list who owns every collection, and who
+misses exactly one collectible of it.
+
+Usage: python benchmarks/collectibles.py [DATA_DIR]
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+
+from noahs_market import CollectionIndex, NoahsDatabase
+from noahs_market.collectibles import noahs_collections
+from noahs_market.derived import build_derived
+from noahs_market.loader import TABLE_NAMES
+from noahs_market.store import open_segments
+
+SCALE = 10
+
+
+def join(lines: pd.DataFrame, collections: dict[str, list[str]]) -> pd.DataFrame:
+    members = pd.DataFrame(
+        [(name, sku) for name, skus in collections.items() for sku in skus],
+        columns=["collection", "sku"],
+    )
+    sizes = members.groupby("collection").size().rename("size")
+    owned = (
+        lines[["customerid", "sku"]]
+        .drop_duplicates()
+        .merge(members, on="sku")
+        .groupby(["customerid", "collection"])
+        .size()
+        .rename("owned")
+        .reset_index()
+        .join(sizes, on="collection")
+    )
+    return owned.loc[owned["size"] - owned["owned"] <= 1]
+
+
+def seconds(f) -> tuple[float, object]:
+    start = time.perf_counter()
+    result = f()
+    return time.perf_counter() - start, result
+
+
+if __name__ == "__main__":
+    data_dir = Path(sys.argv[1]) if len(sys.argv) > 1 else ROOT / "2024"
+
+    db = NoahsDatabase(str(data_dir / "noahs-{table}.csv.zip"))
+    paths = {table: db.path(table) for table in TABLE_NAMES}
+    derived = build_derived(paths)
+    lines = open_segments(derived["order_lines"]).select(["customerid", "sku"])
+    lines = pa.concat_tables(
+        lines.set_column(
+            0,
+            "customerid",
+            pc.add(lines["customerid"], pa.scalar(copy * 100_000, pa.int32())),
+        )
+        for copy in range(SCALE)
+    )
+    collections = noahs_collections(open_segments(derived["catalog"]))
+    frame = lines.to_pandas()
+    print(f"{'order lines':<22}{lines.num_rows:>8}")
+
+    join_seconds, joined = seconds(lambda: join(frame, collections))
+    print(f"{'join':<22}{join_seconds:>8.3f} s")
+    build_seconds, index = seconds(lambda: CollectionIndex(lines, collections))
+    print(f"{'bitsets, build':<22}{build_seconds:>8.3f} s{len(index):>8} customers")
+    query_seconds, (complete, missing_one) = seconds(
+        lambda: (index.missing(0), index.missing(1))
+    )
+    print(f"{'bitsets, query':<22}{query_seconds:>8.3f} s")
+
+    # The join only sees the collections a customer owns something of, so
+    # does not list who misses the one item of a single-item collection.
+    sizes = dict(zip(index.collections, index.sizes))
+    found = {
+        (row["customerid"], row["collection"])
+        for row in pa.concat_tables([complete, missing_one]).to_pylist()
+        if sizes[row["collection"]] > len(row["missing"])
+    }
+    assert found == set(zip(joined["customerid"], joined["collection"]))
+    print(f"{'complete':<22}{complete.num_rows:>8}")
+    print(f"{'missing one':<22}{missing_one.num_rows:>8}")
@@ -0,0 +1,117 @@
+"""
+The store co-presence graph at 10x the 2024 order volume, join versus sweep.
+
+The 2024 orders are repeated `SCALE` times over the same years, each copy
+with its own customers and every order moved by up to a day, so the store is
+`SCALE` times as busy. The bucket join puts in-store orders in `WINDOW`-minute
+buckets, joins every bucket with itself and the next one, and keeps the pairs
+within the window; `CoPresence` sweeps the orders sorted by time. Both count
+the orders every two customers placed within the window of each other.
+
+Usage: python benchmarks/copresence.py [DATA_DIR]
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+
+from noahs_market import CoPresence, NoahsDatabase
+from noahs_market.instore import in_store_orders
+from noahs_market.store import open_segments
+
+SCALE = 10
+WINDOW = 5
+
+
+def bucket_join(orders: pd.DataFrame) -> pd.DataFrame:
+    in_store = orders.loc[orders["ordered"] == orders["shipped"]]
+    orders = pd.DataFrame(
+        {
+            "row": np.arange(len(in_store)),
+            "customerid": in_store["customerid"].to_numpy(),
+            "seconds": in_store["ordered"].to_numpy().astype("datetime64[s]"),
+        }
+    ).assign(seconds=lambda d: d["seconds"].astype(np.int64))
+    orders = orders.assign(bucket=orders["seconds"] // (WINDOW * 60))
+    # A bucket is as wide as the window, so pairs are in the same bucket, each
+    # found twice, or in two consecutive ones.
+    same = orders.merge(orders, on="bucket").loc[lambda d: d["row_x"] < d["row_y"]]
+    following = orders.merge(orders.assign(bucket=orders["bucket"] - 1), on="bucket")
+    pairs = pd.concat([same, following]).loc[
+        lambda d: (
+            (d["customerid_x"] != d["customerid_y"])
+            & ((d["seconds_y"] - d["seconds_x"]).abs() <= WINDOW * 60)
+        )
+    ]
+    low = np.minimum(pairs["customerid_x"], pairs["customerid_y"])
+    high = np.maximum(pairs["customerid_x"], pairs["customerid_y"])
+    return (
+        pd.DataFrame({"customerid": low, "other": high})
+        .value_counts()
+        .rename("visits")
+        .reset_index()
+    )
+
+
+def seconds(f) -> tuple[float, object]:
+    start = time.perf_counter()
+    result = f()
+    return time.perf_counter() - start, result
+
+
+if __name__ == "__main__":
+    data_dir = Path(sys.argv[1]) if len(sys.argv) > 1 else ROOT / "2024"
+
+    db = NoahsDatabase(str(data_dir / "noahs-{table}.csv.zip"))
+    orders = open_segments(db.path("orders")).select(
+        ["orderid", "customerid", "ordered", "shipped"]
+    )
+    rng = np.random.default_rng(0)
+    copies = []
+    for copy in range(SCALE):
+        shift = pa.array(
+            rng.integers(-43_200, 43_200, orders.num_rows).astype("timedelta64[s]")
+        )
+        ordered = pa.compute.add(orders["ordered"], shift)
+        copies.append(
+            pa.table(
+                {
+                    "orderid": orders["orderid"],
+                    "customerid": pa.compute.add(
+                        orders["customerid"], pa.scalar(copy * 100_000, pa.int32())
+                    ),
+                    "ordered": ordered,
+                    "shipped": pa.compute.if_else(
+                        pa.compute.equal(orders["ordered"], orders["shipped"]),
+                        ordered,
+                        orders["shipped"],
+                    ),
+                }
+            )
+        )
+    scaled = pa.concat_tables(copies)
+    print(f"{'in-store orders':<22}{in_store_orders(scaled).num_rows:>8}")
+
+    join_seconds, joined = seconds(lambda: bucket_join(scaled.to_pandas()))
+    print(f"{'bucket join':<22}{join_seconds:>8.3f} s{len(joined):>10} edges")
+    sweep_seconds, copresence = seconds(lambda: CoPresence(scaled, WINDOW))
+    print(f"{'sweep-line':<22}{sweep_seconds:>8.3f} s{len(copresence):>10} edges")
+
+    query_seconds, _ = seconds(
+        lambda: [copresence.neighbors(customerid) for customerid in range(1000, 2000)]
+    )
+    print(f"{'1k neighbor queries':<22}{query_seconds:>8.3f} s")
+
+    edges = copresence.edges.to_pandas()
+    assert (
+        joined.sort_values(["customerid", "other"], ignore_index=True)
+        .astype(edges.dtypes)
+        .equals(edges)
+    )
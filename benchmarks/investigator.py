@@ -0,0 +1,116 @@
+"""
+The investigator puzzle on 1M customers, per character versus per column.
+
+The 2024 customers are repeated up to `N_CUSTOMERS` rows. The former solvers
+spell every last name one character at a time in Python (`map` with a `match`
+statement in pandas, `map_elements` in Polars); the new ones hand the whole
+column to `noahs_market.keypad`.
+
+Usage: python benchmarks/investigator.py [DATA_DIR]
+"""
+
+import sys
+import timeit
+from functools import partial
+from pathlib import Path
+
+import pandas as pd
+import polars as pl
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+
+from noahs_market import keypad_expr, keypad_series, read_pandas
+
+N_CUSTOMERS = 1_000_000
+SUFFIXES = ("II", "III", "IV", "Jr.")
+
+
+def translate_char(char: str) -> str:
+    # The former solvers' keypad.
+    match char.lower():
+        case "a" | "b" | "c":
+            return "2"
+        case "d" | "e" | "f":
+            return "3"
+        case "g" | "h" | "i":
+            return "4"
+        case "j" | "k" | "l":
+            return "5"
+        case "m" | "n" | "o":
+            return "6"
+        case "p" | "q" | "r" | "s":
+            return "7"
+        case "t" | "u" | "v":
+            return "8"
+        case "w" | "x" | "y" | "z":
+            return "9"
+        case _:
+            return char
+
+
+def translate(text: str) -> str:
+    return "".join(translate_char(char) for char in text)
+
+
+def pandas_per_character(customers: pd.DataFrame) -> pd.DataFrame:
+    return (
+        customers.loc[~customers["name"].str.endswith(SUFFIXES)]
+        .assign(last_name=lambda d: d["name"].str.split().str[-1].str.lower())
+        .loc[lambda d: d["last_name"].str.len() == 10]
+        .assign(
+            digits=lambda d: d["last_name"].map(translate),
+            test=lambda d: (
+                d["digits"].str[:3]
+                + "-"
+                + d["digits"].str[3:6]
+                + "-"
+                + d["digits"].str[6:]
+            ),
+        )
+        .loc[lambda d: d["phone"] == d["test"], customers.columns]
+    )
+
+
+def pandas_per_column(customers: pd.DataFrame) -> pd.DataFrame:
+    names = customers["name"].astype("string[pyarrow]")
+    return customers.loc[
+        ~names.str.endswith(SUFFIXES)
+        & (keypad_series(names, word=-1) == keypad_series(customers["phone"]))
+    ]
+
+
+def polars_per_character(customers: pl.DataFrame) -> pl.DataFrame:
+    return customers.filter(
+        ~pl.col("name").str.contains_any(list(SUFFIXES)),
+        pl.col("name")
+        .str.split(" ")
+        .list.last()
+        .map_elements(translate, return_dtype=pl.String)
+        == pl.col("phone").str.replace_all("-", "", literal=True),
+    )
+
+
+def polars_per_column(customers: pl.DataFrame) -> pl.DataFrame:
+    return customers.filter(
+        ~pl.col("name").str.contains_any(list(SUFFIXES)),
+        keypad_expr(pl.col("name"), word=-1) == keypad_expr(pl.col("phone")),
+    )
+
+
+if __name__ == "__main__":
+    data_dir = Path(sys.argv[1]) if len(sys.argv) > 1 else ROOT / "2024"
+
+    customers = read_pandas(data_dir / "noahs-customers.csv.zip")
+    repeats = -(-N_CUSTOMERS // len(customers))
+    pd_customers = pd.concat([customers] * repeats, ignore_index=True)[:N_CUSTOMERS]
+    pl_customers = pl.from_pandas(pd_customers)
+
+    for label, solver, frame in [
+        ("pandas per character", pandas_per_character, pd_customers),
+        ("pandas per column", pandas_per_column, pd_customers),
+        ("polars per character", polars_per_character, pl_customers),
+        ("polars per column", polars_per_column, pl_customers),
+    ]:
+        seconds = min(timeit.repeat(partial(solver, frame), number=1, repeat=3))
+        print(f"{label:<22}{seconds:>8.3f} s{len(solver(frame)):>8} matches")
@@ -0,0 +1,79 @@
+"""
+The bargain hunter on 10x the 2024 order lines, filter-and-mode versus margins.
+
+The 2024 order lines are repeated `SCALE` times, each copy with its own
+customers. The former solver filters the lines sold at or below cost,
+drops duplicate order lines and takes the most frequent customer, again for
+every question; `CustomerMargins` sums every line's margin per customer once,
+and every ranking after that sorts one row per customer.
+
+Usage: python benchmarks/margins.py [DATA_DIR]
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+
+from noahs_market import CustomerMargins, NoahsDatabase
+from noahs_market.derived import build_derived
+from noahs_market.loader import TABLE_NAMES
+from noahs_market.store import open_segments
+
+SCALE = 10
+
+
+def mode(lines: pd.DataFrame) -> int:
+    return (
+        lines.loc[
+            lambda d: d["unit_price"] <= d["wholesale_cost"],
+            ["sku", "orderid", "customerid"],
+        ]
+        .drop_duplicates(subset=["sku", "orderid"])
+        .agg({"customerid": "mode"})
+        .iloc[0, 0]
+    )
+
+
+def seconds(f) -> tuple[float, object]:
+    start = time.perf_counter()
+    result = f()
+    return time.perf_counter() - start, result
+
+
+if __name__ == "__main__":
+    data_dir = Path(sys.argv[1]) if len(sys.argv) > 1 else ROOT / "2024"
+
+    db = NoahsDatabase(str(data_dir / "noahs-{table}.csv.zip"))
+    paths = {table: db.path(table) for table in TABLE_NAMES}
+    lines = open_segments(build_derived(paths)["order_lines"])
+    lines = pa.concat_tables(
+        lines.set_column(
+            lines.schema.get_field_index("customerid"),
+            "customerid",
+            pc.add(lines["customerid"], pa.scalar(copy * 100_000, pa.int32())),
+        ).set_column(
+            lines.schema.get_field_index("orderid"),
+            "orderid",
+            pc.add(lines["orderid"], pa.scalar(copy * 10_000_000, pa.int32())),
+        )
+        for copy in range(SCALE)
+    )
+    frame = lines.to_pandas()
+    print(f"{'order lines':<22}{lines.num_rows:>8}")
+
+    mode_seconds, bargain_hunter = seconds(lambda: mode(frame))
+    print(f"{'filter and mode':<22}{mode_seconds:>8.3f} s")
+    build_seconds, margins = seconds(lambda: CustomerMargins(lines, at_cost=True))
+    print(f"{'margins, build':<22}{build_seconds:>8.3f} s{len(margins):>8} customers")
+    for by in ["loss_lines", "discount", "loss_share"]:
+        rank_seconds, ranking = seconds(lambda by=by: margins.ranking(by))
+        print(f"{'ranking, ' + by:<22}{rank_seconds:>8.3f} s")
+
+    assert margins.top()[0] == bargain_hunter
@@ -0,0 +1,92 @@
+"""
+The meet cute's co-purchase match on 1M in-store lines, strings versus ints.
+
+The 2024 in-store lines of items sold in several colors are repeated up to
+`N_LINES` rows, each copy a week later than the previous one. The former
+solvers format every timestamp as "MM/DD/YYYY HH:MM" and join on it and the
+item name; `co_purchases` packs the item's base product id and the minute into
+one integer and sort-merges the bargain hunter's lines with everyone else's.
+
+Usage: python benchmarks/meet_cute.py [DATA_DIR]
+"""
+
+import sys
+import timeit
+from functools import partial
+from pathlib import Path
+
+import pandas as pd
+import polars as pl
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+
+from noahs_market import NoahsDatabase, co_purchases
+
+N_LINES = 1_000_000
+BARGAIN_HUNTER = 8884  # Deborah Green, in the 2024 data.
+
+
+def pandas_strings(lines: pd.DataFrame) -> pd.DataFrame:
+    lines = lines.assign(date_hour=lines["ordered"].dt.strftime("%m/%d/%Y %H:%M"))
+    ours = lines.loc[lines["customerid"] == BARGAIN_HUNTER]
+    theirs = lines.merge(ours[["item", "date_hour"]], on=["item", "date_hour"]).loc[
+        lambda d: d["customerid"] != BARGAIN_HUNTER
+    ]
+    return pd.concat(
+        [
+            ours.loc[
+                ours["item"].isin(theirs["item"])
+                & ours["date_hour"].isin(theirs["date_hour"])
+            ],
+            theirs,
+        ]
+    )
+
+
+def polars_strings(lines: pl.DataFrame) -> pl.DataFrame:
+    lines = lines.with_columns(
+        date_hour=pl.col("ordered").dt.strftime("%m/%d/%Y %H:%M")
+    )
+    ours = lines.filter(pl.col("customerid") == BARGAIN_HUNTER)
+    theirs = lines.join(
+        ours.select("item", "date_hour"), on=["item", "date_hour"]
+    ).filter(pl.col("customerid") != BARGAIN_HUNTER)
+    return pl.concat(
+        [
+            ours.filter(
+                pl.col("item").is_in(theirs["item"]),
+                pl.col("date_hour").is_in(theirs["date_hour"]),
+            ),
+            theirs,
+        ]
+    )
+
+
+def integers(lines: pd.DataFrame | pl.DataFrame) -> pd.DataFrame | pl.DataFrame:
+    return co_purchases(lines, [BARGAIN_HUNTER])
+
+
+if __name__ == "__main__":
+    data_dir = Path(sys.argv[1]) if len(sys.argv) > 1 else ROOT / "2024"
+
+    db = NoahsDatabase(str(data_dir / "noahs-{table}.csv.zip"))
+    lines = db.order_lines.loc[lambda d: d["in_store"] & d["color_id"].notna()]
+    repeats = -(-N_LINES // len(lines))
+    pd_lines = pd.concat(
+        [
+            lines.assign(ordered=lines["ordered"] + pd.Timedelta(weeks=week))
+            for week in range(repeats)
+        ],
+        ignore_index=True,
+    )[:N_LINES]
+    pl_lines = pl.from_pandas(pd_lines)
+
+    for label, solver, frame in [
+        ("pandas strings", pandas_strings, pd_lines),
+        ("pandas integers", integers, pd_lines),
+        ("polars strings", polars_strings, pl_lines),
+        ("polars integers", integers, pl_lines),
+    ]:
+        seconds = min(timeit.repeat(partial(solver, frame), number=1, repeat=3))
+        print(f"{label:<22}{seconds:>8.3f} s{len(solver(frame)):>8} lines")
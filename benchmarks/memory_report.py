@@ -0,0 +1,67 @@
+"""
+Memory footprint of Noah's Market tables, inferred versus declared dtypes.
+
+Compares `pd.read_csv` (inferred dtypes, object strings) with `read_pandas`
+(declared schema), and `pl.read_csv` with `scan_polars`, table by table. The
+merge timings use the two pandas loads of `orders_items` and `products`.
+
+Usage: python benchmarks/memory_report.py [DATA_DIR]
+"""
+
+import sys
+import timeit
+from pathlib import Path
+from zipfile import ZipFile
+
+import pandas as pd
+import polars as pl
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+
+from noahs_market import read_pandas, scan_polars
+
+TABLES = {
+    "customers": ["birthdate"],
+    "orders": ["ordered", "shipped"],
+    "orders_items": [],
+    "products": [],
+}
+
+
+def mib(n_bytes: float) -> str:
+    return f"{n_bytes / 2**20:8.1f} MiB"
+
+
+if __name__ == "__main__":
+    data_dir = Path(sys.argv[1]) if len(sys.argv) > 1 else ROOT / "2024"
+
+    old, new = {}, {}
+    print(
+        f"{'table':<14}{'pandas old':>14}{'pandas new':>14}{'polars old':>14}{'polars new':>14}"
+    )
+    for table, dates in TABLES.items():
+        archive = data_dir / f"noahs-{table}.csv.zip"
+        old[table] = pd.read_csv(archive, parse_dates=dates)
+        new[table] = read_pandas(archive)
+        csv = ZipFile(archive).read(f"noahs-{table}.csv")
+        pl_old = pl.read_csv(csv, try_parse_dates=True).estimated_size()
+        pl_new = scan_polars(archive).collect().estimated_size()
+        print(
+            f"{table:<14}"
+            f"{mib(old[table].memory_usage(deep=True).sum()):>14}"
+            f"{mib(new[table].memory_usage(deep=True).sum()):>14}"
+            f"{mib(pl_old):>14}{mib(pl_new):>14}"
+        )
+
+    for label, frames in [("old", old), ("new", new)]:
+        seconds = min(
+            timeit.repeat(
+                lambda frames=frames: frames["orders_items"].merge(
+                    frames["products"], on="sku"
+                ),
+                number=5,
+                repeat=3,
+            )
+        )
+        print(f"merge orders_items x products on sku ({label}): {seconds / 5:.3f} s")
@@ -0,0 +1,93 @@
+"""
+Peak RSS of loading the four Noah's Market tables with Polars.
+
+Each strategy runs in a fresh interpreter with Polars, pandas and PyArrow
+already imported, and reports how far `ru_maxrss` grew above the RSS measured
+right after those imports:
+
+- bytes: the former `pl.scan_csv(ZipFile(...).open(...).read())`.
+- cold: streaming conversion into an empty cache, then `scan_polars`.
+- warm: `scan_polars` over an existing cache.
+
+Usage: python benchmarks/peak_rss.py [DATA_DIR]
+"""
+
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+TABLES = ["customers", "orders", "orders_items", "products"]
+
+PRELUDE = """
+import resource
+import pandas, polars, pyarrow
+baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+"""
+
+LOAD = {
+    "bytes": """
+from zipfile import ZipFile
+import polars as pl
+frames = [
+    pl.scan_csv(ZipFile(f).open(f[:-4]).read(), try_parse_dates=True)
+    for f in FILES
+]
+""",
+    "cold": """
+from noahs_market import scan_polars
+frames = [scan_polars(f) for f in FILES]
+""",
+}
+LOAD["warm"] = LOAD["cold"]
+
+# Typical puzzle access: a couple of columns, filtered.
+QUERY = """
+import time
+import polars as pl
+start = time.perf_counter()
+for frame in frames:
+    names = frame.collect_schema().names()
+    frame.select(names[:2]).filter(pl.col(names[0]).is_not_null()).collect()
+elapsed = time.perf_counter() - start
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print((peak - baseline) / 1024, elapsed)
+"""
+
+
+def peak_rss(strategy: str, data_dir: Path, cache_dir: str) -> tuple[float, float]:
+    r"""
+    Runs one loading strategy in a subprocess.
+
+    Parameters
+    ----------
+    strategy : str
+    data_dir : Path
+    cache_dir : str
+
+    Returns
+    -------
+    tuple[float, float]
+        Peak RSS growth in MiB and query time in seconds.
+    """
+    files = [f"noahs-{table}.csv.zip" for table in TABLES]
+    code = PRELUDE + f"FILES = {files!r}\n" + LOAD[strategy] + QUERY
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=data_dir,
+        env={"PYTHONPATH": str(ROOT), "NOAHS_CACHE_DIR": cache_dir},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    rss, elapsed = result.stdout.split()
+    return float(rss), float(elapsed)
+
+
+if __name__ == "__main__":
+    data_dir = Path(sys.argv[1]) if len(sys.argv) > 1 else ROOT / "2024"
+    with tempfile.TemporaryDirectory() as cache_dir:
+        for strategy in ["bytes", "cold", "warm"]:
+            rss, elapsed = peak_rss(strategy, data_dir, cache_dir)
+            print(f"{strategy:>5}: peak RSS +{rss:6.1f} MiB, {elapsed:.3f} s")
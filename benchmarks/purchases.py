@@ -0,0 +1,99 @@
+"""
+Top customers by product on 10x the 2024 order lines, group-by versus matrix.
+
+The 2024 order lines are repeated `SCALE` times, each copy with its own
+customers. Every question, e.g. who bought the most "senior cat" food, is
+answered by Polars filtering the lines and grouping them by customer, and by a
+`PurchaseMatrix` built once from the same lines, as a mask over the products
+and a sparse matrix-vector product.
+
+Usage: python benchmarks/purchases.py [DATA_DIR]
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import polars as pl
+import pyarrow as pa
+import pyarrow.compute as pc
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+
+from noahs_market import NoahsDatabase, PurchaseMatrix
+from noahs_market.derived import build_derived
+from noahs_market.loader import TABLE_NAMES
+from noahs_market.store import open_segments
+
+SCALE = 10
+QUESTIONS = {
+    "bakery": (
+        pl.col("department") == "BKY",
+        pc.field("department") == "BKY",
+    ),
+    "senior cat": (
+        pl.col("desc").str.contains("(?i)senior cat"),
+        pc.match_substring(pc.field("desc"), "senior cat", ignore_case=True),
+    ),
+    "Noah's": (
+        pl.col("desc").str.contains("Noah"),
+        pc.match_substring(pc.field("desc"), "Noah"),
+    ),
+}
+
+
+def group_by(lines: pl.DataFrame, predicate: pl.Expr) -> tuple[int, int]:
+    return (
+        lines.filter(predicate)
+        .group_by("customerid")
+        .len()
+        .sort(["len", "customerid"], descending=[True, False])
+        .row(0)
+    )
+
+
+def seconds(f) -> tuple[float, object]:
+    start = time.perf_counter()
+    result = f()
+    return time.perf_counter() - start, result
+
+
+if __name__ == "__main__":
+    data_dir = Path(sys.argv[1]) if len(sys.argv) > 1 else ROOT / "2024"
+
+    db = NoahsDatabase(str(data_dir / "noahs-{table}.csv.zip"))
+    paths = {table: db.path(table) for table in TABLE_NAMES}
+    derived = build_derived(paths)
+    lines = open_segments(derived["order_lines"])
+    products = open_segments(derived["catalog"])
+    lines = pa.concat_tables(
+        lines.set_column(
+            lines.schema.get_field_index("customerid"),
+            "customerid",
+            pc.add(lines["customerid"], pa.scalar(copy * 100_000, pa.int32())),
+        )
+        for copy in range(SCALE)
+    )
+    frame = pl.from_arrow(lines)
+    print(f"{'order lines':<22}{lines.num_rows:>8}")
+
+    build_seconds, purchases = seconds(lambda: PurchaseMatrix(lines, products))
+    print(f"{'matrix, build':<22}{build_seconds:>8.3f} s")
+    for label, (expr, field) in QUESTIONS.items():
+        grouped_seconds, grouped = seconds(lambda expr=expr: group_by(frame, expr))
+        matrix_seconds, (ids, totals) = seconds(
+            lambda field=field: purchases.top(field)
+        )
+        assert grouped == (ids[0], totals[0])
+        print(
+            f"{label:<22}{grouped_seconds:>8.3f} s group-by"
+            f"{matrix_seconds:>8.3f} s matrix"
+        )
+
+    mask = purchases.mask(QUESTIONS["senior cat"][1])
+    query_seconds, _ = seconds(
+        lambda: [purchases.top(np.roll(mask, shift)) for shift in range(100)]
+    )
+    print(f"{'100 masks':<22}{query_seconds:>8.3f} s")
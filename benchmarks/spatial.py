@@ -0,0 +1,93 @@
+"""
+Radius and nearest-neighbor queries on 1M customers, scan versus KD-tree.
+
+The 2024 customers are repeated up to `N_CUSTOMERS` rows, each copy moved by
+up to ~100 m so that no two customers share a point. `N_QUERIES` points are
+drawn from the customers. The scan computes the haversine distance from a
+point to every customer, timed on `N_SCANNED` points and scaled up; the
+`LocationIndex` answers every query from its tree.
+
+Usage: python benchmarks/spatial.py [DATA_DIR]
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+
+from noahs_market import LocationIndex, read_pandas
+from noahs_market.spatial import EARTH_RADIUS_KM
+
+N_CUSTOMERS = 1_000_000
+N_QUERIES = 10_000
+N_SCANNED = 20
+RADIUS_KM = 0.1
+
+
+def haversine(lat, long, lats, longs) -> np.ndarray:
+    lat, long, lats, longs = map(np.radians, (lat, long, lats, longs))
+    h = (
+        np.sin((lats - lat) / 2) ** 2
+        + np.cos(lat) * np.cos(lats) * np.sin((longs - long) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(h))
+
+
+def seconds(f) -> float:
+    start = time.perf_counter()
+    f()
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    data_dir = Path(sys.argv[1]) if len(sys.argv) > 1 else ROOT / "2024"
+
+    customers = read_pandas(data_dir / "noahs-customers.csv.zip")
+    repeats = -(-N_CUSTOMERS // len(customers))
+    rng = np.random.default_rng(0)
+    lat = np.tile(customers["lat"].to_numpy(), repeats)[:N_CUSTOMERS]
+    long = np.tile(customers["long"].to_numpy(), repeats)[:N_CUSTOMERS]
+    lat += rng.uniform(-1e-3, 1e-3, N_CUSTOMERS)
+    long += rng.uniform(-1e-3, 1e-3, N_CUSTOMERS)
+    table = pa.table({"customerid": np.arange(N_CUSTOMERS), "lat": lat, "long": long})
+    queries = rng.choice(N_CUSTOMERS, N_QUERIES, replace=False)
+
+    scan = seconds(
+        lambda: [
+            np.flatnonzero(haversine(lat[q], long[q], lat, long) <= RADIUS_KM)
+            for q in queries[:N_SCANNED]
+        ]
+    ) * (N_QUERIES / N_SCANNED)
+    print(f"{'scan, radius':<22}{scan:>8.3f} s (scaled from {N_SCANNED} queries)")
+
+    index = None
+
+    def build() -> None:
+        global index
+        index = LocationIndex(table)
+
+    print(f"{'tree, build':<22}{seconds(build):>8.3f} s")
+    q_lat, q_long = lat[queries], long[queries]
+    for label, query in [
+        ("tree, radius", lambda: index.within(q_lat, q_long, RADIUS_KM)),
+        ("tree, radius count", lambda: index.count_within(q_lat, q_long, RADIUS_KM)),
+        ("tree, 10 nearest", lambda: index.nearest(q_lat, q_long, k=10)),
+    ]:
+        print(f"{label:<22}{seconds(query):>8.3f} s")
+
+    matches = index.within(q_lat[:N_SCANNED], q_long[:N_SCANNED], RADIUS_KM)
+    assert all(
+        np.array_equal(
+            found,
+            np.flatnonzero(haversine(lat[q], long[q], lat, long) <= RADIUS_KM),
+        )
+        for q, found in zip(queries[:N_SCANNED], matches)
+    )
+    print(
+        f"{'matches per query':<22}{index.count_within(q_lat, q_long, RADIUS_KM).mean():>8.0f}"
+    )
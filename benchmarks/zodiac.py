@@ -0,0 +1,104 @@
+"""
+The neighbor puzzle's zodiac filter on 1M customers, dates versus codes.
+
+The 2024 customers are repeated up to `N_CUSTOMERS` rows. The former solvers
+list every date of the sun sign in every year of the animal, one
+`pd.period_range` (or `pl.date_range`) per year, and test the birthdates for
+membership; the new ones classify the whole column with `add_zodiac` and
+compare two int8 columns.
+
+Usage: python benchmarks/zodiac.py [DATA_DIR]
+"""
+
+import sys
+import timeit
+from datetime import date
+from functools import partial
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import polars as pl
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+
+from noahs_market import (
+    ANIMAL_CODES,
+    SIGN_CODES,
+    add_zodiac,
+    animal_years,
+    get_sun_sign,
+    read_pandas,
+)
+
+N_CUSTOMERS = 1_000_000
+SIGN, ANIMAL = "Libra", "Goat"
+
+
+def pandas_dates(customers: pd.DataFrame) -> pd.DataFrame:
+    sign = get_sun_sign(SIGN)
+    years = set(animal_years(ANIMAL)) & set(customers["birthdate"].dt.year)
+    dates = [
+        pd.Period.to_timestamp(day)
+        for day in np.concatenate(
+            [
+                pd.period_range(
+                    start=pd.Timestamp(year, *sign.start),
+                    end=pd.Timestamp(year, *sign.end),
+                )
+                for year in sorted(years)
+            ]
+        )
+    ]
+    return customers.loc[customers["birthdate"].isin(dates)]
+
+
+def pandas_codes(customers: pd.DataFrame) -> pd.DataFrame:
+    return add_zodiac(customers).loc[
+        lambda d: (
+            (d["western_sign"] == SIGN_CODES[SIGN])
+            & (d["chinese_animal"] == ANIMAL_CODES[ANIMAL])
+        )
+    ]
+
+
+def polars_dates(customers: pl.DataFrame) -> pl.DataFrame:
+    sign = get_sun_sign(SIGN)
+    years = set(animal_years(ANIMAL)) & set(
+        customers.select(pl.col("birthdate").dt.year()).to_series()
+    )
+    dates = pl.concat(
+        [
+            pl.date_range(date(year, *sign.start), date(year, *sign.end), eager=True)
+            for year in years
+        ]
+    ).unique()
+    return customers.filter(pl.col("birthdate").is_in(dates))
+
+
+def polars_codes(customers: pl.DataFrame) -> pl.DataFrame:
+    return add_zodiac(customers).filter(
+        pl.col("western_sign") == SIGN_CODES[SIGN],
+        pl.col("chinese_animal") == ANIMAL_CODES[ANIMAL],
+    )
+
+
+if __name__ == "__main__":
+    data_dir = Path(sys.argv[1]) if len(sys.argv) > 1 else ROOT / "2024"
+
+    customers = read_pandas(data_dir / "noahs-customers.csv.zip")
+    repeats = -(-N_CUSTOMERS // len(customers))
+    pd_customers = pd.concat([customers] * repeats, ignore_index=True)[:N_CUSTOMERS]
+    pl_customers = pl.from_pandas(pd_customers).with_columns(
+        pl.col("birthdate").cast(pl.Date)
+    )
+
+    for label, solver, frame in [
+        ("pandas dates", pandas_dates, pd_customers),
+        ("pandas codes", pandas_codes, pd_customers),
+        ("polars dates", polars_dates, pl_customers),
+        ("polars codes", polars_codes, pl_customers),
+    ]:
+        seconds = min(timeit.repeat(partial(solver, frame), number=1, repeat=3))
+        print(f"{label:<22}{seconds:>8.3f} s{len(solver(frame)):>8} matches")
@@ -0,0 +1,82 @@
+"""
+Shared data layer for the Hannukah of Data solvers.
+
+The yearly notebooks only differ in their puzzles; loading Noah's Market
+tables is the same everywhere, so it lives here.
+"""
+
+from noahs_market.cache import CACHE_DIR, cache_table
+from noahs_market.collectibles import COLLECTIBLES, CollectionIndex
+from noahs_market.database import NoahsDatabase
+from noahs_market.datasets import DATASETS, Dataset, get_dataset, load_datasets
+from noahs_market.instore import CoPresence, co_purchases
+from noahs_market.keypad import keypad_array, keypad_digits, keypad_expr, keypad_series
+from noahs_market.loader import NoahsTables, load_tables
+from noahs_market.margins import CustomerMargins
+from noahs_market.names import InitialsIndex, parse_names
+from noahs_market.phonewords import PhoneWordIndex
+from noahs_market.purchases import PurchaseMatrix
+from noahs_market.puzzles import Puzzle, PuzzleGraph, PuzzleRun
+from noahs_market.spatial import LocationIndex
+from noahs_market.sqlite import NoahsSQLite
+from noahs_market.store import TableStore, open_arrow, read_pandas, scan_polars
+from noahs_market.zodiac import (
+    ANIMAL_CODES,
+    ANIMALS,
+    SIGN_CODES,
+    SUN_SIGNS,
+    add_zodiac,
+    animal_codes,
+    animal_years,
+    chinese_animal,
+    get_sun_sign,
+    lunar_new_year,
+    sun_sign,
+    sun_sign_codes,
+)
+
+__all__ = [
+    "ANIMALS",
+    "ANIMAL_CODES",
+    "CACHE_DIR",
+    "COLLECTIBLES",
+    "DATASETS",
+    "SIGN_CODES",
+    "SUN_SIGNS",
+    "CoPresence",
+    "CollectionIndex",
+    "CustomerMargins",
+    "Dataset",
+    "InitialsIndex",
+    "LocationIndex",
+    "NoahsDatabase",
+    "NoahsSQLite",
+    "NoahsTables",
+    "PhoneWordIndex",
+    "PurchaseMatrix",
+    "Puzzle",
+    "PuzzleGraph",
+    "PuzzleRun",
+    "TableStore",
+    "add_zodiac",
+    "animal_codes",
+    "animal_years",
+    "cache_table",
+    "chinese_animal",
+    "co_purchases",
+    "get_dataset",
+    "get_sun_sign",
+    "keypad_array",
+    "keypad_digits",
+    "keypad_expr",
+    "keypad_series",
+    "load_datasets",
+    "load_tables",
+    "lunar_new_year",
+    "open_arrow",
+    "parse_names",
+    "read_pandas",
+    "scan_polars",
+    "sun_sign",
+    "sun_sign_codes",
+]
@@ -0,0 +1,89 @@
+"""
+In-process access to the (possibly password-protected) Noah's Market archives.
+
+The USB drive backups are ZipCrypto archives holding one zipped CSV per table,
+e.g. `noahs-csv.zip` -> `5784/noahs-customers.csv.zip` -> `noahs-customers.csv`.
+Instead of `unzip -P` into a scratch directory, members are decrypted and
+inflated here as streams that the CSV parser reads directly.
+"""
+
+import io
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO
+from zipfile import ZipFile, is_zipfile
+
+Password = int | str | bytes
+
+
+def _pwd(password: Password | None) -> bytes | None:
+    # The puzzles derive the password arithmetically, e.g. `5783 - 6`.
+    if password is None or isinstance(password, bytes):
+        return password
+    return str(password).encode()
+
+
+def first_member(archive: str | Path | IO[bytes]) -> str:
+    r"""
+    Returns the name of the first file in an archive.
+
+    Parameters
+    ----------
+    archive : str | Path | IO[bytes]
+
+    Returns
+    -------
+    str
+    """
+    with ZipFile(archive) as zf:
+        return next(info.filename for info in zf.infolist() if not info.is_dir())
+
+
+@contextmanager
+def open_member(
+    archive: str | Path, member: str | None = None, password: Password | None = None
+) -> Iterator[IO[bytes]]:
+    """
+    Opens a CSV inside an archive as a decompressing, decrypting stream.
+
+    Parameters
+    ----------
+    archive : str | Path
+        Path to the `.zip` archive. A plain CSV file is opened as it is.
+    member : str | None, optional
+        File inside the archive, by default its first file. When the member is
+        itself a `.zip`, the first file of that nested archive is opened.
+    password : int | str | bytes | None, optional
+        ZipCrypto password, used for every encrypted entry on the way down.
+
+    Yields
+    ------
+    IO[bytes]
+        Stream of the CSV bytes, inflated on demand as it is read.
+
+    Examples
+    --------
+    >>> with open_member("noahs-csv.zip", "5784/noahs-orders.csv.zip", 5777) as f:
+    ...     f.readline()
+    # Returns the CSV header: b'orderid,customerid,ordered,shipped,items,total...'
+    """
+    if not is_zipfile(archive):
+        with open(archive, "rb") as f:
+            yield f
+        return
+
+    pwd = _pwd(password)
+    with ZipFile(archive) as outer:
+        member = member or first_member(archive)
+
+        if not member.endswith(".zip"):
+            with outer.open(member, pwd=pwd) as f:
+                yield f
+            return
+
+        # The nested archive is small (it is still compressed), and ZipFile
+        # needs to seek in it, so it is held in memory rather than on disk.
+        nested = io.BytesIO(outer.read(member, pwd=pwd))
+        with ZipFile(nested) as inner, inner.open(first_member(nested), pwd=pwd) as f:
+            yield f
@@ -0,0 +1,158 @@
+"""
+Columnar cache for the zipped Noah's Market CSVs.
+
+Each archive is parsed once into an Arrow IPC file named after the archive's
+SHA-256 checksum. Later loads read the typed columns straight from that file,
+so neither the decompression nor the date parsing is paid again. A changed
+archive has a different checksum, and therefore a different cache file.
+"""
+
+import functools
+import hashlib
+import os
+import threading
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+from pyarrow import ipc
+
+from noahs_market.archive import Password, first_member, open_member
+from noahs_market.schema import column_types, fingerprint, table_name
+
+CACHE_DIR = Path(
+    os.environ.get(
+        "NOAHS_CACHE_DIR", Path(__file__).resolve().parent.parent / ".noahs_cache"
+    )
+)
+
+# Decompressed CSV bytes parsed per record batch.
+BLOCK_SIZE = 1 << 20
+
+
+def archive_checksum(archive: str | Path) -> str:
+    r"""
+    Returns the SHA-256 hex digest of an archive.
+
+    Parameters
+    ----------
+    archive : str | Path
+
+    Returns
+    -------
+    str
+    """
+    # Every table of an archive hashes it again; an unchanged file is only
+    # read once per session.
+    stat = os.stat(archive)
+    return _checksum(Path(archive).resolve(), stat.st_size, stat.st_mtime_ns)
+
+
+@functools.lru_cache(maxsize=64)
+def _checksum(archive: Path, size: int, mtime_ns: int) -> str:
+    with open(archive, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def _convert(
+    archive: Path, member: str, password: Password | None, table: str, path: Path
+) -> None:
+    # Decompress and parse one block at a time, writing each record batch out
+    # before the next block is inflated, so peak memory is bounded by
+    # BLOCK_SIZE rather than by the size of the CSV. Batches come from the
+    # system allocator, which hands freed blocks back instead of keeping them
+    # pooled for the rest of the session.
+    read_options = pa_csv.ReadOptions(block_size=BLOCK_SIZE)
+    convert_options = pa_csv.ConvertOptions(column_types=column_types(table))
+    with (
+        open_member(archive, member, password) as f,
+        pa_csv.open_csv(
+            f,
+            read_options=read_options,
+            convert_options=convert_options,
+            memory_pool=pa.system_memory_pool(),
+        ) as reader,
+        ipc.new_file(path, reader.schema) as writer,
+    ):
+        for batch in reader:
+            writer.write_batch(batch)
+
+
+def cache_path(archive: str | Path, member: str | None = None) -> Path:
+    r"""
+    Returns the Arrow IPC file a zipped CSV is cached in, whether or not it
+    has been written yet.
+
+    Parameters
+    ----------
+    archive : str | Path
+    member : str | None, optional
+
+    Returns
+    -------
+    Path
+        `<table>-<source>-<version>.arrow` in `CACHE_DIR`, see `cache_table`.
+    """
+    archive = Path(archive)
+    member = member or first_member(archive)
+    stem = Path(member).name.split(".")[0]
+    source = hashlib.sha256(f"{archive.resolve()}::{member}".encode()).hexdigest()
+    version = hashlib.sha256(
+        f"{archive_checksum(archive)}::{fingerprint()}".encode()
+    ).hexdigest()
+    return CACHE_DIR / f"{stem}-{source[:8]}-{version[:16]}.arrow"
+
+
+def cache_table(
+    archive: str | Path, member: str | None = None, password: Password | None = None
+) -> Path:
+    """
+    Converts a zipped CSV into an Arrow IPC file, unless already cached.
+
+    Parameters
+    ----------
+    archive : str | Path
+        Path to the `.zip` archive.
+    member : str | None, optional
+        File inside the archive, by default the archive's first file. A nested
+        `.zip` member is opened in turn, see `open_member`.
+    password : int | str | bytes | None, optional
+        Password of an encrypted archive.
+
+    Returns
+    -------
+    Path
+        Path of the cached Arrow IPC file.
+
+    Notes
+    -----
+    Cache files are named `<table>-<source>-<version>.arrow`, where `source`
+    identifies the archive's location and member, and `version` combines the
+    archive's checksum with the declared schema. Stale files cached for a
+    previous version of the same source are removed when the new one is
+    written, while other datasets sharing a table name are left alone.
+    """
+    member = member or first_member(archive)
+    path = cache_path(archive, member)
+    if path.exists():
+        return path
+
+    stem, source, _ = path.stem.rsplit("-", 2)
+    prefix = f"{stem}-{source}"
+
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+
+    # Write under a temporary name so concurrent readers never see half a file.
+    tmp_path = path.with_suffix(f".{os.getpid()}-{threading.get_ident()}.tmp")
+    try:
+        _convert(Path(archive), member, password, table_name(stem), tmp_path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    tmp_path.replace(path)
+
+    for stale in CACHE_DIR.glob(f"{prefix}-*.arrow"):
+        if stale != path:
+            stale.unlink(missing_ok=True)
+
+    return path
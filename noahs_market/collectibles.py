@@ -0,0 +1,215 @@
+"""
+Who owns a complete set of Noah's collectibles, as bitsets.
+
+The collector was found as the customer with the most order lines, perhaps of
+"Noah" products, while the clue is that they own "a complete set of Noah's
+collectibles". Products are instead grouped into collections, e.g. every color
+of "Noah's Bobblehead", and the products every customer owns are packed into a
+bitset, one bit per collectible. Whether a customer owns all of a collection,
+or misses one, is then an AND of two bitsets and a popcount, for every
+customer and collection at once.
+"""
+
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from noahs_market.derived import build_derived
+from noahs_market.loader import TABLE_NAMES
+from noahs_market.store import open_segments
+
+if TYPE_CHECKING:
+    from noahs_market.database import NoahsDatabase
+
+# Noah's collectibles, all of them, as opposed to one of their collections.
+COLLECTIBLES = "Noah's collectibles"
+
+
+def noahs_collections(products: pa.Table) -> dict[str, list[str]]:
+    r"""
+    Groups Noah's collectibles into collections.
+
+    Parameters
+    ----------
+    products : pa.Table
+        The product catalog, see `catalog`.
+
+    Returns
+    -------
+    dict[str, list[str]]
+        Skus of every collection: every color of an item of the COL
+        department, e.g. "Noah's Jersey", products sold in one color on their
+        own, and `COLLECTIBLES`, the whole department.
+    """
+    collectibles = products.filter(pc.equal(products["department"], "COL"))
+    names = pc.coalesce(collectibles["item"], collectibles["desc"])
+    collections = (
+        pa.table({"name": names, "sku": collectibles["sku"]})
+        .group_by("name")
+        .aggregate([("sku", "list")])
+        .sort_by("name")
+    )
+    collections = dict(
+        zip(collections["name"].to_pylist(), collections["sku_list"].to_pylist())
+    )
+    collections[COLLECTIBLES] = collectibles["sku"].to_pylist()
+    return collections
+
+
+def _bitsets(rows: np.ndarray, bits: np.ndarray, shape: tuple[int, int]) -> np.ndarray:
+    # Bit `b` of row `r` is bit `b % 64` of word `b // 64`.
+    bitsets = np.zeros(shape, dtype=np.uint64)
+    words = bits >> 6
+    masks = np.left_shift(np.uint64(1), (bits & 63).astype(np.uint64))
+    np.bitwise_or.at(bitsets, (rows, words), masks)
+    return bitsets
+
+
+class CollectionIndex:
+    """
+    The collectibles every customer owns, as bitsets.
+
+    Parameters
+    ----------
+    lines : pa.Table
+        Order lines with customerid and sku columns, see `order_lines`.
+    collections : dict[str, list[str]]
+        Skus of every collection, see `noahs_collections`. A product can be
+        part of several collections.
+
+    Attributes
+    ----------
+    customerids : np.ndarray
+        Ascending ids of the customers who own at least one collectible.
+    collections : list[str]
+        Names of the collections.
+    skus : np.ndarray
+        Every collectible, in the order of their bits.
+    sizes : np.ndarray
+        Number of collectibles in every collection.
+
+    Examples
+    --------
+    >>> index = CollectionIndex.from_database(db)
+    >>> index.missing(0, COLLECTIBLES)  # Who owns every collectible.
+    >>> index.missing(1)  # Who misses one item of a collection, and which.
+    """
+
+    def __init__(self, lines: pa.Table, collections: dict[str, list[str]]) -> None:
+        self.collections = list(collections)
+        self.skus = np.unique(
+            np.array([sku for skus in collections.values() for sku in skus], str)
+        )
+        n_words = max(-(-len(self.skus) // 64), 1)
+
+        members = [np.searchsorted(self.skus, skus) for skus in collections.values()]
+        self._masks = _bitsets(
+            np.repeat(np.arange(len(members)), [len(m) for m in members]),
+            np.concatenate([*members, np.empty(0, dtype=np.intp)]),
+            (len(members), n_words),
+        )
+        self.sizes = np.bitwise_count(self._masks).sum(axis=1)
+
+        bits = pc.index_in(lines["sku"], value_set=pa.array(self.skus, pa.string()))
+        owned = pc.is_valid(bits)
+        customers = lines["customerid"].filter(owned).to_numpy()
+        self.customerids, rows = np.unique(customers, return_inverse=True)
+        self._owned = _bitsets(
+            rows,
+            bits.filter(owned).to_numpy(),
+            (len(self.customerids), n_words),
+        )
+
+    @classmethod
+    def from_database(
+        cls,
+        db: "NoahsDatabase",
+        collections: dict[str, list[str]] | None = None,
+    ) -> "CollectionIndex":
+        """
+        Indexes the collectibles bought by the customers of a database.
+
+        Parameters
+        ----------
+        db : NoahsDatabase
+        collections : dict[str, list[str]] | None, optional
+            By default `noahs_collections`.
+
+        Returns
+        -------
+        CollectionIndex
+        """
+        paths = {table: db.path(table) for table in TABLE_NAMES}
+        derived = build_derived(paths)
+        lines = open_segments(derived["order_lines"])
+        if collections is None:
+            collections = noahs_collections(open_segments(derived["catalog"]))
+        return cls(lines.select(["customerid", "sku"]), collections)
+
+    def __len__(self) -> int:
+        return len(self.customerids)
+
+    def counts(self) -> np.ndarray:
+        r"""
+        Counts the collectibles every customer owns of every collection.
+
+        Returns
+        -------
+        np.ndarray
+            `(customers, collections)`, in the order of `customerids` and
+            `collections`.
+        """
+        return np.bitwise_count(self._owned[:, None, :] & self._masks[None, :, :]).sum(
+            axis=2, dtype=np.int64
+        )
+
+    def missing(self, n: int = 0, collection: str | None = None) -> pa.Table:
+        r"""
+        Finds the customers missing some collectibles of a collection.
+
+        Parameters
+        ----------
+        n : int, optional
+            Number of missing collectibles, by default 0: who owns the whole
+            collection.
+        collection : str | None, optional
+            One of `collections`, by default every collection.
+
+        Returns
+        -------
+        pa.Table
+            Columns customerid, collection and missing, the skus they miss,
+            by customer and then in the order of `collections`. Customers who
+            own no collectible are left out.
+
+        Raises
+        ------
+        KeyError
+            If `collection` is not indexed.
+        """
+        missing = self.sizes - self.counts() == n
+        if collection is not None:
+            if collection not in self.collections:
+                raise KeyError(f"No collection named {collection!r}")
+            missing &= np.asarray(self.collections) == collection
+        rows, collections = np.nonzero(missing)
+
+        # The bits of every missing sku, in the order of `skus`.
+        lacking = self._masks[collections] & ~self._owned[rows]
+        bits = np.unpackbits(
+            lacking.astype("<u8").view(np.uint8), axis=1, bitorder="little"
+        )
+        which, sku = np.nonzero(bits)
+        offsets = np.searchsorted(which, np.arange(len(rows) + 1))
+        return pa.table(
+            {
+                "customerid": self.customerids[rows],
+                "collection": pa.array(np.asarray(self.collections)[collections]),
+                "missing": pa.ListArray.from_arrays(
+                    pa.array(offsets, pa.int32()),
+                    pa.array(self.skus[sku], pa.string()),
+                ),
+            }
+        )
@@ -0,0 +1,231 @@
+"""
+Lazily loaded Noah's Market database.
+
+A solver that binds the tables as module globals, or as default arguments,
+pays for loading all four of them on import. `NoahsDatabase` only records
+where the tables are; each one is cached and opened the first time it is
+accessed, and kept for later accesses.
+"""
+
+from functools import cached_property
+from pathlib import Path
+from typing import TYPE_CHECKING, Literal
+
+from noahs_market.archive import Password
+from noahs_market.cache import cache_table
+from noahs_market.collectibles import CollectionIndex
+from noahs_market.derived import build_derived
+from noahs_market.ingest import append_orders
+from noahs_market.loader import TABLE_NAMES, cache_tables, table_sources
+from noahs_market.margins import CustomerMargins
+from noahs_market.names import InitialsIndex
+from noahs_market.purchases import PurchaseMatrix
+from noahs_market.spatial import LocationIndex
+from noahs_market.store import arrow_to_pandas, open_segments, segment_paths
+
+if TYPE_CHECKING:
+    import pandas as pd
+    import polars as pl
+
+    Frame = pd.DataFrame | pl.LazyFrame
+
+# Built from order lines, so stale once a batch of orders is appended.
+_DERIVED_INDEXES = ("purchases", "margins", "collectibles")
+
+
+class NoahsDatabase:
+    """
+    The four Noah's Market tables, each loaded on first access.
+
+    Parameters
+    ----------
+    pattern : str
+        Location of a table's zipped CSV, with a `{table}` placeholder, e.g.
+        "noahs-{table}.csv.zip".
+    archive : str | Path | None, optional
+        Archive holding the zipped CSVs, by default None. See `table_sources`.
+    password : int | str | bytes | None, optional
+        Password of an encrypted archive.
+    frontend : {"pandas", "polars"}, optional
+        Tables are pandas DataFrames (the default) or Polars LazyFrames.
+
+    Examples
+    --------
+    >>> db = NoahsDatabase("noahs-{table}.csv.zip", frontend="polars")
+    >>> db.customers  # Only customers is cached and opened.
+    """
+
+    def __init__(
+        self,
+        pattern: str,
+        archive: str | Path | None = None,
+        password: Password | None = None,
+        frontend: Literal["pandas", "polars"] = "pandas",
+    ) -> None:
+        self.sources = table_sources(pattern, archive)
+        self.password = password
+        self.frontend = frontend
+
+    def __repr__(self) -> str:
+        loaded = [table for table in TABLE_NAMES if table in self.__dict__]
+        return f"{type(self).__name__}(frontend={self.frontend!r}, loaded={loaded})"
+
+    def __getstate__(self) -> dict:
+        # Unpickled copies, e.g. in worker processes, reopen the cached tables
+        # memory-mapped instead of receiving copies of the loaded ones.
+        return {key: self.__dict__[key] for key in ("sources", "password", "frontend")}
+
+    def _open(self, path: Path) -> "Frame":
+        if self.frontend == "polars":
+            import polars as pl
+
+            return pl.scan_ipc(segment_paths(path), memory_map=True)
+        return arrow_to_pandas(open_segments(path))
+
+    def path(self, table: str) -> Path:
+        r"""
+        Returns the cached Arrow IPC file of a table, converting it if needed.
+
+        Parameters
+        ----------
+        table : str
+
+        Returns
+        -------
+        Path
+        """
+        archive, member = self.sources[table]
+        return cache_table(archive, member, self.password)
+
+    def _load(self, table: str) -> "Frame":
+        return self._open(self.path(table))
+
+    @cached_property
+    def customers(self) -> "Frame":
+        return self._load("customers")
+
+    @cached_property
+    def orders(self) -> "Frame":
+        return self._load("orders")
+
+    @cached_property
+    def orders_items(self) -> "Frame":
+        return self._load("orders_items")
+
+    @cached_property
+    def products(self) -> "Frame":
+        return self._load("products")
+
+    @cached_property
+    def catalog(self) -> "Frame":
+        """
+        Every product with its flags and integer ids, see `catalog`.
+
+        Built once per dataset and cached next to the tables.
+        """
+        paths = {table: self.path(table) for table in TABLE_NAMES}
+        return self._open(build_derived(paths)["catalog"])
+
+    @cached_property
+    def order_lines(self) -> "Frame":
+        """
+        Every order item joined with its order and product, see `order_lines`.
+
+        Built once per dataset and cached next to the tables.
+        """
+        paths = {table: self.path(table) for table in TABLE_NAMES}
+        return self._open(build_derived(paths)["order_lines"])
+
+    @cached_property
+    def initials(self) -> InitialsIndex:
+        """
+        Customer ids by the initials of their names, see `InitialsIndex`.
+        """
+        return InitialsIndex.from_database(self)
+
+    @cached_property
+    def locations(self) -> LocationIndex:
+        """
+        Customers in a KD-tree of their coordinates, see `LocationIndex`.
+        """
+        return LocationIndex.from_database(self)
+
+    @cached_property
+    def purchases(self) -> PurchaseMatrix:
+        """
+        Order lines per customer and product, see `PurchaseMatrix`.
+        """
+        return PurchaseMatrix.from_database(self)
+
+    @cached_property
+    def margins(self) -> CustomerMargins:
+        """
+        Order line margins per customer, see `CustomerMargins`.
+        """
+        return CustomerMargins.from_database(self)
+
+    @cached_property
+    def collectibles(self) -> CollectionIndex:
+        """
+        Noah's collectibles every customer owns, see `CollectionIndex`.
+        """
+        return CollectionIndex.from_database(self)
+
+    def append(
+        self,
+        orders: str | Path,
+        orders_items: str | Path,
+        password: Password | None = None,
+    ) -> dict[str, int]:
+        """
+        Appends a batch of orders and order items, see `append_orders`.
+
+        Parameters
+        ----------
+        orders : str | Path
+            CSV of the new orders, plain or zipped.
+        orders_items : str | Path
+            CSV of their items.
+        password : int | str | bytes | None, optional
+            Password of encrypted zipped CSVs, by default the database's.
+
+        Returns
+        -------
+        dict[str, int]
+            Number of rows appended to orders and orders_items. Both tables,
+            `order_lines` and the indexes built from it, e.g. `purchases`, are
+            rebuilt with the batch on their next access.
+        """
+        paths = {table: self.path(table) for table in TABLE_NAMES}
+        appended = append_orders(
+            paths, orders, orders_items, self.password if password is None else password
+        )
+        for table in [*appended, "order_lines", *_DERIVED_INDEXES]:
+            self.__dict__.pop(table, None)
+        return appended
+
+    def preload(
+        self, executor: Literal["thread", "process"] = "thread"
+    ) -> "NoahsDatabase":
+        """
+        Loads every table not accessed yet, converting them concurrently.
+
+        Parameters
+        ----------
+        executor : {"thread", "process"}, optional
+            Pool used to fill the cache, by default "thread". See
+            `cache_tables`.
+
+        Returns
+        -------
+        NoahsDatabase
+            The database itself, with every table loaded.
+        """
+        pending = {
+            table: source
+            for table, source in self.sources.items()
+            if table not in self.__dict__
+        }
+        for table, path in cache_tables(pending, self.password, executor).items():
+            self.__dict__[table] = self._open(path)
+        return self
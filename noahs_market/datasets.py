@@ -0,0 +1,217 @@
+"""
+Registry of the Hanukkah of Data datasets.
+
+Every year ships Noah's Market differently: 5783 as zipped CSVs inside a
+password-protected USB drive, 5784 and its speed run as `.csv.zip` files inside
+one, and 2024 as plain zipped CSVs. `DATASETS` records where each one lives and
+how to open it, so solvers ask for a dataset by id instead of spelling out
+paths and passwords.
+
+`load_datasets` loads several datasets at once: the tables of every dataset
+share one pool, and tables already in the cache are not converted again.
+"""
+
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Literal, NamedTuple
+
+from noahs_market.archive import Password
+from noahs_market.database import NoahsDatabase
+from noahs_market.loader import NoahsTables, cache_sources, load_tables, table_sources
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+class Dataset(NamedTuple):
+    """
+    Location of one year's Noah's Market tables.
+
+    Parameters
+    ----------
+    id : str
+        Dataset id, e.g. "5784-speedrun".
+    directory : Path
+        Directory of the solver, where the data is downloaded to.
+    pattern : str
+        Location of a table's zipped CSV, with a `{table}` placeholder,
+        relative to `directory` or, with an archive, inside it.
+    archive : str | None, optional
+        Archive holding the zipped CSVs, relative to `directory`.
+    password : int | str | bytes | None, optional
+        Password of the archive, or of the zipped CSVs inside it.
+    """
+
+    id: str
+    directory: Path
+    pattern: str
+    archive: str | None = None
+    password: Password | None = None
+
+    def _location(self) -> tuple[str, Path | None]:
+        # `pattern` and `archive` as taken by `table_sources`.
+        if self.archive is None:
+            return str(self.directory / self.pattern), None
+        return self.pattern, self.directory / self.archive
+
+    def sources(self) -> dict[str, tuple[Path, str | None]]:
+        r"""
+        Resolves where each table is stored, see `table_sources`.
+
+        Returns
+        -------
+        dict[str, tuple[Path, str | None]]
+        """
+        return table_sources(*self._location())
+
+    def available(self) -> bool:
+        r"""
+        Tells whether the dataset has been downloaded.
+
+        Returns
+        -------
+        bool
+        """
+        return all(archive.exists() for archive, _ in self.sources().values())
+
+    def database(
+        self, frontend: Literal["pandas", "polars"] = "pandas"
+    ) -> NoahsDatabase:
+        r"""
+        Returns the dataset's tables, each loaded on first access.
+
+        Parameters
+        ----------
+        frontend : {"pandas", "polars"}, optional
+
+        Returns
+        -------
+        NoahsDatabase
+        """
+        pattern, archive = self._location()
+        return NoahsDatabase(pattern, archive, self.password, frontend)
+
+    def load(
+        self,
+        frontend: Literal["pandas", "polars"] = "pandas",
+        executor: Literal["thread", "process"] = "thread",
+    ) -> NoahsTables:
+        r"""
+        Loads the dataset's four tables concurrently, see `load_tables`.
+
+        Parameters
+        ----------
+        frontend : {"pandas", "polars"}, optional
+        executor : {"thread", "process"}, optional
+
+        Returns
+        -------
+        NoahsTables
+        """
+        pattern, archive = self._location()
+        return load_tables(pattern, archive, self.password, frontend, executor)
+
+
+DATASETS: dict[str, Dataset] = {
+    dataset.id: dataset
+    for dataset in [
+        # The USB drive holds one zipped CSV per table, without `.csv`.
+        Dataset(
+            "5783",
+            ROOT / "5783",
+            "noahs-csv/noahs-{table}.zip",
+            archive="noahs-csv.zip",
+            password=5777,
+        ),
+        Dataset(
+            "5784",
+            ROOT / "5784",
+            "5784/noahs-{table}.csv.zip",
+            archive="noahs-csv.zip",
+            password=5777,
+        ),
+        Dataset(
+            "5784-speedrun",
+            ROOT / "5784",
+            "5784-speedrun/noahs-{table}.csv.zip",
+            archive="noahs-5784-speedrun-csv.zip",
+            password=5777,
+        ),
+        # Plain zipped CSVs, shipped with the repository.
+        Dataset("2024", ROOT / "2024", "noahs-{table}.csv.zip"),
+    ]
+}
+
+
+def get_dataset(id: str) -> Dataset:
+    r"""
+    Returns a registered dataset.
+
+    Parameters
+    ----------
+    id : str
+        One of "5783", "5784", "5784-speedrun" and "2024".
+
+    Returns
+    -------
+    Dataset
+
+    Raises
+    ------
+    KeyError
+        If no dataset has that id.
+    """
+    try:
+        return DATASETS[id]
+    except KeyError:
+        raise KeyError(
+            f"Unknown dataset {id!r}, expected one of {', '.join(DATASETS)}"
+        ) from None
+
+
+def load_datasets(
+    ids: Iterable[str] | None = None,
+    frontend: Literal["pandas", "polars"] = "pandas",
+    executor: Literal["thread", "process"] = "thread",
+) -> dict[str, NoahsTables]:
+    """
+    Loads the tables of several datasets, converting them all concurrently.
+
+    Parameters
+    ----------
+    ids : Iterable[str] | None, optional
+        Datasets to load, by default every downloaded one.
+    frontend : {"pandas", "polars"}, optional
+        Return pandas DataFrames (the default) or Polars LazyFrames.
+    executor : {"thread", "process"}, optional
+        Pool used to fill the cache, by default "thread". See `cache_tables`.
+
+    Returns
+    -------
+    dict[str, NoahsTables]
+        Tables of every dataset, by id.
+
+    Examples
+    --------
+    >>> for id, (customers, orders, orders_items, products) in load_datasets(
+    ...     ["5784", "5784-speedrun"]
+    ... ).items():
+    ...     print(id, len(orders))
+    """
+    datasets = (
+        [dataset for dataset in DATASETS.values() if dataset.available()]
+        if ids is None
+        else [get_dataset(id) for id in ids]
+    )
+
+    # One pool for the tables of every dataset, rather than one per dataset.
+    cache_sources(
+        {
+            (dataset.id, table): (archive, member, dataset.password)
+            for dataset in datasets
+            for table, (archive, member) in dataset.sources().items()
+        },
+        executor,
+    )
+
+    # Every table is cached by now, so loading is only opening files.
+    return {dataset.id: dataset.load(frontend, executor) for dataset in datasets}
@@ -0,0 +1,293 @@
+"""
+Tables derived from orders, orders_items and products.
+
+`order_lines` is the `orders ⋈ orders_items ⋈ products` join, one row per
+order item, with the product flags the puzzles filter on, and
+`customer_counts` sums it up per customer. Both are cached next to the tables
+they are derived from and, as order batches are appended, extended from the
+batch alone rather than rebuilt. The puzzles filter and aggregate the
+materialized join instead of joining the three tables again every time.
+
+`catalog` is the products table with the same flags, parsed from the product
+descriptions once, and numbered: every product has a `base_product_id`, shared
+by the colors of an item, a `color_id` and a `department_id`, so that lines are
+matched on small integers rather than on strings.
+"""
+
+import hashlib
+import os
+import threading
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.compute as pc
+from pyarrow import ipc
+
+from noahs_market.store import open_segments
+
+DERIVED_TABLES = ("order_lines", "customer_counts", "catalog")
+
+ORDER_LINE_COLUMNS = [
+    "orderid",
+    "customerid",
+    "ordered",
+    "shipped",
+    "in_store",
+    "sku",
+    "department",
+    "desc",
+    "item",
+    "color",
+    "base_product_id",
+    "color_id",
+    "department_id",
+    "qty",
+    "unit_price",
+    "wholesale_cost",
+]
+
+# "Vintage Widget (azure)": an item that comes in several colors.
+COLOR_PATTERN = r"\s\(([a-z]+)\)$"
+
+
+def dense_ids(values: pa.Array | pa.ChunkedArray) -> pa.Array:
+    r"""
+    Numbers the distinct values of an array, in ascending order.
+
+    Parameters
+    ----------
+    values : pa.Array | pa.ChunkedArray
+
+    Returns
+    -------
+    pa.Array
+        int32 ids from 0, the same for equal values, null for null values.
+    """
+    distinct = pc.drop_null(pc.unique(values))
+    distinct = distinct.take(pc.sort_indices(distinct))
+    return pc.index_in(values, value_set=distinct)
+
+
+def product_columns(products: pa.Table) -> dict[str, pa.Array]:
+    r"""
+    Derives the product flags of `order_lines` from the products table.
+
+    e.g., HOM8601 Vintage Widget (azure) -> HOM, Vintage Widget, azure
+
+    Parameters
+    ----------
+    products : pa.Table
+
+    Returns
+    -------
+    dict[str, pa.Array]
+        `department`, the sku's three-letter prefix (BKY for the bakery, COL
+        for Noah's collectibles...), and for items sold in several colors,
+        `item`, the color-agnostic description, and `color`. Both are null for
+        other products. Then the same as small integers, see `dense_ids`:
+        `base_product_id`, the same for every color of an item, `color_id`,
+        null for products without a color, and `department_id`.
+    """
+    colored = pc.match_substring_regex(products["desc"], COLOR_PATTERN)
+    department = pc.utf8_slice_codeunits(products["sku"], 0, 3)
+    item = pc.if_else(
+        colored,
+        pc.replace_substring_regex(products["desc"], COLOR_PATTERN, ""),
+        None,
+    )
+    color = pc.if_else(
+        colored,
+        pc.replace_substring_regex(products["desc"], r"^.*\(|\)$", ""),
+        None,
+    )
+    return {
+        "department": department,
+        "item": item,
+        "color": color,
+        "base_product_id": dense_ids(pc.coalesce(item, products["desc"])),
+        "color_id": dense_ids(color),
+        "department_id": dense_ids(department),
+    }
+
+
+def catalog(products: pa.Table) -> pa.Table:
+    r"""
+    Adds the product flags of `order_lines` to the products table.
+
+    Parameters
+    ----------
+    products : pa.Table
+
+    Returns
+    -------
+    pa.Table
+        sku, desc, wholesale_cost and the columns of `product_columns`.
+    """
+    products = products.select(["sku", "desc", "wholesale_cost"])
+    for name, column in product_columns(products).items():
+        products = products.append_column(name, column)
+    return products
+
+
+def derived_path(paths: dict[str, Path], name: str) -> Path:
+    r"""
+    Returns the Arrow IPC file a derived table is cached in.
+
+    Parameters
+    ----------
+    paths : dict[str, Path]
+        Cached Arrow IPC file of orders, orders_items and products.
+    name : str
+        One of `DERIVED_TABLES`.
+
+    Returns
+    -------
+    Path
+        Named after the orders file, so that it is removed along with it when
+        orders are cached again, and after the other two files it depends on
+        and the columns of `order_lines`.
+    """
+    sources = "::".join(
+        [paths[t].name for t in ("orders", "orders_items", "products")]
+        + ORDER_LINE_COLUMNS
+    )
+    digest = hashlib.sha256(sources.encode()).hexdigest()
+    return paths["orders"].with_name(
+        f"{paths['orders'].stem}.{name}-{digest[:8]}.arrow"
+    )
+
+
+def write_arrow(table: pa.Table, path: Path) -> None:
+    r"""
+    Writes an Arrow IPC file atomically, replacing any previous version.
+
+    Parameters
+    ----------
+    table : pa.Table
+    path : Path
+    """
+    tmp_path = path.with_suffix(f".{os.getpid()}-{threading.get_ident()}.tmp")
+    try:
+        with ipc.new_file(tmp_path, table.schema) as writer:
+            writer.write_table(table)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    tmp_path.replace(path)
+
+
+def order_lines(
+    orders: pa.Table, orders_items: pa.Table, products: pa.Table
+) -> pa.Table:
+    r"""
+    Joins every order item with its order and product.
+
+    Parameters
+    ----------
+    orders : pa.Table
+    orders_items : pa.Table
+    products : pa.Table
+
+    Returns
+    -------
+    pa.Table
+        One row per order item, with `ORDER_LINE_COLUMNS`. `in_store` tells
+        whether the order was shipped as soon as it was placed, and the
+        product flags are described in `product_columns`.
+    """
+    orders = orders.select(["orderid", "customerid", "ordered", "shipped"])
+    orders = orders.append_column(
+        "in_store", pc.equal(orders["ordered"], orders["shipped"])
+    )
+    return (
+        orders_items.join(orders, "orderid", join_type="inner")
+        .join(catalog(products), "sku", join_type="inner")
+        .select(ORDER_LINE_COLUMNS)
+    )
+
+
+def customer_counts(orders: pa.Table, lines: pa.Table) -> pa.Table:
+    r"""
+    Counts the orders, order lines and items bought by every customer.
+
+    Parameters
+    ----------
+    orders : pa.Table
+    lines : pa.Table
+        Order lines of `orders`, see `order_lines`.
+
+    Returns
+    -------
+    pa.Table
+        Columns customerid, orders, lines and qty, for customers with at least
+        one order.
+    """
+    per_order = orders.group_by("customerid").aggregate([("orderid", "count")])
+    per_line = lines.group_by("customerid").aggregate(
+        [("qty", "count"), ("qty", "sum")]
+    )
+    counts = per_order.join(per_line, "customerid", join_type="full outer")
+    return pa.table(
+        {
+            "customerid": counts["customerid"],
+            "orders": counts["orderid_count"].fill_null(0),
+            "lines": counts["qty_count"].fill_null(0),
+            "qty": counts["qty_sum"].fill_null(0),
+        }
+    ).sort_by("customerid")
+
+
+def add_counts(counts: pa.Table, delta: pa.Table) -> pa.Table:
+    r"""
+    Adds the counts of a batch of orders to the running counts.
+
+    Parameters
+    ----------
+    counts : pa.Table
+    delta : pa.Table
+        Both as returned by `customer_counts`.
+
+    Returns
+    -------
+    pa.Table
+    """
+    columns = ["orders", "lines", "qty"]
+    total = (
+        pa.concat_tables([counts, delta.cast(counts.schema)])
+        .group_by("customerid")
+        .aggregate([(column, "sum") for column in columns])
+    )
+    return (
+        total.rename_columns({f"{column}_sum": column for column in columns})
+        .select(counts.column_names)
+        .sort_by("customerid")
+    )
+
+
+def build_derived(paths: dict[str, Path]) -> dict[str, Path]:
+    """
+    Builds the derived tables from the cached tables, unless already built.
+
+    Parameters
+    ----------
+    paths : dict[str, Path]
+        Cached Arrow IPC file of orders, orders_items and products. Segments
+        appended to them so far are included.
+
+    Returns
+    -------
+    dict[str, Path]
+        Arrow IPC file of every derived table. Batches appended from now on
+        are added to them by `append_orders`.
+    """
+    derived = {name: derived_path(paths, name) for name in DERIVED_TABLES}
+    if all(path.exists() for path in derived.values()):
+        return derived
+
+    orders = open_segments(paths["orders"])
+    products = open_segments(paths["products"])
+    lines = order_lines(orders, open_segments(paths["orders_items"]), products)
+    write_arrow(lines, derived["order_lines"])
+    write_arrow(customer_counts(orders, lines), derived["customer_counts"])
+    write_arrow(catalog(products), derived["catalog"])
+    return derived
@@ -0,0 +1,264 @@
+"""
+Incremental ingestion of new order batches.
+
+New orders arrive as CSVs in the schema of `noahs-orders.csv` and
+`noahs-orders_items.csv`. Rather than re-caching the whole archive, a batch is
+converted on its own and stored as a segment next to the cached table, e.g.
+`noahs-orders-<source>-<version>+0001-<checksum>.arrow`, which every reader
+maps along with the table. The derived tables, if built, are extended from the
+batch alone, so appending 1% more orders costs about 1% of a full load.
+
+Appended segments only live in the cache: when the archive itself changes, the
+table is cached again without them.
+"""
+
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from noahs_market.archive import Password
+from noahs_market.cache import _convert, archive_checksum
+from noahs_market.derived import (
+    DERIVED_TABLES,
+    add_counts,
+    customer_counts,
+    derived_path,
+    order_lines,
+    write_arrow,
+)
+from noahs_market.store import open_arrow, open_segments, segment_paths
+
+
+def _missing(values: pa.ChunkedArray, keys: pa.ChunkedArray) -> list:
+    # Distinct values that are not among the keys.
+    unknown = pc.invert(pc.is_in(values, value_set=keys.combine_chunks()))
+    return pc.unique(values.filter(unknown)).to_pylist()
+
+
+def _check(problems: list, description: str) -> None:
+    if problems:
+        shown = ", ".join(map(str, problems[:10]))
+        more = f" (and {len(problems) - 10} more)" if len(problems) > 10 else ""
+        raise ValueError(f"{description}: {shown}{more}")
+
+
+def validate_batch(
+    paths: dict[str, Path], orders: pa.Table, orders_items: pa.Table
+) -> None:
+    """
+    Checks the keys of a batch against the cached tables.
+
+    Parameters
+    ----------
+    paths : dict[str, Path]
+        Cached Arrow IPC file of every table.
+    orders : pa.Table
+        New orders.
+    orders_items : pa.Table
+        New order items, of new orders or of already known ones.
+
+    Raises
+    ------
+    ValueError
+        If the batch has other columns than the cached tables, if an order id
+        is repeated or already known, or if a customer, order or product is
+        referenced but unknown.
+    """
+    for table, batch in (("orders", orders), ("orders_items", orders_items)):
+        schema = open_arrow(paths[table]).schema
+        if not batch.schema.equals(schema):
+            raise ValueError(
+                f"Batch of {table} has columns {batch.schema.names}, "
+                f"expected {schema.names}"
+            )
+
+    # The known orders outnumber the batch a hundredfold, so they are probed
+    # against the batch's keys rather than hashed themselves.
+    known_orders = open_segments(paths["orders"])["orderid"]
+    batch_orders = orders["orderid"].combine_chunks()
+
+    counts = pc.value_counts(batch_orders)
+    _check(
+        counts.field("values")
+        .filter(pc.greater(counts.field("counts"), 1))
+        .to_pylist(),
+        "Order ids repeated in the batch",
+    )
+    _check(
+        pc.unique(
+            known_orders.filter(pc.is_in(known_orders, value_set=batch_orders))
+        ).to_pylist(),
+        "Order ids already known",
+    )
+    _check(
+        _missing(orders["customerid"], open_arrow(paths["customers"])["customerid"]),
+        "Unknown customer ids",
+    )
+    earlier = orders_items["orderid"].filter(
+        pc.invert(pc.is_in(orders_items["orderid"], value_set=batch_orders))
+    )
+    if len(earlier):
+        _check(_missing(earlier, known_orders), "Order items of unknown order ids")
+    _check(
+        _missing(orders_items["sku"], open_arrow(paths["products"])["sku"]),
+        "Unknown skus",
+    )
+
+
+def append_orders(
+    paths: dict[str, Path],
+    orders: str | Path,
+    orders_items: str | Path,
+    password: Password | None = None,
+) -> dict[str, int]:
+    """
+    Appends a batch of orders and order items to the cached tables.
+
+    Parameters
+    ----------
+    paths : dict[str, Path]
+        Cached Arrow IPC file of every table.
+    orders : str | Path
+        CSV of the new orders, plain or zipped, with the columns of
+        `noahs-orders.csv`.
+    orders_items : str | Path
+        CSV of their items, with the columns of `noahs-orders_items.csv`.
+    password : int | str | bytes | None, optional
+        Password of encrypted zipped CSVs.
+
+    Returns
+    -------
+    dict[str, int]
+        Number of rows appended to orders and orders_items. A batch that has
+        already been appended is skipped, and counts 0 rows.
+
+    Raises
+    ------
+    ValueError
+        If the batch does not fit the cached tables, see `validate_batch`. In
+        that case, as when appending fails in any other way or is interrupted,
+        nothing is appended and the batch can be appended again.
+
+    Examples
+    --------
+    >>> append_orders(paths, "orders-2024-12.csv", "orders_items-2024-12.csv")
+    {'orders': 2500, 'orders_items': 5000}
+    """
+    sources = {"orders": Path(orders), "orders_items": Path(orders_items)}
+    checksums = {
+        table: archive_checksum(source)[:16] for table, source in sources.items()
+    }
+    derived = {name: derived_path(paths, name) for name in DERIVED_TABLES}
+    if not all(path.exists() for path in derived.values()):
+        derived = {}
+    # The orders segment is placed last, so a batch is appended if and only if
+    # it is there.
+    if any(
+        segment.stem.endswith(f"-{checksums['orders']}")
+        for segment in segment_paths(paths["orders"])[1:]
+    ):
+        return {table: 0 for table in sources}
+    _discard_partial(paths, derived, checksums)
+
+    segments = {
+        table: paths[table].with_name(
+            f"{paths[table].stem}+{len(segment_paths(paths[table])):04d}"
+            f"-{checksums[table]}.arrow"
+        )
+        for table in sources
+    }
+    if derived:
+        segments["order_lines"] = _line_segment(derived, checksums["orders"])
+        segments["customer_counts"] = derived["customer_counts"]
+    tmp_paths = {table: path.with_suffix(".tmp") for table, path in segments.items()}
+    try:
+        for table, source in sources.items():
+            _convert(source, None, password, table, tmp_paths[table])
+        batch = {table: open_arrow(tmp_paths[table]) for table in sources}
+        validate_batch(paths, batch["orders"], batch["orders_items"])
+        if derived:
+            for name, table in _derived_batch(
+                paths, derived, batch["orders"], batch["orders_items"]
+            ).items():
+                write_arrow(table, tmp_paths[name])
+    except BaseException:
+        for tmp_path in tmp_paths.values():
+            tmp_path.unlink(missing_ok=True)
+        raise
+
+    try:
+        for table in ("orders_items", "order_lines", "customer_counts", "orders"):
+            if table in tmp_paths:
+                tmp_paths[table].replace(segments[table])
+    except BaseException:
+        for tmp_path in tmp_paths.values():
+            tmp_path.unlink(missing_ok=True)
+        _discard_partial(paths, derived, checksums)
+        raise
+    return {table: batch[table].num_rows for table in sources}
+
+
+def _line_segment(derived: dict[str, Path], checksum: str) -> Path:
+    # Named after the batch's orders, like the orders segment, so that an
+    # interrupted append can be told apart from earlier ones.
+    path = derived["order_lines"]
+    return path.with_name(
+        f"{path.stem}+{len(segment_paths(path)):04d}-{checksum}.arrow"
+    )
+
+
+def _discard_partial(
+    paths: dict[str, Path], derived: dict[str, Path], checksums: dict[str, str]
+) -> None:
+    # Segments of a batch whose orders segment was never placed are left over
+    # from an interrupted append. customer_counts is replaced after the
+    # order_lines segment, so it may already count the batch and is rebuilt.
+    leftovers = [
+        segment
+        for segment in segment_paths(paths["orders_items"])[1:]
+        if segment.stem.endswith(f"-{checksums['orders_items']}")
+    ]
+    lines = [
+        segment
+        for segment in (segment_paths(derived["order_lines"])[1:] if derived else [])
+        if segment.stem.endswith(f"-{checksums['orders']}")
+    ]
+    for segment in [*leftovers, *lines]:
+        segment.unlink()
+    if lines:
+        write_arrow(
+            customer_counts(
+                open_segments(paths["orders"]), open_segments(derived["order_lines"])
+            ),
+            derived["customer_counts"],
+        )
+
+
+def _derived_batch(
+    paths: dict[str, Path],
+    derived: dict[str, Path],
+    orders: pa.Table,
+    orders_items: pa.Table,
+) -> dict[str, pa.Table]:
+    # Items may also belong to orders appended earlier; only those few known
+    # orders are looked up, the rest of the join only involves the batch.
+    earlier = pc.invert(
+        pc.is_in(orders_items["orderid"], value_set=orders["orderid"].combine_chunks())
+    )
+    if pc.any(earlier).as_py():
+        known = open_segments(paths["orders"])
+        referenced = pc.unique(orders_items["orderid"].filter(earlier))
+        orders_joined = pa.concat_tables(
+            [orders, known.filter(pc.is_in(known["orderid"], value_set=referenced))]
+        )
+    else:
+        orders_joined = orders
+
+    lines = order_lines(orders_joined, orders_items, open_arrow(paths["products"]))
+    return {
+        "order_lines": lines.cast(open_arrow(derived["order_lines"]).schema),
+        "customer_counts": add_counts(
+            open_arrow(derived["customer_counts"]), customer_counts(orders, lines)
+        ),
+    }
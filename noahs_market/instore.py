@@ -0,0 +1,256 @@
+"""
+In-store visits: who bought what at Noah's, and when.
+
+The meet cute matched the bargain hunter's in-store purchases with everyone
+else's by formatting every timestamp as an "MM/DD/YYYY HH:MM" string and
+joining on it and the item name, hashing string pairs for every line. Lines are
+instead keyed by integers, the item's `base_product_id` from the catalog and
+the minute they were placed in, packed into one int64, and matched with a
+sort-merge: the few lines of the customers of interest are sorted once and
+every other line is looked up with a binary search, which also allows a
+tolerance of a few minutes.
+
+`CoPresence` answers the general question, who was in the store at the same
+time as whom, for every customer at once. In-store orders are sorted by time
+once and swept with a window: every order is paired with the orders placed
+within the window after it, found by binary search, so building the weighted
+edge list takes O(n log n + edges) instead of comparing every two orders.
+"""
+
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from noahs_market.store import open_segments
+
+if TYPE_CHECKING:
+    import polars as pl
+
+    from noahs_market.database import NoahsDatabase
+
+
+def line_keys(lines: "pd.DataFrame | pl.DataFrame") -> tuple[np.ndarray, np.ndarray]:
+    r"""
+    Returns the customer and the item-minute key of every order line.
+
+    Parameters
+    ----------
+    lines : pd.DataFrame | pl.DataFrame
+        With customerid, ordered and base_product_id columns, see
+        `order_lines`.
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray]
+        Customer ids, and int64 keys made of the base product id in the high
+        32 bits and the minute the order was placed in, counted from the first
+        one, in the low 32 bits.
+    """
+    if isinstance(lines, pd.DataFrame):
+        customerids = lines["customerid"].to_numpy()
+        minutes = lines["ordered"].to_numpy().astype("datetime64[m]").astype(np.int64)
+        products = lines["base_product_id"].to_numpy()
+    else:
+        customerids = lines.get_column("customerid").to_numpy()
+        seconds = lines.get_column("ordered").dt.epoch("s").to_numpy()
+        minutes = seconds.astype(np.int64) // 60
+        products = lines.get_column("base_product_id").to_numpy()
+    if len(minutes):
+        minutes = minutes - minutes.min()
+    return customerids, (products.astype(np.int64) << 32) | minutes
+
+
+def _near(keys: np.ndarray, sorted_keys: np.ndarray, tolerance: int) -> np.ndarray:
+    # Products live in the high bits and minutes stay far below 2**32, so a
+    # window of a few minutes never reaches another product's keys.
+    lo = np.searchsorted(sorted_keys, keys - tolerance, side="left")
+    hi = np.searchsorted(sorted_keys, keys + tolerance, side="right")
+    return hi > lo
+
+
+def co_purchases(
+    lines: "pd.DataFrame | pl.DataFrame | pl.LazyFrame",
+    customerids: "np.ndarray | pd.Series | pl.Series",
+    tolerance: int = 0,
+) -> "pd.DataFrame | pl.DataFrame":
+    r"""
+    Finds who bought the same items as some customers, at the same time.
+
+    Parameters
+    ----------
+    lines : pd.DataFrame | pl.DataFrame | pl.LazyFrame
+        Order lines with customerid, ordered and base_product_id columns,
+        e.g. the in-store lines of items sold in several colors.
+    customerids : np.ndarray | pd.Series | pl.Series
+        Customers whose purchases are matched.
+    tolerance : int, optional
+        Minutes between two matching purchases, by default 0, i.e. both in the
+        same minute.
+
+    Returns
+    -------
+    pd.DataFrame | pl.DataFrame
+        Lines of `customerids` matched by another customer's, then the
+        matching lines of the other customers, in their original order.
+
+    Examples
+    --------
+    >>> co_purchases(in_store_color_lines(db), bargain_hunter["customerid"])
+    """
+    if not isinstance(lines, pd.DataFrame):
+        import polars as pl
+
+        if isinstance(lines, pl.LazyFrame):
+            lines = lines.collect()
+
+    ids, keys = line_keys(lines)
+    ours = np.isin(ids, np.asarray(customerids))
+    our_rows, their_rows = np.flatnonzero(ours), np.flatnonzero(~ours)
+    our_keys, their_keys = keys[our_rows], keys[their_rows]
+    # Only the few lines of `customerids` are sorted: a line of theirs within
+    # the window of one of ours is one of the matched lines of theirs.
+    their_matches = _near(their_keys, np.sort(our_keys), tolerance)
+    our_matches = _near(our_keys, np.sort(their_keys[their_matches]), tolerance)
+    rows = np.concatenate([our_rows[our_matches], their_rows[their_matches]])
+    if isinstance(lines, pd.DataFrame):
+        return lines.iloc[rows]
+    return lines[rows]
+
+
+def in_store_orders(orders: pa.Table) -> pa.Table:
+    r"""
+    Selects the orders placed in the store.
+
+    Parameters
+    ----------
+    orders : pa.Table
+        With ordered and shipped columns.
+
+    Returns
+    -------
+    pa.Table
+        Orders shipped as soon as they were placed, see `order_lines`.
+    """
+    return orders.filter(pc.equal(orders["ordered"], orders["shipped"]))
+
+
+def sweep_pairs(times: np.ndarray, window: int) -> tuple[np.ndarray, np.ndarray]:
+    r"""
+    Pairs every time with the later ones within a window, by a sweep-line.
+
+    Parameters
+    ----------
+    times : np.ndarray
+        Ascending integers, e.g. seconds.
+    window : int
+        Largest difference between two paired times, in the same unit.
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray]
+        Positions `i < j` of every pair with `times[j] - times[i] <= window`.
+    """
+    ends = np.searchsorted(times, times + window, side="right")
+    counts = ends - np.arange(len(times)) - 1
+    firsts = np.repeat(np.arange(len(times)), counts)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    return firsts, firsts + 1 + offsets
+
+
+class CoPresence:
+    """
+    Customers who were in the store at the same time, and how often.
+
+    Parameters
+    ----------
+    orders : pa.Table
+        With customerid, ordered and shipped columns. Only in-store orders,
+        see `in_store_orders`, are swept.
+    window : int, optional
+        Minutes between two in-store orders for their customers to count as
+        being in the store together, by default 5.
+
+    Attributes
+    ----------
+    edges : pa.Table
+        Columns customerid, other and visits: every two customers who were in
+        the store together, once with `customerid < other`, and the number of
+        pairs of their orders within the window.
+
+    Examples
+    --------
+    >>> copresence = CoPresence.from_database(db, window=5)
+    >>> copresence.neighbors(8884)  # Who shopped with the bargain hunter.
+    """
+
+    def __init__(self, orders: pa.Table, window: int = 5) -> None:
+        orders = in_store_orders(orders)
+        seconds = pc.cast(orders["ordered"], pa.timestamp("s")).cast(pa.int64())
+        seconds = seconds.to_numpy()
+        by_time = np.argsort(seconds, kind="stable")
+        customers = orders["customerid"].to_numpy()[by_time]
+        first, second = sweep_pairs(seconds[by_time], window * 60)
+
+        a, b = customers[first], customers[second]
+        met = a != b
+        low = np.minimum(a, b)[met].astype(np.int64)
+        high = np.maximum(a, b)[met].astype(np.int64)
+        pairs, visits = np.unique((low << 32) | high, return_counts=True)
+        low, high = pairs >> 32, pairs & 0xFFFFFFFF
+        self.window = window
+        self.edges = pa.table({"customerid": low, "other": high, "visits": visits})
+
+        # Both directions of every edge, grouped by customer.
+        sources = np.concatenate([low, high])
+        by_source = np.argsort(sources, kind="stable")
+        self._others = np.concatenate([high, low])[by_source]
+        self._visits = np.concatenate([visits, visits])[by_source]
+        self._customers, starts = np.unique(sources[by_source], return_index=True)
+        self._bounds = np.append(starts, len(sources))
+
+    @classmethod
+    def from_database(cls, db: "NoahsDatabase", window: int = 5) -> "CoPresence":
+        """
+        Sweeps the in-store orders of a database.
+
+        Parameters
+        ----------
+        db : NoahsDatabase
+        window : int, optional
+            Minutes, by default 5.
+
+        Returns
+        -------
+        CoPresence
+        """
+        return cls(open_segments(db.path("orders")), window)
+
+    def __len__(self) -> int:
+        return self.edges.num_rows
+
+    def neighbors(self, customerid: int) -> tuple[np.ndarray, np.ndarray]:
+        r"""
+        Returns who was in the store at the same time as a customer.
+
+        Parameters
+        ----------
+        customerid : int
+
+        Returns
+        -------
+        tuple[np.ndarray, np.ndarray]
+            Customer ids and visits together, most visits first. Both empty
+            for a customer who never met anyone in the store.
+        """
+        position = np.searchsorted(self._customers, customerid)
+        if position == len(self._customers) or (
+            self._customers[position] != customerid
+        ):
+            return self._others[:0], self._visits[:0]
+        rows = slice(self._bounds[position], self._bounds[position + 1])
+        others, visits = self._others[rows], self._visits[rows]
+        order = np.lexsort((others, -visits))
+        return others[order], visits[order]
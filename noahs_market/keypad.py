@@ -0,0 +1,218 @@
+"""
+Phone keypad spelling of names.
+
+Spelling a name on a keypad is a fixed byte-to-byte mapping once case and
+punctuation are dealt with, so whole columns are encoded at once: the bytes
+of an Arrow string array go through a 256-entry NumPy lookup array, with no
+Python code running per name. pandas and Polars columns are handed over as
+Arrow arrays.
+
+Letters of either case map to their key, digits are kept, and every other
+character (spaces, hyphens, apostrophes, accented letters) is dropped, e.g.
+"O'Brien-Smith" -> "62743676484".
+"""
+
+import re
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+if TYPE_CHECKING:
+    import polars as pl
+
+KEYPAD = {
+    "2": "abc",
+    "3": "def",
+    "4": "ghi",
+    "5": "jkl",
+    "6": "mno",
+    "7": "pqrs",
+    "8": "tuv",
+    "9": "wxyz",
+}
+
+LETTERS = "".join(KEYPAD.values())
+KEYS = "".join(digit * len(letters) for digit, letters in KEYPAD.items())
+
+# Characters that are neither ASCII letters nor digits, dropped before encoding.
+DROPPED = r"[^A-Za-z0-9]"
+
+T9 = str.maketrans(LETTERS + LETTERS.upper(), KEYS + KEYS)
+
+# Byte -> keypad digit, or 0 for a dropped byte. Bytes of multi-byte UTF-8
+# characters are all >= 0x80, hence dropped together.
+_LOOKUP = np.zeros(256, dtype=np.uint8)
+_LOOKUP[np.frombuffer(b"0123456789", dtype=np.uint8)] = np.frombuffer(
+    b"0123456789", dtype=np.uint8
+)
+for _letter, _key in zip(LETTERS, KEYS):
+    _LOOKUP[ord(_letter)] = _LOOKUP[ord(_letter.upper())] = ord(_key)
+
+SPACE = ord(" ")
+
+
+def keypad_digits(text: str) -> str:
+    r"""
+    Spells a string on a phone keypad.
+
+    Parameters
+    ----------
+    text : str
+
+    Returns
+    -------
+    str
+
+    Examples
+    --------
+    >>> keypad_digits("Carpenter")
+    '227736837'
+    """
+    return re.sub(DROPPED, "", text).translate(T9)
+
+
+def _word_bounds(
+    data: np.ndarray, starts: np.ndarray, ends: np.ndarray, word: int
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # Byte range of the word-th space-separated word of every string, as in
+    # `str.split(" ")[word]`, and whether the string has such a word.
+    spaces = np.flatnonzero(data == SPACE)
+    first = np.searchsorted(spaces, starts)
+    n_words = np.searchsorted(spaces, ends) - first + 1
+    index = np.full_like(n_words, word) + (n_words if word < 0 else 0)
+    found = (index >= 0) & (index < n_words)
+    index = np.where(found, index, 0)
+    padded = np.append(spaces, 0)
+    word_starts = np.where(index > 0, padded[first + index - 1] + 1, starts)
+    word_ends = np.where(index < n_words - 1, padded[first + index], ends)
+    return word_starts, word_ends, found
+
+
+def keypad_array(
+    values: pa.Array | pa.ChunkedArray, word: int | None = None
+) -> pa.Array:
+    r"""
+    Spells every string of an Arrow array on a phone keypad.
+
+    Parameters
+    ----------
+    values : pa.Array | pa.ChunkedArray
+        Strings.
+    word : int | None, optional
+        Only spell the word at this position, e.g. -1 for the last word, as
+        in `str.split(" ")[word]`. By default the whole string.
+
+    Returns
+    -------
+    pa.Array
+        Strings of digits, large if `values` are. Null where `values` is null
+        or has no such word.
+
+    Examples
+    --------
+    >>> keypad_array(pa.array(["Alexander Carpenter", "Cher"]), word=-1)
+    ["227736837", "2437"]
+    """
+    if isinstance(values, pa.ChunkedArray):
+        values = values.combine_chunks()
+    if pa.types.is_large_string(values.type):
+        offset_type = np.int64
+    else:
+        values = values.cast(pa.string())
+        offset_type = np.int32
+    _, offset_buffer, data_buffer = values.buffers()
+    offsets = np.frombuffer(offset_buffer, dtype=offset_type)[
+        values.offset : values.offset + len(values) + 1
+    ].astype(np.int64)
+    data = np.frombuffer(data_buffer or b"", dtype=np.uint8)
+    starts, ends = offsets[:-1], offsets[1:]
+    valid = values.is_valid().to_numpy(zero_copy_only=False)
+
+    if word is None:
+        chars = data[offsets[0] : offsets[-1]]
+        boundaries = offsets - offsets[0]
+    else:
+        starts, ends, found = _word_bounds(data, starts, ends, word)
+        valid &= found
+        lengths = np.where(valid, ends - starts, 0)
+        boundaries = np.concatenate([[0], np.cumsum(lengths)])
+        # Position of every byte of every word in `data`.
+        chars = data[
+            np.repeat(starts - boundaries[:-1], lengths)
+            + np.arange(boundaries[-1], dtype=np.int64)
+        ]
+
+    keys = _LOOKUP[chars]
+    kept = keys != 0
+    if not kept.all():
+        # Every string shrinks by the number of bytes dropped before its end.
+        boundaries = boundaries - np.searchsorted(np.flatnonzero(~kept), boundaries)
+        keys = keys[kept]
+    return pa.Array.from_buffers(
+        values.type,
+        len(values),
+        [
+            pa.array(valid).buffers()[1],
+            pa.py_buffer(boundaries.astype(offset_type)),
+            pa.py_buffer(keys),
+        ],
+    )
+
+
+def keypad_series(values: pd.Series, word: int | None = None) -> pd.Series:
+    r"""
+    Spells every string of a pandas Series on a phone keypad.
+
+    Parameters
+    ----------
+    values : pd.Series
+        Object, categorical or Arrow-backed strings.
+    word : int | None, optional
+        Only spell the word at this position, see `keypad_array`.
+
+    Returns
+    -------
+    pd.Series
+        Arrow-backed strings of digits, with the same index and name.
+
+    Examples
+    --------
+    >>> keypad_series(customers["name"], word=-1)  # Last names.
+    """
+    return pd.Series(
+        keypad_array(pa.array(values, from_pandas=True), word),
+        index=values.index,
+        name=values.name,
+        dtype=pd.ArrowDtype(pa.string()),
+    )
+
+
+def keypad_expr(expr: "pl.Expr", word: int | None = None) -> "pl.Expr":
+    r"""
+    Spells a Polars string expression on a phone keypad.
+
+    Parameters
+    ----------
+    expr : pl.Expr
+    word : int | None, optional
+        Only spell the word at this position, see `keypad_array`.
+
+    Returns
+    -------
+    pl.Expr
+
+    Examples
+    --------
+    >>> customers.filter(keypad_expr(pl.col("name"), word=-1) == "227736837")
+    """
+    import polars as pl
+
+    # Encoded a whole batch at a time, which beats `str.replace_many`.
+    return expr.map_batches(
+        lambda values: pl.Series(
+            values.name, keypad_array(values.to_arrow(), word), dtype=pl.String
+        ),
+        return_dtype=pl.String,
+    )
@@ -0,0 +1,189 @@
+"""
+Concurrent loading of the four Noah's Market tables.
+
+Decompression, decryption and CSV parsing of each table are independent, so
+they run side by side and the load takes as long as the largest table rather
+than the sum of all four.
+"""
+
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Literal, NamedTuple, TypeVar
+
+from noahs_market.archive import Password
+from noahs_market.cache import cache_path, cache_table
+from noahs_market.store import arrow_to_pandas, open_segments, segment_paths
+
+TABLE_NAMES = ("customers", "orders", "orders_items", "products")
+
+K = TypeVar("K")
+
+
+class NoahsTables(NamedTuple):
+    """
+    The four tables of a Noah's Market database, in unpacking order.
+
+    Examples
+    --------
+    >>> customers, orders, orders_items, products = load_tables(...)
+    """
+
+    customers: Any
+    orders: Any
+    orders_items: Any
+    products: Any
+
+
+def table_sources(
+    pattern: str, archive: str | Path | None = None
+) -> dict[str, tuple[Path, str | None]]:
+    """
+    Resolves where each table is stored.
+
+    Parameters
+    ----------
+    pattern : str
+        Location of a table's zipped CSV, with a `{table}` placeholder, e.g.
+        "noahs-{table}.csv.zip".
+    archive : str | Path | None, optional
+        Archive holding the zipped CSVs, e.g. the password-protected USB
+        drive. When given, `pattern` names members inside it. By default the
+        zipped CSVs are plain files.
+
+    Returns
+    -------
+    dict[str, tuple[Path, str | None]]
+        `(archive, member)` of every table, as taken by `cache_table`.
+    """
+    if archive is None:
+        return {
+            table: (Path(pattern.format(table=table)), None) for table in TABLE_NAMES
+        }
+    return {
+        table: (Path(archive), pattern.format(table=table)) for table in TABLE_NAMES
+    }
+
+
+def cache_tables(
+    sources: dict[str, tuple[Path, str | None]],
+    password: Password | None = None,
+    executor: Literal["thread", "process"] = "thread",
+) -> dict[str, Path]:
+    """
+    Converts every table into the cache concurrently.
+
+    Parameters
+    ----------
+    sources : dict[str, tuple[Path, str | None]]
+        `(archive, member)` of every table, see `table_sources`.
+    password : int | str | bytes | None, optional
+        Password of an encrypted archive.
+    executor : {"thread", "process"}, optional
+        "thread", the default, suits the CSV parser, which releases the GIL.
+        "process" also parallelizes ZipCrypto decryption, which does not.
+
+    Returns
+    -------
+    dict[str, Path]
+        Cached Arrow IPC file of every table. No pool is started when every
+        table is already cached.
+    """
+    return cache_sources(
+        {table: (*source, password) for table, source in sources.items()}, executor
+    )
+
+
+def cache_sources(
+    sources: dict[K, tuple[Path, str | None, Password | None]],
+    executor: Literal["thread", "process"] = "thread",
+) -> dict[K, Path]:
+    """
+    Converts tables, each with its own password, into the cache concurrently.
+
+    Parameters
+    ----------
+    sources : dict[K, tuple[Path, str | None, int | str | bytes | None]]
+        `(archive, member, password)` of every table, under any key, e.g. the
+        tables of several datasets.
+    executor : {"thread", "process"}, optional
+        Pool used to fill the cache, by default "thread". See `cache_tables`.
+
+    Returns
+    -------
+    dict[K, Path]
+        Cached Arrow IPC file of every table, under the same keys.
+    """
+    paths = {
+        key: cache_path(archive, member)
+        for key, (archive, member, _) in sources.items()
+    }
+    pending = {key: sources[key] for key, path in paths.items() if not path.exists()}
+    if not pending:
+        return paths
+
+    pool: Executor
+    if executor == "process":
+        pool = ProcessPoolExecutor(max_workers=len(pending))
+    else:
+        pool = ThreadPoolExecutor(max_workers=len(pending))
+
+    with pool:
+        futures = {
+            key: pool.submit(cache_table, *source) for key, source in pending.items()
+        }
+        return paths | {key: future.result() for key, future in futures.items()}
+
+
+def load_tables(
+    pattern: str,
+    archive: str | Path | None = None,
+    password: Password | None = None,
+    frontend: Literal["pandas", "polars"] = "pandas",
+    executor: Literal["thread", "process"] = "thread",
+) -> NoahsTables:
+    """
+    Loads customers, orders, orders_items and products concurrently.
+
+    Parameters
+    ----------
+    pattern : str
+        Location of a table's zipped CSV, with a `{table}` placeholder.
+    archive : str | Path | None, optional
+        Archive holding the zipped CSVs, by default None. See `table_sources`.
+    password : int | str | bytes | None, optional
+        Password of an encrypted archive.
+    frontend : {"pandas", "polars"}, optional
+        Return pandas DataFrames (the default) or Polars LazyFrames.
+    executor : {"thread", "process"}, optional
+        Pool used to fill the cache, by default "thread". See `cache_tables`.
+
+    Returns
+    -------
+    NoahsTables
+        Returned once every table is ready.
+
+    Examples
+    --------
+    >>> customers, orders, orders_items, products = load_tables(
+    ...     "5784/noahs-{table}.csv.zip", archive="noahs-csv.zip", password=5777
+    ... )
+    """
+    paths = cache_tables(table_sources(pattern, archive), password, executor)
+
+    if frontend == "polars":
+        import polars as pl
+
+        return NoahsTables(
+            **{
+                table: pl.scan_ipc(segment_paths(path), memory_map=True)
+                for table, path in paths.items()
+            }
+        )
+
+    # Building the Python string objects holds the GIL, but numeric columns
+    # convert in parallel.
+    with ThreadPoolExecutor(max_workers=len(paths)) as pool:
+        frames = pool.map(
+            lambda path: arrow_to_pandas(open_segments(path)), paths.values()
+        )
+        return NoahsTables(**dict(zip(paths, frames)))
@@ -0,0 +1,204 @@
+"""
+What Noah's Market earns, or loses, on every customer.
+
+The bargain hunter is the customer Noah loses money on, and was found by
+filtering the lines sold below wholesale cost, joining them with the customers
+and taking the most frequent one. The margin of every order line is instead
+computed once, and summed per customer in a single group-by: the lines sold at
+a loss, the discount captured on them and the share of such lines. Ranking
+the few thousand customers is then a sort.
+"""
+
+from typing import TYPE_CHECKING, Literal
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from noahs_market.derived import build_derived
+from noahs_market.loader import TABLE_NAMES
+from noahs_market.store import open_segments
+
+if TYPE_CHECKING:
+    from noahs_market.database import NoahsDatabase
+
+_RANKING_KEYS = ["loss_lines", "discount", "loss_share"]
+
+
+def line_margins(lines: pa.Table) -> pa.Table:
+    r"""
+    Adds the margin of every order line.
+
+    Parameters
+    ----------
+    lines : pa.Table
+        Order lines with qty, unit_price and wholesale_cost columns, see
+        `order_lines`.
+
+    Returns
+    -------
+    pa.Table
+        With an additional float64 `margin` column, `(unit_price -
+        wholesale_cost) * qty`, negative for lines sold below cost.
+    """
+    unit_margin = pc.subtract(
+        lines["unit_price"].cast(pa.float64()),
+        lines["wholesale_cost"].cast(pa.float64()),
+    )
+    return lines.append_column(
+        "margin", pc.multiply(unit_margin, lines["qty"].cast(pa.float64()))
+    )
+
+
+class CustomerMargins:
+    """
+    Order line margins summed per customer.
+
+    Parameters
+    ----------
+    lines : pa.Table
+        Order lines with customerid, orderid, sku, qty, unit_price and
+        wholesale_cost columns, see `order_lines`. The lines of one product
+        in one order are counted as one, at their lowest margin, should an
+        order list a product several times.
+    at_cost : bool, optional
+        Also counts the lines sold at exactly their wholesale cost as losses,
+        by default False.
+
+    Attributes
+    ----------
+    table : pa.Table
+        One row per customer, by ascending id: customerid, lines,
+        loss_lines, the lines sold at a loss, discount, what those were sold
+        below cost, margin, on every line, and loss_share, the share of lines
+        sold at a loss.
+
+    Examples
+    --------
+    >>> margins = CustomerMargins.from_database(db)
+    >>> margins.top()  # The bargain hunter's id.
+    >>> margins.ranking(by="discount")
+    """
+
+    def __init__(self, lines: pa.Table, at_cost: bool = False) -> None:
+        lines = line_margins(
+            lines.select(
+                ["customerid", "orderid", "sku", "qty", "unit_price", "wholesale_cost"]
+            )
+        )
+        margin = lines["margin"]
+        loss = pc.less_equal(margin, 0) if at_cost else pc.less(margin, 0)
+        lines = lines.append_column(
+            "discount", pc.if_else(loss, pc.negate(margin), 0.0)
+        )
+        # Rows of one product in one order count as one line, sold at a loss
+        # if any of them was, i.e. at their lowest margin. They are grouped
+        # only if some order lists a product twice, which is rare.
+        skus = pc.dictionary_encode(lines["sku"]).combine_chunks()
+        pair = pc.add(
+            pc.multiply(lines["orderid"].cast(pa.int64()), len(skus.dictionary)),
+            skus.indices.cast(pa.int64()),
+        )
+        lines = lines.append_column("pair", pair)
+        pairs = np.sort(pair.to_numpy())
+        if (pairs[1:] == pairs[:-1]).any():
+            lines = lines.group_by(["customerid", "pair"]).aggregate(
+                [("margin", "min"), ("margin", "sum"), ("discount", "sum")]
+            )
+        else:
+            lines = lines.rename_columns(
+                {"margin": "margin_sum", "discount": "discount_sum"}
+            ).append_column("margin_min", lines["margin"])
+        margin = lines["margin_min"]
+        loss = pc.less_equal(margin, 0) if at_cost else pc.less(margin, 0)
+        lines = lines.append_column("loss", pc.cast(loss, pa.int64()))
+        sums = lines.group_by("customerid").aggregate(
+            [
+                ("customerid", "count"),
+                ("loss", "sum"),
+                ("discount_sum", "sum"),
+                ("margin_sum", "sum"),
+            ]
+        )
+        self.at_cost = at_cost
+        self.table = pa.table(
+            {
+                "customerid": sums["customerid"],
+                "lines": sums["customerid_count"],
+                "loss_lines": sums["loss_sum"],
+                "discount": sums["discount_sum_sum"],
+                "margin": sums["margin_sum_sum"],
+                "loss_share": pc.divide(
+                    sums["loss_sum"].cast(pa.float64()), sums["customerid_count"]
+                ),
+            }
+        ).sort_by("customerid")
+
+    @classmethod
+    def from_database(
+        cls, db: "NoahsDatabase", at_cost: bool = False
+    ) -> "CustomerMargins":
+        """
+        Sums the order line margins of a database.
+
+        Parameters
+        ----------
+        db : NoahsDatabase
+        at_cost : bool, optional
+            See `CustomerMargins`, by default False. Lines of one product in
+            one order are counted once, as the former solvers did.
+
+        Returns
+        -------
+        CustomerMargins
+        """
+        paths = {table: db.path(table) for table in TABLE_NAMES}
+        lines = open_segments(build_derived(paths)["order_lines"])
+        return cls(lines, at_cost)
+
+    def __len__(self) -> int:
+        return self.table.num_rows
+
+    def ranking(
+        self, by: Literal["loss_lines", "discount", "loss_share"] = "loss_lines"
+    ) -> pa.Table:
+        r"""
+        Sorts the customers, the best bargain hunters first.
+
+        Parameters
+        ----------
+        by : {"loss_lines", "discount", "loss_share"}, optional
+            Ranks by lines sold at a loss (the default), discount captured, or
+            share of lines sold at a loss.
+
+        Returns
+        -------
+        pa.Table
+            `table`, sorted by `by` and then by the other two, descending,
+            ties by ascending customer id.
+        """
+        keys = [by, *(key for key in _RANKING_KEYS if key != by)]
+        return self.table.sort_by(
+            [(key, "descending") for key in keys] + [("customerid", "ascending")]
+        )
+
+    def top(
+        self,
+        k: int = 1,
+        by: Literal["loss_lines", "discount", "loss_share"] = "loss_lines",
+    ) -> np.ndarray:
+        r"""
+        Returns the ids of the best bargain hunters.
+
+        Parameters
+        ----------
+        k : int, optional
+            Number of customers, by default 1.
+        by : {"loss_lines", "discount", "loss_share"}, optional
+            See `ranking`.
+
+        Returns
+        -------
+        np.ndarray
+        """
+        return self.ranking(by)["customerid"][:k].to_numpy()
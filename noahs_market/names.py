@@ -0,0 +1,166 @@
+"""
+Customer names split into first name, last name and suffix.
+
+Puzzles that look customers up by initials used to strip the suffixes off
+every column and split `name` twice on every call. Names are instead parsed
+once, in a vectorized pass over the Arrow column, and the customers are
+grouped by initials, so an initials query, or a sweep over every pair, is a
+dict lookup that reduces the customers before any join with orders.
+"""
+
+from collections.abc import Iterator
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from noahs_market.store import open_segments
+
+if TYPE_CHECKING:
+    from noahs_market.database import NoahsDatabase
+
+# Name suffixes that are not a last name, e.g. "Michael Brown Jr.".
+NAME_SUFFIXES = ("II", "III", "IV", "Jr.")
+
+
+def group_rows(values: pa.Array | pa.ChunkedArray) -> dict[str, np.ndarray]:
+    r"""
+    Groups the row numbers of an array by value.
+
+    Parameters
+    ----------
+    values : pa.Array | pa.ChunkedArray
+
+    Returns
+    -------
+    dict[str, np.ndarray]
+        Ascending row numbers of every distinct value, nulls excluded.
+    """
+    encoded = pc.dictionary_encode(values)
+    if isinstance(encoded, pa.ChunkedArray):
+        encoded = encoded.combine_chunks()
+    indices = encoded.indices.fill_null(-1).to_numpy()
+    order = np.argsort(indices, kind="stable")
+    bounds = np.searchsorted(indices[order], np.arange(len(encoded.dictionary) + 1))
+    return dict(zip(encoded.dictionary.to_pylist(), np.split(order, bounds)[1:]))
+
+
+def parse_names(names: pa.Array | pa.ChunkedArray) -> pa.Table:
+    r"""
+    Splits names into first name, last name and suffix.
+
+    e.g., Donald James Smith Jr. -> Donald, Smith, Jr.
+
+    Parameters
+    ----------
+    names : pa.Array | pa.ChunkedArray
+        Space-separated names.
+
+    Returns
+    -------
+    pa.Table
+        Columns first, last, suffix and initials. The suffix is made of the
+        trailing `NAME_SUFFIXES`, or null. A one-word name is both first and
+        last name. Every column is null where the name is.
+    """
+    if isinstance(names, pa.ChunkedArray):
+        names = names.combine_chunks()
+    # A missing name is split as an empty one, one word, and masked after.
+    missing = pc.is_null(names)
+    words = pc.split_pattern(names.fill_null(""), " ")
+    flat = pc.list_flatten(words)
+    offsets = np.asarray(words.offsets)
+    starts, ends = offsets[:-1] - offsets[0], offsets[1:] - offsets[0]
+    suffix = pc.is_in(flat, pa.array(NAME_SUFFIXES)).to_numpy(zero_copy_only=False)
+
+    # Strip suffixes from the end, one word at a time, keeping a last name.
+    last = ends - 1
+    while True:
+        stripped = (last > starts) & suffix[last]
+        if not stripped.any():
+            break
+        last = last - stripped
+
+    n_suffixes = ends - 1 - last
+    suffix_words = np.repeat(last + 1, n_suffixes) + (
+        np.arange(n_suffixes.sum())
+        - np.repeat(np.cumsum(n_suffixes) - n_suffixes, n_suffixes)
+    )
+    suffixes = pc.binary_join(
+        pa.ListArray.from_arrays(
+            pa.array(np.append(0, np.cumsum(n_suffixes)), pa.int32()),
+            flat.take(suffix_words),
+        ),
+        " ",
+    )
+    first = pc.if_else(missing, None, flat.take(starts))
+    last = pc.if_else(missing, None, flat.take(last))
+    return pa.table(
+        {
+            "first": first,
+            "last": last,
+            "suffix": pc.if_else(pa.array(n_suffixes > 0), suffixes, None),
+            "initials": pc.binary_join_element_wise(
+                pc.utf8_slice_codeunits(first, 0, 1),
+                pc.utf8_slice_codeunits(last, 0, 1),
+                "",
+            ),
+        }
+    )
+
+
+class InitialsIndex:
+    """
+    Customers by the initials of their first and last names.
+
+    Parameters
+    ----------
+    customers : pa.Table
+        With customerid and name columns.
+
+    Examples
+    --------
+    >>> index = InitialsIndex.from_database(db)
+    >>> index["DS"]  # Customer ids of the possible contractors.
+    >>> {initials: len(ids) for initials, ids in index.items()}
+    """
+
+    def __init__(self, customers: pa.Table) -> None:
+        self.names = parse_names(customers["name"]).add_column(
+            0, "customerid", customers["customerid"].combine_chunks()
+        )
+        ids = self.names["customerid"].to_numpy()
+        self._ids = {
+            key: ids[rows] for key, rows in group_rows(self.names["initials"]).items()
+        }
+
+    @classmethod
+    def from_database(cls, db: "NoahsDatabase") -> "InitialsIndex":
+        """
+        Indexes the customers of a database.
+
+        Parameters
+        ----------
+        db : NoahsDatabase
+
+        Returns
+        -------
+        InitialsIndex
+        """
+        return cls(open_segments(db.path("customers")))
+
+    def __getitem__(self, initials: str) -> np.ndarray:
+        """
+        Returns the ids of the customers with these initials, e.g. "DS".
+        """
+        return self._ids.get(initials, np.array([], dtype=np.int64))
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def items(self) -> Iterator[tuple[str, np.ndarray]]:
+        """
+        Yields every initials with the ids of their customers.
+        """
+        yield from self._ids.items()
@@ -0,0 +1,200 @@
+"""
+Reverse index from keypad digits to the customers whose names spell them.
+
+The investigator puzzle asks whose phone number spells their last name, and
+its variations ask the same of first names, full names, or only the last
+seven digits. Every name token of every customer is spelled on the keypad
+once, in a single vectorized scan of `customers`, and kept in two forms:
+
+- a table of `(customerid, token, digits)` rows, joined with the customers'
+  own phone digits to answer a whole variation in one pass;
+- a dict from digits to customer ids, for O(1) lookups of a given number.
+"""
+
+from collections.abc import Iterable
+from typing import TYPE_CHECKING, Literal
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from noahs_market.keypad import keypad_array
+from noahs_market.names import group_rows, parse_names
+from noahs_market.store import open_segments
+
+if TYPE_CHECKING:
+    from noahs_market.database import NoahsDatabase
+
+Token = Literal["first", "middle", "last", "full"]
+
+TOKENS: tuple[Token, ...] = ("first", "middle", "last", "full")
+
+
+def name_tokens(customers: pa.Table) -> pa.Table:
+    r"""
+    Spells every name token of every customer on the keypad.
+
+    e.g., Mary Ann Smith Jr. -> first 6279, middle 266, last 76484, full
+    62792667648457
+
+    Parameters
+    ----------
+    customers : pa.Table
+        With customerid and name columns.
+
+    Returns
+    -------
+    pa.Table
+        Columns customerid, token (one of `TOKENS`) and digits. First and last
+        names are those of `parse_names`, so suffixes such as "Jr." are only
+        part of the full name; the words between them are middle names. A
+        single word counts as a first name. Missing names have no tokens.
+    """
+    names = customers["name"].combine_chunks()
+    parsed = parse_names(names)
+    words = pc.split_pattern(names.fill_null(""), " ")
+    offsets = np.asarray(words.offsets)
+    n_words = np.diff(offsets)
+    n_suffixes = (
+        pc.add(pc.count_substring(parsed["suffix"], " "), 1).fill_null(0).to_numpy()
+    )
+    position = np.arange(offsets[-1] - offsets[0]) - np.repeat(
+        offsets[:-1] - offsets[0], n_words
+    )
+    middle = (position > 0) & (position < np.repeat(n_words - n_suffixes - 1, n_words))
+    has_last = pa.array(n_words - n_suffixes > 1)
+
+    ids = customers["customerid"].combine_chunks()
+    parents = pc.list_parent_indices(words).filter(pa.array(middle))
+    digits = [
+        keypad_array(parsed["first"]),
+        keypad_array(pc.list_flatten(words).filter(pa.array(middle))),
+        keypad_array(parsed["last"].filter(has_last)),
+        keypad_array(names),
+    ]
+    tokens = pa.table(
+        {
+            "customerid": pa.concat_arrays(
+                [ids, ids.take(parents), ids.filter(has_last), ids]
+            ),
+            "token": pa.DictionaryArray.from_arrays(
+                pa.array(
+                    np.repeat(np.arange(len(TOKENS)), [len(d) for d in digits]),
+                    pa.int8(),
+                ),
+                pa.array(TOKENS),
+            ),
+            "digits": pa.concat_arrays(digits),
+        }
+    )
+    return tokens.filter(pc.is_valid(tokens["digits"]))
+
+
+class PhoneWordIndex:
+    """
+    Customers by the keypad digits of their name tokens.
+
+    Parameters
+    ----------
+    customers : pa.Table
+        With customerid, name and phone columns.
+
+    Examples
+    --------
+    >>> index = PhoneWordIndex.from_database(db)
+    >>> index.lookup("227736837")  # Who is called Carpenter?
+    >>> index.spellers(["last"])  # The investigator.
+    >>> index.spellers(n_digits=7)  # Whose last seven digits spell a token.
+    """
+
+    def __init__(self, customers: pa.Table) -> None:
+        self.tokens = name_tokens(customers)
+        self.phones = pa.table(
+            {
+                "customerid": customers["customerid"].combine_chunks(),
+                "digits": keypad_array(customers["phone"]),
+            }
+        )
+
+        self._rows = group_rows(self.tokens["digits"])
+
+    @classmethod
+    def from_database(cls, db: "NoahsDatabase") -> "PhoneWordIndex":
+        """
+        Indexes the customers of a database.
+
+        Parameters
+        ----------
+        db : NoahsDatabase
+
+        Returns
+        -------
+        PhoneWordIndex
+        """
+        return cls(open_segments(db.path("customers")))
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def _select(self, tokens: Iterable[Token] | None) -> pa.Table:
+        if tokens is None:
+            return self.tokens
+        return self.tokens.filter(
+            pc.is_in(self.tokens["token"].cast(pa.string()), pa.array(list(tokens)))
+        )
+
+    def lookup(self, digits: str, tokens: Iterable[Token] | None = None) -> list[int]:
+        r"""
+        Returns the customers with a name token spelling these digits.
+
+        Parameters
+        ----------
+        digits : str
+            Keypad digits, without dashes, e.g. "227736837".
+        tokens : Iterable[str] | None, optional
+            Only consider these tokens, e.g. ["last"]. By default all of
+            `TOKENS`.
+
+        Returns
+        -------
+        list[int]
+            Distinct customer ids, in ascending order.
+        """
+        rows = self._rows.get(digits)
+        if rows is None:
+            return []
+        matches = self.tokens.take(rows)
+        if tokens is not None:
+            matches = matches.filter(
+                pc.is_in(matches["token"].cast(pa.string()), pa.array(list(tokens)))
+            )
+        return sorted(set(matches["customerid"].to_pylist()))
+
+    def spellers(
+        self, tokens: Iterable[Token] | None = None, n_digits: int = 10
+    ) -> list[int]:
+        r"""
+        Returns the customers whose phone number spells one of their own name
+        tokens.
+
+        Parameters
+        ----------
+        tokens : Iterable[str] | None, optional
+            Only consider these tokens, e.g. ["last"] for the investigator. By
+            default all of `TOKENS`.
+        n_digits : int, optional
+            Compare the last `n_digits` of the phone number, by default all
+            10 of them.
+
+        Returns
+        -------
+        list[int]
+            Distinct customer ids, in ascending order.
+        """
+        phones = self.phones.set_column(
+            1, "digits", pc.utf8_slice_codeunits(self.phones["digits"], -n_digits)
+        )
+        matches = self._select(tokens).join(
+            phones, ["customerid", "digits"], join_type="inner"
+        )
+        return sorted(pc.unique(matches["customerid"]).to_pylist())
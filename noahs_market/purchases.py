@@ -0,0 +1,187 @@
+"""
+What every customer bought, as a sparse customers x products matrix.
+
+The early bird, the cat lady, the bargain hunter and the collector all ask
+which customer bought the most of some products, and were solved by filtering
+the order lines and grouping them by customer again for every question. The
+lines are instead summed once into compressed sparse row (CSR) matrices of
+customers x products, one of line counts and one of quantities. A question on
+products, e.g. "senior cat" food, is a boolean mask over the products, and
+every customer's total is one sparse matrix-vector product.
+"""
+
+from typing import TYPE_CHECKING, Literal
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from noahs_market.derived import build_derived
+from noahs_market.loader import TABLE_NAMES
+from noahs_market.store import open_segments
+
+if TYPE_CHECKING:
+    from noahs_market.database import NoahsDatabase
+
+
+class PurchaseMatrix:
+    """
+    Order lines summed per customer and product, in sparse matrices.
+
+    Requires SciPy.
+
+    Parameters
+    ----------
+    lines : pa.Table
+        Order lines with customerid, sku and qty columns, see `order_lines`.
+    products : pa.Table
+        The product catalog, see `catalog`, one column of the matrices per
+        product.
+
+    Attributes
+    ----------
+    customerids : np.ndarray
+        Ascending ids of the customers with at least one line, one row of the
+        matrices each.
+    products : pa.Table
+        The product catalog.
+    lines, quantities : scipy.sparse.csr_matrix
+        Number of lines, and of items, of every product bought by every
+        customer.
+
+    Examples
+    --------
+    >>> purchases = PurchaseMatrix.from_database(db)
+    >>> purchases.top(pc.field("desc").isin(["Noah's Jersey (red)"]), k=3)
+    >>> purchases.top(pc.match_substring(pc.field("desc"), "Noah"))
+    """
+
+    def __init__(self, lines: pa.Table, products: pa.Table) -> None:
+        from scipy.sparse import csr_matrix
+
+        self.products = products
+        customers = lines["customerid"].to_numpy()
+        self.customerids, rows = np.unique(customers, return_inverse=True)
+        columns = pc.index_in(lines["sku"], value_set=self.products["sku"])
+        if columns.null_count:
+            raise ValueError("Order lines of products missing from products.")
+        columns = columns.to_numpy()
+
+        shape = (len(self.customerids), self.products.num_rows)
+        # Duplicate (customer, product) entries are summed when converted.
+        self.lines = csr_matrix(
+            (np.ones(len(rows), dtype=np.int64), (rows, columns)), shape=shape
+        )
+        self.quantities = csr_matrix(
+            (lines["qty"].to_numpy().astype(np.int64), (rows, columns)), shape=shape
+        )
+
+    @classmethod
+    def from_database(
+        cls, db: "NoahsDatabase", where: pc.Expression | None = None
+    ) -> "PurchaseMatrix":
+        """
+        Sums the order lines of a database.
+
+        Parameters
+        ----------
+        db : NoahsDatabase
+        where : pc.Expression | None, optional
+            Keeps only the order lines it is true for, by default every line.
+            For questions on the lines rather than the products, e.g. orders
+            placed before 5am.
+
+        Returns
+        -------
+        PurchaseMatrix
+        """
+        paths = {table: db.path(table) for table in TABLE_NAMES}
+        derived = build_derived(paths)
+        lines = open_segments(derived["order_lines"])
+        if where is not None:
+            lines = lines.filter(where)
+        return cls(lines, open_segments(derived["catalog"]))
+
+    def __len__(self) -> int:
+        return len(self.customerids)
+
+    def mask(self, products: pc.Expression | np.ndarray | None = None) -> np.ndarray:
+        r"""
+        Selects products.
+
+        Parameters
+        ----------
+        products : pc.Expression | np.ndarray | None, optional
+            An expression on the columns of `products`, or a boolean mask over
+            its rows, by default every product.
+
+        Returns
+        -------
+        np.ndarray
+            Boolean mask over the columns of the matrices.
+        """
+        if products is None:
+            return np.ones(self.products.num_rows, dtype=bool)
+        if isinstance(products, pc.Expression):
+            selected = self.products.filter(products)["sku"]
+            return pc.is_in(self.products["sku"], value_set=selected).to_numpy()
+        return np.asarray(products, dtype=bool)
+
+    def totals(
+        self,
+        products: pc.Expression | np.ndarray | None = None,
+        by: Literal["lines", "quantities"] = "lines",
+    ) -> np.ndarray:
+        r"""
+        Counts what every customer bought of some products.
+
+        Parameters
+        ----------
+        products : pc.Expression | np.ndarray | None, optional
+            See `mask`, by default every product.
+        by : {"lines", "quantities"}, optional
+            Counts order lines (the default) or items.
+
+        Returns
+        -------
+        np.ndarray
+            One total per customer, in the order of `customerids`.
+        """
+        matrix = self.lines if by == "lines" else self.quantities
+        return matrix @ self.mask(products).astype(np.int64)
+
+    def top(
+        self,
+        products: pc.Expression | np.ndarray | None = None,
+        k: int = 1,
+        by: Literal["lines", "quantities"] = "lines",
+    ) -> tuple[np.ndarray, np.ndarray]:
+        r"""
+        Finds the customers who bought the most of some products.
+
+        Parameters
+        ----------
+        products : pc.Expression | np.ndarray | None, optional
+            See `mask`, by default every product.
+        k : int, optional
+            Number of customers, by default 1.
+        by : {"lines", "quantities"}, optional
+            Ranks by order lines (the default) or items.
+
+        Returns
+        -------
+        tuple[np.ndarray, np.ndarray]
+            Customer ids and totals, most first and ties by ascending id.
+            Customers who bought none of the products are left out.
+        """
+        totals = self.totals(products, by)
+        if k < len(totals):
+            # Every customer tied with the k-th is kept so that ties are
+            # broken by id, not by the partition.
+            kth = -np.partition(-totals, k - 1)[k - 1]
+            candidates = np.flatnonzero(totals >= kth)
+        else:
+            candidates = np.arange(len(totals))
+        candidates = candidates[np.argsort(-totals[candidates], kind="stable")][:k]
+        candidates = candidates[totals[candidates] > 0]
+        return self.customerids[candidates], totals[candidates]
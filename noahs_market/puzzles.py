@@ -0,0 +1,385 @@
+"""
+Puzzles as a dependency graph, solved once per dataset.
+
+Later puzzles build on earlier answers: the neighbor lives near the
+contractor, and the meet cute starts from the bargain hunter's orders. Calling
+the upstream solvers again from each puzzle solves them several times over.
+Instead, each solver is registered with the puzzles it depends on, receives
+their results as keyword arguments, and the graph memoizes every result per
+database, so solving any puzzle evaluates each of its ancestors exactly once.
+
+Puzzles that do not depend on each other, e.g. the investigator, the early bird
+and the collector, can also be solved side by side on a pool, each as soon as
+its dependencies are solved, so solving every puzzle takes about as long as the
+longest chain of dependent puzzles rather than the sum of all of them.
+"""
+
+import graphlib
+import multiprocessing
+import time
+import weakref
+from collections.abc import Callable, Iterable
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from typing import TYPE_CHECKING, Any, Literal, NamedTuple, TypeVar
+
+from noahs_market.derived import build_derived
+from noahs_market.loader import TABLE_NAMES
+
+if TYPE_CHECKING:
+    from noahs_market.database import NoahsDatabase
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+# The database of a worker process, see `_open_database`.
+_worker_db: "NoahsDatabase | None" = None
+
+
+def _timed(
+    solve: Callable[..., Any], db: "NoahsDatabase", upstream: dict[str, Any]
+) -> tuple[Any, float]:
+    start = time.perf_counter()
+    result = solve(db, **upstream)
+    return result, time.perf_counter() - start
+
+
+def _open_database(db: "NoahsDatabase") -> None:
+    global _worker_db
+    _worker_db = db
+
+
+def _solve_in_worker(solve: bytes, upstream: dict[str, Any]) -> tuple[Any, float]:
+    import pickle
+
+    assert _worker_db is not None
+    return _timed(pickle.loads(solve), _worker_db, upstream)
+
+
+class Puzzle(NamedTuple):
+    """
+    A solver and the puzzles whose results it takes.
+
+    Parameters
+    ----------
+    name : str
+        Name of the solver function.
+    solve : Callable[..., Any]
+        Called with the database, then every required result as a keyword
+        argument named after its puzzle.
+    requires : tuple[str, ...]
+        Names of the upstream puzzles.
+    """
+
+    name: str
+    solve: Callable[..., Any]
+    requires: tuple[str, ...]
+
+
+class PuzzleRun(NamedTuple):
+    """
+    Results and wall times of a `PuzzleGraph.run`.
+
+    Parameters
+    ----------
+    results : dict[str, Any]
+        Result of every puzzle, ancestors included, dependencies first.
+    seconds : dict[str, float]
+        Wall time each puzzle took to solve. Memoized puzzles keep the time of
+        the run that solved them.
+    total : float
+        Wall time of the whole run, in seconds.
+    critical_path : float
+        Seconds of the slowest chain of dependent puzzles, the lower bound of
+        `total` on a large enough pool.
+    """
+
+    results: dict[str, Any]
+    seconds: dict[str, float]
+    total: float
+    critical_path: float
+
+    def report(self) -> str:
+        r"""
+        Returns the wall times as a table, one puzzle per line.
+
+        Returns
+        -------
+        str
+        """
+        width = max(map(len, [*self.seconds, "critical path"]))
+        lines = [
+            f"{name:<{width}}{seconds:>9.3f} s"
+            for name, seconds in self.seconds.items()
+        ]
+        lines.append(f"{'critical path':<{width}}{self.critical_path:>9.3f} s")
+        lines.append(f"{'total':<{width}}{self.total:>9.3f} s")
+        return "\n".join(lines)
+
+
+class PuzzleGraph:
+    """
+    The puzzles of a year, with their dependencies and memoized results.
+
+    Examples
+    --------
+    >>> puzzles = PuzzleGraph()
+    >>> @puzzles.puzzle()
+    ... def the_contractor(db): ...
+    >>> @puzzles.puzzle("the_contractor")
+    ... def the_neighbor(db, the_contractor): ...
+    >>> puzzles.solve(db, "the_neighbor")  # Solves the contractor first.
+    >>> puzzles.run(db).results  # Every puzzle, reusing both results.
+    >>> print(puzzles.run(other_db, executor="process").report())
+    """
+
+    def __init__(self) -> None:
+        self.puzzles: dict[str, Puzzle] = {}
+        # Result and wall time of every puzzle solved, per database.
+        self._solved: weakref.WeakKeyDictionary[
+            NoahsDatabase, dict[str, tuple[Any, float]]
+        ] = weakref.WeakKeyDictionary()
+
+    def puzzle(self, *requires: str) -> Callable[[F], F]:
+        r"""
+        Registers a solver, under its function name.
+
+        Registering a name again, e.g. re-running an edited notebook cell,
+        replaces the solver and drops the memoized results of that puzzle and
+        of every puzzle depending on it.
+
+        Parameters
+        ----------
+        *requires : str
+            Names of the puzzles whose results the solver takes, which must
+            already be registered. The graph is therefore acyclic.
+
+        Returns
+        -------
+        Callable[[F], F]
+            Decorator returning the solver unchanged.
+
+        Raises
+        ------
+        ValueError
+            If a required puzzle is not registered.
+        """
+
+        def register(solve: F) -> F:
+            unknown = [name for name in requires if name not in self.puzzles]
+            if unknown:
+                raise ValueError(
+                    f"{solve.__name__} requires unknown puzzles: {', '.join(unknown)}"
+                )
+            if solve.__name__ in self.puzzles:
+                self._forget_puzzle(solve.__name__)
+            self.puzzles[solve.__name__] = Puzzle(solve.__name__, solve, requires)
+            return solve
+
+        return register
+
+    def _forget_puzzle(self, name: str) -> None:
+        # The puzzle and its descendants, which were solved from its result.
+        stale, found = set(), {name}
+        while found:
+            stale |= found
+            found = {
+                puzzle.name
+                for puzzle in self.puzzles.values()
+                if puzzle.name not in stale and stale.intersection(puzzle.requires)
+            }
+        for solved in self._solved.values():
+            for stale_name in stale:
+                solved.pop(stale_name, None)
+
+    def order(self, names: Iterable[str] | None = None) -> list[str]:
+        r"""
+        Returns puzzles and all their ancestors, each after its dependencies.
+
+        Parameters
+        ----------
+        names : Iterable[str] | None, optional
+            Puzzles to solve, by default all of them.
+
+        Returns
+        -------
+        list[str]
+
+        Raises
+        ------
+        KeyError
+            If a puzzle is not registered.
+        """
+        pending = list(self.puzzles if names is None else names)
+        graph: dict[str, tuple[str, ...]] = {}
+        while pending:
+            name = pending.pop()
+            if name in graph:
+                continue
+            try:
+                graph[name] = self.puzzles[name].requires
+            except KeyError:
+                raise KeyError(
+                    f"Unknown puzzle {name!r}, expected one of "
+                    f"{', '.join(self.puzzles)}"
+                ) from None
+            pending.extend(graph[name])
+
+        # Ties are broken by registration order, i.e. the notebook's order.
+        sorter = graphlib.TopologicalSorter(graph)
+        sorter.prepare()
+        order = []
+        while sorter.is_active():
+            ready = sorted(sorter.get_ready(), key=list(self.puzzles).index)
+            order.extend(ready)
+            sorter.done(*ready)
+        return order
+
+    def solve(self, db: "NoahsDatabase", name: str) -> Any:
+        r"""
+        Returns the result of a puzzle, solving it and its ancestors if needed.
+
+        Parameters
+        ----------
+        db : NoahsDatabase
+        name : str
+
+        Returns
+        -------
+        Any
+            The solver's result, memoized for `db`.
+        """
+        return self.run(db, [name]).results[name]
+
+    def run(
+        self,
+        db: "NoahsDatabase",
+        names: Iterable[str] | None = None,
+        executor: Literal["serial", "thread", "process"] = "serial",
+        max_workers: int | None = None,
+    ) -> PuzzleRun:
+        r"""
+        Solves puzzles and their ancestors, each at most once for `db`.
+
+        Parameters
+        ----------
+        db : NoahsDatabase
+        names : Iterable[str] | None, optional
+            Puzzles to solve, by default all of them.
+        executor : {"serial", "thread", "process"}, optional
+            "serial", the default, solves one puzzle after the other. "thread"
+            and "process" solve every puzzle on a pool as soon as its
+            dependencies are solved. Threads share the loaded tables and suit
+            Polars and Arrow, which release the GIL. Processes also run pandas
+            side by side: each opens the cached tables memory-mapped, so the
+            workers share their pages rather than copies, and solvers are sent
+            with cloudpickle when it is installed, so they may be defined in a
+            notebook.
+        max_workers : int | None, optional
+            Size of the pool, by default the executor's own default.
+
+        Returns
+        -------
+        PuzzleRun
+        """
+        start = time.perf_counter()
+        solved = self._solved.setdefault(db, {})
+        order = self.order(names)
+        pending = [name for name in order if name not in solved]
+        if executor == "serial" or len(pending) < 2:
+            for name in pending:
+                solved[name] = _timed(
+                    self.puzzles[name].solve, db, self._upstream(solved, name)
+                )
+        else:
+            self._run_pool(db, pending, solved, executor, max_workers)
+
+        seconds = {name: solved[name][1] for name in order}
+        finish: dict[str, float] = {}
+        for name in order:
+            finish[name] = seconds[name] + max(
+                (finish[required] for required in self.puzzles[name].requires),
+                default=0.0,
+            )
+        return PuzzleRun(
+            results={name: solved[name][0] for name in order},
+            seconds=seconds,
+            total=time.perf_counter() - start,
+            critical_path=max(finish.values(), default=0.0),
+        )
+
+    def _upstream(
+        self, solved: dict[str, tuple[Any, float]], name: str
+    ) -> dict[str, Any]:
+        return {
+            required: solved[required][0] for required in self.puzzles[name].requires
+        }
+
+    def _run_pool(
+        self,
+        db: "NoahsDatabase",
+        pending: list[str],
+        solved: dict[str, tuple[Any, float]],
+        executor: Literal["thread", "process"],
+        max_workers: int | None,
+    ) -> None:
+        pool: Executor
+        if executor == "process":
+            try:
+                import cloudpickle as pickle
+            except ImportError:
+                import pickle
+
+            # Cache every table up front rather than in each worker. Workers
+            # are spawned, as forking a process that ran Polars can deadlock.
+            build_derived({table: db.path(table) for table in TABLE_NAMES})
+            pool = ProcessPoolExecutor(
+                max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_open_database,
+                initargs=(db,),
+            )
+
+            def submit(name: str) -> Future:
+                return pool.submit(
+                    _solve_in_worker,
+                    pickle.dumps(self.puzzles[name].solve),
+                    self._upstream(solved, name),
+                )
+
+        else:
+            pool = ThreadPoolExecutor(max_workers)
+
+            def submit(name: str) -> Future:
+                return pool.submit(
+                    _timed, self.puzzles[name].solve, db, self._upstream(solved, name)
+                )
+
+        with pool:
+            waiting, running = list(pending), {}
+            while waiting or running:
+                for name in [
+                    name
+                    for name in waiting
+                    if all(r in solved for r in self.puzzles[name].requires)
+                ]:
+                    waiting.remove(name)
+                    running[submit(name)] = name
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    solved[running.pop(future)] = future.result()
+
+    def forget(self, db: "NoahsDatabase") -> None:
+        r"""
+        Drops the memoized results of a database, e.g. after appending orders.
+
+        Parameters
+        ----------
+        db : NoahsDatabase
+        """
+        self._solved.pop(db, None)
@@ -0,0 +1,111 @@
+"""
+Declared column types of Noah's Market tables.
+
+Left to inference, every id is an int64, every price a float64 and, in pandas,
+every string a Python object. The tables fit comfortably in narrower types:
+ids stay below 2**31, quantities below 2**15, prices need no more than the
+7 significant digits of a float32, and `sku`, `citystatezip` and `timezone`
+repeat a few thousand distinct values across hundreds of thousands of rows.
+"""
+
+import hashlib
+
+import pyarrow as pa
+
+SCHEMAS: dict[str, pa.Schema] = {
+    "customers": pa.schema(
+        {
+            "customerid": pa.int32(),
+            "name": pa.string(),
+            "address": pa.string(),
+            "citystatezip": pa.string(),
+            "birthdate": pa.date32(),
+            "phone": pa.string(),
+            "timezone": pa.string(),
+            "lat": pa.float64(),
+            "long": pa.float64(),
+        }
+    ),
+    "orders": pa.schema(
+        {
+            "orderid": pa.int32(),
+            "customerid": pa.int32(),
+            "ordered": pa.timestamp("s"),
+            "shipped": pa.timestamp("s"),
+            # Always empty; pandas used to infer it as an all-NaN float column.
+            "items": pa.float32(),
+            "total": pa.float32(),
+        }
+    ),
+    "orders_items": pa.schema(
+        {
+            "orderid": pa.int32(),
+            "sku": pa.string(),
+            "qty": pa.int16(),
+            "unit_price": pa.float32(),
+        }
+    ),
+    "products": pa.schema(
+        {
+            "sku": pa.string(),
+            "desc": pa.string(),
+            "wholesale_cost": pa.float32(),
+            "dims_cm": pa.string(),
+        }
+    ),
+}
+
+# Low-cardinality strings, loaded as pandas categoricals. Every `sku` column
+# holds the same set of values, so merges on it compare category codes. The
+# last three are product flags of the derived `order_lines`.
+CATEGORICAL_COLUMNS = ["sku", "citystatezip", "timezone", "department", "item", "color"]
+
+
+def table_name(stem: str) -> str:
+    r"""
+    Returns the table name of a CSV file stem.
+
+    e.g., noahs-orders_items -> orders_items
+
+    Parameters
+    ----------
+    stem : str
+
+    Returns
+    -------
+    str
+    """
+    return stem.removeprefix("noahs-")
+
+
+def column_types(table: str) -> dict[str, pa.DataType]:
+    """
+    Returns the declared Arrow type of every column of a table.
+
+    Parameters
+    ----------
+    table : str
+        Table name, e.g. "orders".
+
+    Returns
+    -------
+    dict[str, pa.DataType]
+        Empty for tables without a declared schema, whose types are inferred.
+        Declared columns missing from a year's CSV are simply ignored.
+    """
+    if table not in SCHEMAS:
+        return {}
+    return {field.name: field.type for field in SCHEMAS[table]}
+
+
+def fingerprint() -> str:
+    r"""
+    Returns a digest of the declared schemas, to invalidate caches built with
+    other types.
+
+    Returns
+    -------
+    str
+    """
+    declared = repr(sorted((name, str(schema)) for name, schema in SCHEMAS.items()))
+    return hashlib.sha256(declared.encode()).hexdigest()
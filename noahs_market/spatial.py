@@ -0,0 +1,291 @@
+"""
+Customers indexed by where they live, for neighbor and proximity queries.
+
+The neighbor puzzles compare zip codes, a coarse stand-in for living nearby,
+and clues such as "right down the street from Noah's Market" cannot be asked
+at all. Customer coordinates are instead projected once onto a sphere in 3-D
+and indexed in a KD-tree, where the straight-line (chord) distance between two
+points grows with their great-circle distance. Nearest-neighbor and radius
+queries, from customers or from any point, are then tree searches rather than
+scans of every customer.
+"""
+
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from noahs_market.store import open_segments
+
+if TYPE_CHECKING:
+    from noahs_market.database import NoahsDatabase
+
+# Mean Earth radius, in kilometres.
+EARTH_RADIUS_KM = 6371.0088
+
+
+def to_cartesian(lat: np.ndarray, long: np.ndarray) -> np.ndarray:
+    r"""
+    Projects latitudes and longitudes onto a sphere the size of the Earth.
+
+    Parameters
+    ----------
+    lat, long : np.ndarray
+        Degrees.
+
+    Returns
+    -------
+    np.ndarray
+        `(n, 3)` coordinates, in kilometres.
+    """
+    lat, long = np.radians(lat), np.radians(long)
+    return EARTH_RADIUS_KM * np.column_stack(
+        [np.cos(lat) * np.cos(long), np.cos(lat) * np.sin(long), np.sin(lat)]
+    )
+
+
+def chord_to_km(chord: np.ndarray) -> np.ndarray:
+    r"""
+    Converts straight-line distances between points on the sphere into
+    great-circle distances.
+    """
+    diameter = 2 * EARTH_RADIUS_KM
+    return diameter * np.arcsin(np.clip(chord / diameter, 0, 1))
+
+
+def km_to_chord(km: float) -> float:
+    r"""
+    Converts a great-circle distance into the straight-line distance between
+    its ends, the inverse of `chord_to_km`.
+    """
+    diameter = 2 * EARTH_RADIUS_KM
+    return diameter * np.sin(min(km, np.pi * EARTH_RADIUS_KM) / diameter)
+
+
+class LocationIndex:
+    """
+    Customers in a KD-tree of their home coordinates.
+
+    Requires SciPy. Distances are great-circle kilometres.
+
+    Parameters
+    ----------
+    customers : pa.Table
+        With customerid, lat and long columns. Customers without coordinates
+        are left out.
+
+    Examples
+    --------
+    >>> index = LocationIndex.from_database(db)
+    >>> index.nearest(40.7306, -73.7486, k=5)  # Ids and km of 5 neighbors.
+    >>> index.within(*index.locate([4249]), radius=1.0)
+    >>> index.pairs(0.05)  # Every two customers within 50 m of each other.
+    """
+
+    def __init__(self, customers: pa.Table) -> None:
+        from scipy.spatial import cKDTree
+
+        located = customers.filter(
+            pc.and_(pc.is_valid(customers["lat"]), pc.is_valid(customers["long"]))
+        )
+        self.ids = located["customerid"].to_numpy()
+        self.lat = located["lat"].to_numpy()
+        self.long = located["long"].to_numpy()
+        # Rows in customer id order, and the position of every row in it.
+        self._by_id = np.argsort(self.ids, kind="stable")
+        self._id_rank = np.empty_like(self._by_id)
+        self._id_rank[self._by_id] = np.arange(len(self._by_id))
+        self._tree = cKDTree(to_cartesian(self.lat, self.long))
+
+    @classmethod
+    def from_database(cls, db: "NoahsDatabase") -> "LocationIndex":
+        """
+        Indexes the customers of a database.
+
+        Parameters
+        ----------
+        db : NoahsDatabase
+
+        Returns
+        -------
+        LocationIndex
+        """
+        return cls(open_segments(db.path("customers")))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def locate(
+        self, customerids: np.ndarray | list[int]
+    ) -> tuple[np.ndarray, np.ndarray]:
+        r"""
+        Returns the coordinates of customers.
+
+        Parameters
+        ----------
+        customerids : np.ndarray | list[int]
+
+        Returns
+        -------
+        tuple[np.ndarray, np.ndarray]
+            Latitudes and longitudes, in the order of `customerids`.
+
+        Raises
+        ------
+        KeyError
+            If a customer is not indexed.
+        """
+        customerids = np.asarray(customerids)
+        if not len(self):
+            if customerids.size:
+                raise KeyError(f"Customers not indexed: {customerids.tolist()}")
+            return self.lat[:0], self.long[:0]
+        sorted_ids = self.ids[self._by_id]
+        positions = np.searchsorted(sorted_ids, customerids).clip(max=len(self) - 1)
+        missing = sorted_ids[positions] != customerids
+        if missing.any():
+            raise KeyError(f"Customers not indexed: {customerids[missing].tolist()}")
+        rows = self._by_id[positions]
+        return self.lat[rows], self.long[rows]
+
+    def nearest(
+        self,
+        lat: float | np.ndarray,
+        long: float | np.ndarray,
+        k: int = 1,
+        workers: int = -1,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        r"""
+        Finds the customers nearest to points.
+
+        Parameters
+        ----------
+        lat, long : float | np.ndarray
+            Degrees of one point, or of several.
+        k : int, optional
+            Number of customers per point, at least 1, by default 1. Capped at
+            the number of indexed customers.
+        workers : int, optional
+            Threads searching the tree, by default one per CPU.
+
+        Returns
+        -------
+        tuple[np.ndarray, np.ndarray]
+            Customer ids and distances in km, nearest first, shaped `(k,)`
+            for one point or `(n, k)` for several, with `k` capped: empty if
+            no customer is indexed.
+
+        Raises
+        ------
+        ValueError
+            If `k` is less than 1.
+        """
+        if k < 1:
+            raise ValueError(f"k must be at least 1, got {k}")
+        # Beyond the last customer, the tree pads with out-of-range rows.
+        k = min(k, len(self))
+        points = to_cartesian(np.atleast_1d(lat), np.atleast_1d(long))
+        if not k:
+            chords, rows = np.empty((len(points), 0)), np.empty((len(points), 0), int)
+        else:
+            chords, rows = self._tree.query(
+                points, k=[*range(1, k + 1)], workers=workers
+            )
+        ids, km = self.ids[rows], chord_to_km(chords)
+        if np.ndim(lat) == 0:
+            return ids[0], km[0]
+        return ids, km
+
+    def within(
+        self,
+        lat: float | np.ndarray,
+        long: float | np.ndarray,
+        radius: float,
+        workers: int = -1,
+    ) -> np.ndarray | list[np.ndarray]:
+        r"""
+        Finds the customers within a distance of points.
+
+        Parameters
+        ----------
+        lat, long : float | np.ndarray
+            Degrees of one point, or of several.
+        radius : float
+            Great-circle distance, in km.
+        workers : int, optional
+            Threads searching the tree, by default one per CPU.
+
+        Returns
+        -------
+        np.ndarray | list[np.ndarray]
+            Ascending customer ids, for one point or for each of several.
+        """
+        if np.ndim(lat) == 0:
+            rows = self._tree.query_ball_point(
+                to_cartesian(np.atleast_1d(lat), np.atleast_1d(long))[0],
+                km_to_chord(radius),
+                workers=workers,
+            )
+            return np.sort(self.ids[rows])
+
+        from scipy.spatial import cKDTree
+
+        # One join of two trees lists every match as a flat array, instead of
+        # a Python list of row numbers per point.
+        points = cKDTree(to_cartesian(lat, long))
+        found = points.sparse_distance_matrix(
+            self._tree, km_to_chord(radius), output_type="ndarray"
+        )
+        # Sorting one key orders the matches by point, then by customer id.
+        n = len(self)
+        key = np.sort(found["i"] * n + self._id_rank[found["j"]])
+        ids = self.ids[self._by_id[key % n]]
+        bounds = np.searchsorted(key, np.arange(1, len(points.data)) * n)
+        return np.split(ids, bounds)
+
+    def count_within(
+        self,
+        lat: float | np.ndarray,
+        long: float | np.ndarray,
+        radius: float,
+        workers: int = -1,
+    ) -> np.ndarray:
+        r"""
+        Counts the customers within a distance of points, without listing them.
+
+        Parameters
+        ----------
+        lat, long : float | np.ndarray
+            Degrees of one point, or of several.
+        radius : float
+            Great-circle distance, in km.
+        workers : int, optional
+            Threads searching the tree, by default one per CPU.
+
+        Returns
+        -------
+        np.ndarray
+            Number of customers around every point.
+        """
+        points = to_cartesian(np.atleast_1d(lat), np.atleast_1d(long))
+        return self._tree.query_ball_point(
+            points, km_to_chord(radius), workers=workers, return_length=True
+        )
+
+    def pairs(self, radius: float) -> np.ndarray:
+        r"""
+        Finds every two customers living within a distance of each other.
+
+        Parameters
+        ----------
+        radius : float
+            Great-circle distance, in km.
+
+        Returns
+        -------
+        np.ndarray
+            `(n, 2)` customer ids, each pair once.
+        """
+        rows = self._tree.query_pairs(km_to_chord(radius), output_type="ndarray")
+        return self.ids[rows]
@@ -0,0 +1,355 @@
+"""
+Indexed SQLite backend for the Noah's Market puzzles.
+
+The DataFrame solvers rebuild a hash table for every `merge`/`join`, on every
+call. Here the four tables are loaded once into an on-disk SQLite database,
+with indexes on the join keys and on columns derived from the customer names
+and addresses, so repeated and ad-hoc queries look rows up instead of
+re-joining the whole of `orders_items`.
+
+The puzzle methods follow the 2024 ("Noah's Rug") solver and return the
+matching customers, whose phone numbers are the answers.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+from collections.abc import Iterator
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from noahs_market.cache import CACHE_DIR
+from noahs_market.database import NoahsDatabase
+from noahs_market.derived import product_columns
+from noahs_market.keypad import keypad_array
+from noahs_market.loader import TABLE_NAMES
+from noahs_market.names import NAME_SUFFIXES, parse_names
+from noahs_market.store import open_segments, segment_paths
+
+# Bumped whenever the tables or derived columns written to SQLite change.
+VERSION = 2
+
+# The composite indexes hold every column the puzzles read from `orders` and
+# `orders_items`, so the joins are answered from the indexes alone.
+INDEXES: dict[str, list[tuple[str, ...]]] = {
+    "customers": [("customerid",), ("initials",), ("zip",), ("phone",)],
+    "orders": [
+        ("orderid", "customerid", "ordered", "shipped"),
+        ("customerid",),
+        ("ordered",),
+    ],
+    "orders_items": [("orderid", "sku"), ("sku", "orderid", "unit_price")],
+    "products": [("sku",), ("item",)],
+}
+
+
+def _derived_columns(name: str, table: pa.Table) -> dict[str, pa.Array]:
+    match name:
+        case "customers":
+            return {
+                "initials": parse_names(table["name"])["initials"],
+                "last_name_digits": keypad_array(table["name"], word=-1),
+                "zip": pc.utf8_slice_codeunits(table["citystatezip"], -5),
+            }
+        case "products":
+            # "Vintage Widget (azure)" -> "Vintage Widget", for items that
+            # come in several colors.
+            return {"item": product_columns(table)["item"]}
+    return {}
+
+
+def _rows(table: pa.Table) -> Iterator[tuple]:
+    # sqlite3 has no adapters for dates and timestamps (and Python 3.12
+    # deprecates the defaults), so they are stored as ISO 8601 text, which
+    # sorts and compares chronologically.
+    columns = []
+    for field, column in zip(table.schema, table.columns):
+        if pa.types.is_timestamp(field.type):
+            column = pc.strftime(column, "%Y-%m-%d %H:%M:%S")
+        elif pa.types.is_date(field.type):
+            column = pc.strftime(column, "%Y-%m-%d")
+        columns.append(column.to_pylist())
+    return zip(*columns)
+
+
+def _write(connection: sqlite3.Connection, name: str, table: pa.Table) -> None:
+    for column, values in _derived_columns(name, table).items():
+        table = table.append_column(column, values)
+
+    columns = ", ".join(f'"{column}"' for column in table.column_names)
+    placeholders = ", ".join("?" for _ in table.column_names)
+    connection.execute(f"CREATE TABLE {name} ({columns})")
+    connection.executemany(f"INSERT INTO {name} VALUES ({placeholders})", _rows(table))
+    for columns in INDEXES[name]:
+        connection.execute(
+            f"CREATE INDEX {name}_{'_'.join(columns)} ON {name} ({', '.join(columns)})"
+        )
+
+
+def build_sqlite(db: NoahsDatabase) -> Path:
+    """
+    Loads the four tables into an indexed SQLite file, unless already built.
+
+    Parameters
+    ----------
+    db : NoahsDatabase
+        Source of the tables.
+
+    Returns
+    -------
+    Path
+        Path of the SQLite file in `CACHE_DIR`, named after the cached Arrow
+        files and their appended segments, so it is rebuilt whenever one of
+        them, or `VERSION`, changes.
+    """
+    paths = {table: db.path(table) for table in TABLE_NAMES}
+    segments = [segment for path in paths.values() for segment in segment_paths(path)]
+    digest = hashlib.sha256(
+        "::".join([f"v{VERSION}", *(segment.name for segment in segments)]).encode()
+    ).hexdigest()
+    path = CACHE_DIR / f"noahs-{digest[:16]}.sqlite"
+    if path.exists():
+        return path
+
+    tmp_path = path.with_suffix(f".{os.getpid()}-{threading.get_ident()}.tmp")
+    try:
+        with sqlite3.connect(tmp_path) as connection:
+            for table, arrow_path in paths.items():
+                _write(connection, table, open_segments(arrow_path))
+            connection.execute("ANALYZE")
+        connection.close()
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    tmp_path.replace(path)
+    return path
+
+
+class NoahsSQLite:
+    """
+    Noah's Market puzzles as indexed SQL queries.
+
+    Parameters
+    ----------
+    path : str | Path
+        SQLite file built by `build_sqlite`.
+
+    Examples
+    --------
+    >>> sql = NoahsSQLite.from_database(db)
+    >>> sql.the_investigator()
+    >>> sql.query("SELECT * FROM customers WHERE zip = ?", ("11420",))
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self.connection = sqlite3.connect(self.path)
+
+    @classmethod
+    def from_database(cls, db: NoahsDatabase) -> "NoahsSQLite":
+        """
+        Opens the SQLite file of a database, building it on first use.
+
+        Parameters
+        ----------
+        db : NoahsDatabase
+
+        Returns
+        -------
+        NoahsSQLite
+        """
+        return cls(build_sqlite(db))
+
+    def query(self, sql: str, params: tuple | dict = ()) -> pd.DataFrame:
+        r"""
+        Runs a query and returns its rows.
+
+        Parameters
+        ----------
+        sql : str
+        params : tuple | dict, optional
+
+        Returns
+        -------
+        pd.DataFrame
+        """
+        return pd.read_sql_query(sql, self.connection, params=params)
+
+    def _customers(self, where: str, params: tuple | dict = ()) -> pd.DataFrame:
+        return self.query(
+            f"""
+            SELECT customerid, name, address, citystatezip, birthdate, phone,
+                   timezone, lat, long
+            FROM customers
+            WHERE {where}
+            ORDER BY customerid
+            """,
+            params,
+        )
+
+    def _top_buyer(self, where: str, params: tuple | dict = ()) -> pd.DataFrame:
+        # The customer with the most order lines matching `where`. The lines
+        # are materialized first; otherwise SQLite walks `orders` in
+        # `customerid` order to skip sorting the groups, probing every order.
+        return self._customers(
+            f"""
+            customerid = (
+                WITH lines AS MATERIALIZED (
+                    SELECT o.customerid
+                    FROM products p
+                    JOIN orders_items i ON i.sku = p.sku
+                    JOIN orders o ON o.orderid = i.orderid
+                    WHERE {where}
+                )
+                SELECT customerid
+                FROM lines
+                GROUP BY customerid
+                ORDER BY count(*) DESC
+                LIMIT 1
+            )
+            """,
+            params,
+        )
+
+    def one(self, name: str = "Alexander Carpenter") -> pd.DataFrame:
+        """
+        Looks a customer up by name.
+        """
+        return self._customers("instr(name, ?) > 0", (name,))
+
+    def the_investigator(self) -> pd.DataFrame:
+        """
+        Finds the customer whose phone number spells their last name.
+        """
+        suffixes = " AND ".join(f"instr(name, '{s}') = 0" for s in NAME_SUFFIXES)
+        return self._customers(f"""
+            phone = substr(last_name_digits, 1, 3) || '-'
+                 || substr(last_name_digits, 4, 3) || '-'
+                 || substr(last_name_digits, 7, 4)
+            AND {suffixes}
+            """)
+
+    def the_contractor(self, initials: str = "DS", year: int = 2017) -> pd.DataFrame:
+        """
+        Finds the customer with the given initials who bought coffee, bagels
+        and cleaner in a single order.
+        """
+        return self._customers(
+            """
+            phone IN (
+                SELECT c.phone
+                FROM customers c
+                JOIN orders o ON o.customerid = c.customerid
+                JOIN orders_items i ON i.orderid = o.orderid
+                JOIN products p ON p.sku = i.sku
+                WHERE c.initials = :initials
+                  AND o.ordered >= :start AND o.ordered < :end
+                GROUP BY c.name, c.phone, o.ordered
+                HAVING max(p.desc LIKE '%coffee%')
+                   AND max(p.desc LIKE '%bagel%')
+                   AND max(p.desc LIKE '%clean%')
+            )
+            """,
+            {"initials": initials, "start": f"{year}", "end": f"{year + 1}"},
+        )
+
+    def the_neighbor(
+        self,
+        sun_sign: tuple[str, str] = ("09-24", "10-23"),
+        animal_year: int = 1991,
+        contractor_initials: str = "DS",
+    ) -> pd.DataFrame:
+        """
+        Finds the customer born under the given sun sign and Chinese zodiac
+        animal, living in the contractor's zip code.
+
+        Parameters
+        ----------
+        sun_sign : tuple[str, str], optional
+            First and last "MM-DD" birthdays of the sign, by default Libra.
+        animal_year : int, optional
+            Any year of the Chinese zodiac animal, by default 1991 (Goat).
+        contractor_initials : str, optional
+            Initials passed to `the_contractor`, by default "DS".
+
+        Returns
+        -------
+        pd.DataFrame
+        """
+        zip_codes = self.the_contractor(contractor_initials)["citystatezip"].str[-5:]
+        placeholders = ", ".join("?" for _ in zip_codes)
+        return self._customers(
+            f"""
+            zip IN ({placeholders})
+            AND strftime('%m-%d', birthdate) BETWEEN ? AND ?
+            AND (CAST(strftime('%Y', birthdate) AS INTEGER) - ?) % 12 = 0
+            """,
+            (*zip_codes, *sun_sign, animal_year),
+        )
+
+    def the_early_bird(self) -> pd.DataFrame:
+        """
+        Finds the top buyer of pastries ordered before 5am.
+        """
+        return self._top_buyer("""
+            p.sku >= 'BKY' AND p.sku < 'BKZ'
+            AND strftime('%H', o.ordered) < '05'
+            AND strftime('%H', o.shipped) < '05'
+            """)
+
+    def the_cat_lady(self) -> pd.DataFrame:
+        """
+        Finds the top buyer of senior cat food.
+        """
+        return self._top_buyer("p.desc LIKE '%senior cat%'")
+
+    def the_bargain_hunter(self) -> pd.DataFrame:
+        """
+        Finds the customer who most often paid less than wholesale.
+        """
+        return self._top_buyer("i.unit_price < p.wholesale_cost")
+
+    def the_meet_cute(self) -> pd.DataFrame:
+        """
+        Finds the customer who bought the same item as the bargain hunter, in
+        another color, in store, within the same minute.
+        """
+        bargain_hunter = int(self.the_bargain_hunter()["customerid"].iloc[0])
+        return self._customers(
+            """
+            customerid IN (
+                WITH hunter AS (
+                    SELECT p.item, strftime('%Y-%m-%d %H:%M', o.ordered) AS minute
+                    FROM orders o
+                    JOIN orders_items i ON i.orderid = o.orderid
+                    JOIN products p ON p.sku = i.sku
+                    WHERE o.customerid = :customerid
+                      AND o.ordered = o.shipped
+                      AND p.item IS NOT NULL
+                )
+                SELECT o.customerid
+                FROM hunter h
+                JOIN orders o
+                  ON o.ordered BETWEEN h.minute || ':00' AND h.minute || ':59'
+                JOIN orders_items i ON i.orderid = o.orderid
+                JOIN products p ON p.sku = i.sku
+                WHERE p.item = h.item
+                  AND o.ordered = o.shipped
+                  AND o.customerid != :customerid
+            )
+            """,
+            {"customerid": bargain_hunter},
+        )
+
+    def the_collector(self) -> pd.DataFrame:
+        """
+        Finds the top buyer of Noah's collectibles.
+        """
+        return self._top_buyer("instr(p.desc, 'Noah') > 0")
+
+    def close(self) -> None:
+        self.connection.close()
@@ -0,0 +1,311 @@
+"""
+Memory-mapped Arrow table store.
+
+The cached Arrow IPC files are uncompressed, so they can be mapped straight
+into memory. Every process that opens a table maps the same file, and the
+operating system keeps a single copy of its pages in the page cache, no matter
+how many solvers are running.
+"""
+
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import pandas as pd
+import pyarrow as pa
+from pyarrow import ipc
+
+from noahs_market.archive import Password
+from noahs_market.cache import cache_table
+from noahs_market.schema import CATEGORICAL_COLUMNS
+
+if TYPE_CHECKING:
+    import polars as pl
+
+
+def open_arrow(path: str | Path) -> pa.Table:
+    r"""
+    Opens an Arrow IPC file memory-mapped, without reading it into memory.
+
+    Parameters
+    ----------
+    path : str | Path
+
+    Returns
+    -------
+    pa.Table
+        Table whose buffers point into the mapped file.
+    """
+    with pa.memory_map(str(path)) as source:
+        return ipc.open_file(source).read_all()
+
+
+def segment_paths(path: str | Path) -> list[Path]:
+    r"""
+    Returns a cached table's Arrow IPC file followed by its appended segments.
+
+    e.g., noahs-orders-<source>-<version>.arrow, then
+    noahs-orders-<source>-<version>+0001-<checksum>.arrow, ...
+
+    Parameters
+    ----------
+    path : str | Path
+        Arrow IPC file of the whole table, as cached from its archive.
+
+    Returns
+    -------
+    list[Path]
+        In append order.
+    """
+    path = Path(path)
+    return [path, *sorted(path.parent.glob(f"{path.stem}+*.arrow"))]
+
+
+def open_segments(path: str | Path) -> pa.Table:
+    r"""
+    Opens a cached table and its appended segments as one memory-mapped table.
+
+    Parameters
+    ----------
+    path : str | Path
+
+    Returns
+    -------
+    pa.Table
+        Table whose chunks point into the mapped files, see `segment_paths`.
+    """
+    tables = [open_arrow(segment) for segment in segment_paths(path)]
+    if len(tables) == 1:
+        return tables[0]
+    return pa.concat_tables(tables)
+
+
+def arrow_to_pandas(table: pa.Table, arrow_dtypes: bool = False) -> pd.DataFrame:
+    """
+    Converts an Arrow table to pandas, copying as little as possible.
+
+    Parameters
+    ----------
+    table : pa.Table
+        Usually a memory-mapped table from `open_arrow`.
+    arrow_dtypes : bool, optional
+        If True, every column is backed by `pd.ArrowDtype`, wrapping the Arrow
+        buffers without any copy. By default False, which gives the classic
+        NumPy dtypes: numeric and timestamp columns still share the mapped
+        buffers, the declared low-cardinality strings become categoricals, and
+        other strings become Python objects.
+
+    Returns
+    -------
+    pd.DataFrame
+        Frame with the same columns as `table`. Dates and timestamps are
+        `datetime64` columns, matching `pd.read_csv(..., parse_dates=[...])`.
+    """
+    if arrow_dtypes:
+        return table.to_pandas(types_mapper=pd.ArrowDtype)
+    return table.to_pandas(
+        categories=[c for c in CATEGORICAL_COLUMNS if c in table.column_names],
+        date_as_object=False,
+        split_blocks=True,
+    )
+
+
+class TableStore:
+    """
+    Named Arrow tables opened memory-mapped, as pandas or Polars frames.
+
+    Parameters
+    ----------
+    paths : dict[str, Path]
+        Arrow IPC file of every table, keyed by table name. Segments appended
+        to a table since it was cached are read along with it.
+
+    Examples
+    --------
+    >>> store = TableStore.from_archives({"customers": "noahs-customers.csv.zip"})
+    >>> store.pandas("customers")
+    >>> store.polars("customers")
+    """
+
+    def __init__(self, paths: dict[str, Path]) -> None:
+        self.paths = {name: Path(path) for name, path in paths.items()}
+
+    @classmethod
+    def from_archives(cls, archives: dict[str, str | Path]) -> "TableStore":
+        """
+        Builds a store from zipped CSVs, caching each one on first use.
+
+        Parameters
+        ----------
+        archives : dict[str, str | Path]
+            Zipped CSV of every table, keyed by table name.
+
+        Returns
+        -------
+        TableStore
+        """
+        return cls({name: cache_table(archive) for name, archive in archives.items()})
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.paths
+
+    def __iter__(self):
+        return iter(self.paths)
+
+    def arrow(self, name: str) -> pa.Table:
+        r"""
+        Returns the memory-mapped Arrow table.
+
+        Parameters
+        ----------
+        name : str
+
+        Returns
+        -------
+        pa.Table
+        """
+        return open_segments(self.paths[name])
+
+    def pandas(self, name: str, arrow_dtypes: bool = False) -> pd.DataFrame:
+        """
+        Returns the table as a pandas DataFrame over the mapped file.
+
+        Parameters
+        ----------
+        name : str
+            Table name.
+        arrow_dtypes : bool, optional
+            Back every column with `pd.ArrowDtype`, by default False. See
+            `arrow_to_pandas`.
+
+        Returns
+        -------
+        pd.DataFrame
+        """
+        return arrow_to_pandas(self.arrow(name), arrow_dtypes=arrow_dtypes)
+
+    def append(
+        self,
+        orders: str | Path,
+        orders_items: str | Path,
+        password: Password | None = None,
+    ) -> dict[str, int]:
+        """
+        Appends a batch of orders and order items, see `append_orders`.
+
+        Parameters
+        ----------
+        orders : str | Path
+            CSV of the new orders, plain or zipped.
+        orders_items : str | Path
+            CSV of their items.
+        password : int | str | bytes | None, optional
+            Password of encrypted zipped CSVs.
+
+        Returns
+        -------
+        dict[str, int]
+            Number of rows appended to orders and orders_items.
+        """
+        from noahs_market.ingest import append_orders
+
+        return append_orders(self.paths, orders, orders_items, password)
+
+    def with_derived(self) -> "TableStore":
+        """
+        Adds the derived tables, `order_lines`, `customer_counts` and
+        `catalog`, building them on first use.
+
+        Returns
+        -------
+        TableStore
+            The store itself. Its derived tables are kept up to date by
+            `append`.
+        """
+        from noahs_market.derived import build_derived
+
+        self.paths.update(build_derived(self.paths))
+        return self
+
+    def polars(self, name: str) -> "pl.LazyFrame":
+        """
+        Returns a lazy Polars scan over the mapped file.
+
+        Parameters
+        ----------
+        name : str
+            Table name.
+
+        Returns
+        -------
+        pl.LazyFrame
+
+        Notes
+        -----
+        Numeric and temporal columns are read from the mapping as they are;
+        Polars re-encodes string columns into its own string-view layout when
+        they are collected.
+        """
+        import polars as pl
+
+        return pl.scan_ipc(segment_paths(self.paths[name]), memory_map=True)
+
+
+def read_pandas(
+    archive: str | Path,
+    member: str | None = None,
+    password: Password | None = None,
+    arrow_dtypes: bool = False,
+) -> pd.DataFrame:
+    """
+    Loads a zipped CSV as a pandas DataFrame through the cache.
+
+    Parameters
+    ----------
+    archive : str | Path
+        Path to the `.zip` archive.
+    member : str | None, optional
+        File inside the archive, by default the archive's first file.
+    password : int | str | bytes | None, optional
+        Password of an encrypted archive.
+    arrow_dtypes : bool, optional
+        Back every column with `pd.ArrowDtype`, by default False. See
+        `arrow_to_pandas`.
+
+    Returns
+    -------
+    pd.DataFrame
+        Dates and timestamps already come parsed as `datetime64` columns,
+        matching `pd.read_csv(..., parse_dates=[...])`.
+    """
+    return arrow_to_pandas(
+        open_segments(cache_table(archive, member, password)),
+        arrow_dtypes=arrow_dtypes,
+    )
+
+
+def scan_polars(
+    archive: str | Path, member: str | None = None, password: Password | None = None
+) -> "pl.LazyFrame":
+    """
+    Lazily scans a zipped CSV as a Polars LazyFrame through the cache.
+
+    Parameters
+    ----------
+    archive : str | Path
+        Path to the `.zip` archive.
+    member : str | None, optional
+        File inside the archive, by default the archive's first file.
+    password : int | str | bytes | None, optional
+        Password of an encrypted archive.
+
+    Returns
+    -------
+    pl.LazyFrame
+        Memory-mapped scan over the cached file, so projections and predicates
+        are pushed down to the read.
+    """
+    import polars as pl
+
+    return pl.scan_ipc(
+        segment_paths(cache_table(archive, member, password)), memory_map=True
+    )
@@ -0,0 +1,420 @@
+"""
+Western and Chinese zodiac calendar, bundled for offline use.
+
+The neighbor puzzles used to scrape Wikipedia for the sun sign dates and the
+years of each Chinese zodiac animal, on every run. Both are fixed tables, kept
+here instead:
+
+- the approximate sun sign dates of Wikipedia's "Astrological sign" table,
+  which the solvers were written against;
+- the Chinese (lunar) new year of every year from 1900 to 2100, i.e. the new
+  moon, in China's time zone, starting the second month after the one holding
+  the winter solstice, or the third after a leap 11th or 12th month, as in
+  2033.
+
+A Chinese zodiac year starts on the lunar new year, e.g. someone born on
+1991-02-14 is a Horse and someone born on 1991-02-15 a Goat.
+
+Whole columns of birthdates are classified at once by `add_zodiac`, with a
+binary search over the sign boundaries (as month-day ordinals) and over the
+lunar new years, into small integer codes: `SIGN_CODES` and `ANIMAL_CODES`. A
+sign and animal query is then an equality filter on two int8 columns.
+"""
+
+import functools
+from datetime import date
+from typing import TYPE_CHECKING, NamedTuple, TypeVar
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+if TYPE_CHECKING:
+    import polars as pl
+
+
+class SunSign(NamedTuple):
+    """
+    Birthdays of a Western zodiac sign, as (month, day) pairs.
+
+    Parameters
+    ----------
+    name : str
+        e.g., "Libra".
+    start : tuple[int, int]
+        First birthday of the sign, e.g. (9, 24).
+    end : tuple[int, int]
+        Last birthday of the sign, e.g. (10, 23). Before `start` for
+        Capricorn, whose birthdays span the new year.
+    """
+
+    name: str
+    start: tuple[int, int]
+    end: tuple[int, int]
+
+    def __contains__(self, day: date) -> bool:
+        month_day = (day.month, day.day)
+        if self.start <= self.end:
+            return self.start <= month_day <= self.end
+        return month_day >= self.start or month_day <= self.end
+
+
+SUN_SIGNS: dict[str, SunSign] = {
+    sign.name: sign
+    for sign in [
+        SunSign("Aries", (3, 21), (4, 20)),
+        SunSign("Taurus", (4, 21), (5, 21)),
+        SunSign("Gemini", (5, 22), (6, 21)),
+        SunSign("Cancer", (6, 22), (7, 23)),
+        SunSign("Leo", (7, 24), (8, 23)),
+        SunSign("Virgo", (8, 24), (9, 23)),
+        SunSign("Libra", (9, 24), (10, 23)),
+        SunSign("Scorpio", (10, 24), (11, 22)),
+        SunSign("Sagittarius", (11, 23), (12, 21)),
+        SunSign("Capricorn", (12, 22), (1, 20)),
+        SunSign("Aquarius", (1, 21), (2, 19)),
+        SunSign("Pisces", (2, 20), (3, 20)),
+    ]
+}
+
+# In the order of the 12-year cycle; 1900 is a year of the Rat.
+ANIMALS = (
+    "Rat",
+    "Ox",
+    "Tiger",
+    "Rabbit",
+    "Dragon",
+    "Snake",
+    "Horse",
+    "Goat",
+    "Monkey",
+    "Rooster",
+    "Dog",
+    "Pig",
+)
+
+SIGN_CODES = {name: code for code, name in enumerate(SUN_SIGNS)}
+ANIMAL_CODES = {animal: code for code, animal in enumerate(ANIMALS)}
+
+FIRST_YEAR, LAST_YEAR = 1900, 2100
+
+# Lunar new year of every year, as MMDD, ten years a line.
+_LUNAR_NEW_YEARS = """
+1900 0131 0219 0208 0129 0216 0204 0125 0213 0202 0122
+1910 0210 0130 0218 0206 0126 0214 0203 0123 0211 0201
+1920 0220 0208 0128 0216 0205 0124 0213 0202 0123 0210
+1930 0130 0217 0206 0126 0214 0204 0124 0211 0131 0219
+1940 0208 0127 0215 0205 0125 0213 0202 0122 0210 0129
+1950 0217 0206 0127 0214 0203 0124 0212 0131 0218 0208
+1960 0128 0215 0205 0125 0213 0202 0121 0209 0130 0217
+1970 0206 0127 0215 0203 0123 0211 0131 0218 0207 0128
+1980 0216 0205 0125 0213 0202 0220 0209 0129 0217 0206
+1990 0127 0215 0204 0123 0210 0131 0219 0207 0128 0216
+2000 0205 0124 0212 0201 0122 0209 0129 0218 0207 0126
+2010 0214 0203 0123 0210 0131 0219 0208 0128 0216 0205
+2020 0125 0212 0201 0122 0210 0129 0217 0206 0126 0213
+2030 0203 0123 0211 0131 0219 0208 0128 0215 0204 0124
+2040 0212 0201 0122 0210 0130 0217 0206 0126 0214 0202
+2050 0123 0211 0201 0219 0208 0128 0215 0204 0124 0212
+2060 0202 0121 0209 0129 0217 0205 0126 0214 0203 0123
+2070 0211 0131 0219 0207 0127 0215 0205 0124 0212 0202
+2080 0122 0209 0129 0217 0206 0126 0214 0203 0124 0210
+2090 0130 0218 0207 0127 0215 0205 0125 0212 0201 0121
+2100 0209
+"""
+
+LUNAR_NEW_YEARS: dict[int, date] = {
+    int(decade) + i: date(int(decade) + i, int(day[:2]), int(day[2:]))
+    for decade, *days in map(str.split, _LUNAR_NEW_YEARS.strip().splitlines())
+    for i, day in enumerate(days)
+}
+
+
+def get_sun_sign(name: str) -> SunSign:
+    r"""
+    Returns a Western zodiac sign by name.
+
+    Parameters
+    ----------
+    name : str
+        e.g., "Libra".
+
+    Returns
+    -------
+    SunSign
+
+    Raises
+    ------
+    KeyError
+        If there is no such sign.
+    """
+    try:
+        return SUN_SIGNS[name]
+    except KeyError:
+        raise KeyError(
+            f"Unknown sun sign {name!r}, expected one of {', '.join(SUN_SIGNS)}"
+        ) from None
+
+
+def sun_sign(day: date) -> str:
+    r"""
+    Returns the Western zodiac sign of a birthday.
+
+    Parameters
+    ----------
+    day : date
+
+    Returns
+    -------
+    str
+
+    Examples
+    --------
+    >>> sun_sign(date(1991, 10, 1))
+    'Libra'
+    """
+    return next(sign.name for sign in SUN_SIGNS.values() if day in sign)
+
+
+def lunar_new_year(year: int) -> date:
+    r"""
+    Returns the first day of a Chinese zodiac year.
+
+    Parameters
+    ----------
+    year : int
+        From 1900 to 2100.
+
+    Returns
+    -------
+    date
+
+    Raises
+    ------
+    ValueError
+        If the year is out of the bundled range.
+    """
+    try:
+        return LUNAR_NEW_YEARS[year]
+    except KeyError:
+        raise ValueError(
+            f"No lunar new year for {year}, expected {FIRST_YEAR} to {LAST_YEAR}"
+        ) from None
+
+
+def year_animal(year: int) -> str:
+    r"""
+    Returns the Chinese zodiac animal of the year starting on `year`'s lunar
+    new year.
+
+    Parameters
+    ----------
+    year : int
+
+    Returns
+    -------
+    str
+    """
+    return ANIMALS[(year - FIRST_YEAR) % len(ANIMALS)]
+
+
+def chinese_animal(day: date) -> str:
+    r"""
+    Returns the Chinese zodiac animal of a birthday.
+
+    Parameters
+    ----------
+    day : date
+        From 1900-01-31 to 2100-12-31.
+
+    Returns
+    -------
+    str
+
+    Examples
+    --------
+    >>> chinese_animal(date(1991, 2, 14)), chinese_animal(date(1991, 2, 15))
+    ('Horse', 'Goat')
+    """
+    if day < lunar_new_year(day.year):
+        day = lunar_new_year(day.year - 1)
+    return year_animal(day.year)
+
+
+def animal_years(animal: str) -> list[int]:
+    r"""
+    Returns the years, from 1900 to 2100, whose lunar new year starts a year
+    of the animal.
+
+    Parameters
+    ----------
+    animal : str
+        One of `ANIMALS`, e.g. "Goat".
+
+    Returns
+    -------
+    list[int]
+
+    Raises
+    ------
+    KeyError
+        If there is no such animal.
+    """
+    if animal not in ANIMALS:
+        raise KeyError(
+            f"Unknown Chinese zodiac animal {animal!r}, "
+            f"expected one of {', '.join(ANIMALS)}"
+        )
+    start = FIRST_YEAR + ANIMALS.index(animal)
+    return list(range(start, LAST_YEAR + 1, len(ANIMALS)))
+
+
+# Sign boundaries as month * 32 + day, in calendar order. Days before the first
+# boundary (January 1 to 20) fall under the last sign, Capricorn.
+_SIGN_ORDER = sorted(SUN_SIGNS.values(), key=lambda sign: sign.start)
+_SIGN_STARTS = np.array([sign.start[0] * 32 + sign.start[1] for sign in _SIGN_ORDER])
+_SIGN_CODES = np.array([SIGN_CODES[sign.name] for sign in _SIGN_ORDER], dtype=np.int8)
+
+_NEW_YEARS = np.array(list(LUNAR_NEW_YEARS.values()), dtype="datetime64[D]")
+_FIRST_DAY = np.datetime64(f"{FIRST_YEAR}-01-01", "D")
+_END = np.datetime64(f"{LAST_YEAR + 1}-01-01", "D")
+
+
+def _sign_of(days: np.ndarray) -> np.ndarray:
+    months = days.astype("datetime64[M]")
+    month_days = (
+        (months - days.astype("datetime64[Y]")).astype(np.int64) * 32
+        + (days - months).astype(np.int64)
+        + 33
+    )
+    return _SIGN_CODES[np.searchsorted(_SIGN_STARTS, month_days, side="right") - 1]
+
+
+def _animal_of(days: np.ndarray) -> np.ndarray:
+    # -1 outside of the bundled lunar years.
+    years = np.searchsorted(_NEW_YEARS, days, side="right") - 1
+    inside = (years >= 0) & (days < _END)
+    return np.where(inside, years % len(ANIMALS), -1).astype(np.int8)
+
+
+@functools.cache
+def _day_codes() -> tuple[np.ndarray, np.ndarray]:
+    # Sign and animal of every day of the bundled years, so that classifying
+    # a column is one lookup per birthdate instead of date arithmetic and a
+    # binary search.
+    days = np.arange(_FIRST_DAY, _END)
+    return _sign_of(days), _animal_of(days)
+
+
+def _classify(birthdates: pa.Array | pa.ChunkedArray, animal: bool) -> pa.Array:
+    if isinstance(birthdates, pa.ChunkedArray):
+        birthdates = birthdates.combine_chunks()
+    dates = birthdates.cast(pa.date32())
+    days = dates.fill_null(0).to_numpy(zero_copy_only=False).astype(np.int64)
+    offsets = days - _FIRST_DAY.astype(np.int64)
+
+    table = _day_codes()[animal]
+    if len(offsets) and (offsets.min() < 0 or offsets.max() >= len(table)):
+        inside = (offsets >= 0) & (offsets < len(table))
+        codes = table[np.where(inside, offsets, 0)]
+        outside = days[~inside].astype("datetime64[D]")
+        codes[~inside] = _animal_of(outside) if animal else _sign_of(outside)
+    else:
+        codes = table[offsets]
+
+    invalid = codes < 0
+    if dates.null_count:
+        invalid |= ~dates.is_valid().to_numpy(zero_copy_only=False)
+    return pa.array(codes, mask=invalid if invalid.any() else None)
+
+
+def sun_sign_codes(birthdates: pa.Array | pa.ChunkedArray) -> pa.Array:
+    r"""
+    Classifies birthdates into Western zodiac signs.
+
+    Parameters
+    ----------
+    birthdates : pa.Array | pa.ChunkedArray
+        Dates or timestamps.
+
+    Returns
+    -------
+    pa.Array
+        int8 codes of `SIGN_CODES`, null where `birthdates` is.
+    """
+    return _classify(birthdates, animal=False)
+
+
+def animal_codes(birthdates: pa.Array | pa.ChunkedArray) -> pa.Array:
+    r"""
+    Classifies birthdates into Chinese zodiac animals, by lunar year.
+
+    Parameters
+    ----------
+    birthdates : pa.Array | pa.ChunkedArray
+        Dates or timestamps.
+
+    Returns
+    -------
+    pa.Array
+        int8 codes of `ANIMAL_CODES`, null where `birthdates` is or falls
+        outside of the bundled lunar years.
+    """
+    return _classify(birthdates, animal=True)
+
+
+Frame = TypeVar("Frame", pd.DataFrame, "pl.DataFrame", "pl.LazyFrame")
+
+
+def add_zodiac(frame: Frame, column: str = "birthdate") -> Frame:
+    r"""
+    Adds western_sign and chinese_animal columns, classifying a column of
+    birthdates in one pass.
+
+    Parameters
+    ----------
+    frame : pd.DataFrame | pl.DataFrame | pl.LazyFrame
+    column : str, optional
+        Column of birthdates, by default "birthdate".
+
+    Returns
+    -------
+    pd.DataFrame | pl.DataFrame | pl.LazyFrame
+        With int8 western_sign and chinese_animal columns, see `SIGN_CODES`
+        and `ANIMAL_CODES`. A pandas DataFrame shares its other columns with
+        `frame`.
+
+    Examples
+    --------
+    >>> add_zodiac(db.customers).loc[
+    ...     lambda d: (d["western_sign"] == SIGN_CODES["Libra"])
+    ...     & (d["chinese_animal"] == ANIMAL_CODES["Goat"])
+    ... ]
+    """
+    if isinstance(frame, pd.DataFrame):
+        birthdates = pa.array(frame[column], from_pandas=True)
+        # A shallow copy: `assign` would copy every other column as well.
+        frame = frame.copy(deep=False)
+        for name, codes in (
+            ("western_sign", sun_sign_codes),
+            ("chinese_animal", animal_codes),
+        ):
+            frame[name] = pd.Series(
+                codes(birthdates), index=frame.index, dtype=pd.ArrowDtype(pa.int8())
+            )
+        return frame
+
+    import polars as pl
+
+    return frame.with_columns(
+        pl.col(column)
+        .map_batches(
+            lambda values, codes=codes: pl.Series(codes(values.to_arrow())),
+            return_dtype=pl.Int8,
+        )
+        .alias(name)
+        for name, codes in (
+            ("western_sign", sun_sign_codes),
+            ("chinese_animal", animal_codes),
+        )
+    )
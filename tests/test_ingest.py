@@ -0,0 +1,105 @@
+"""
+Appending batches of orders, and appending them again after a failure.
+
+Run with `python -m pytest tests`, from the root of the repository with the
+2024 data in place.
+"""
+
+from pathlib import Path
+
+import pyarrow.compute as pc
+import pytest
+from pyarrow import csv
+
+from noahs_market import cache, ingest
+from noahs_market.derived import build_derived, customer_counts
+from noahs_market.ingest import append_orders
+from noahs_market.loader import cache_tables, table_sources
+from noahs_market.store import open_arrow, open_segments
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "2024"
+BATCH_ORDERS = 100
+
+
+@pytest.fixture
+def paths(tmp_path, monkeypatch) -> dict[str, Path]:
+    monkeypatch.setattr(cache, "CACHE_DIR", tmp_path / "cache")
+    paths = cache_tables(table_sources(str(DATA_DIR / "noahs-{table}.csv.zip")))
+    build_derived(paths)
+    return paths
+
+
+@pytest.fixture
+def batch(paths, tmp_path) -> dict[str, Path]:
+    # The last orders and their items, renumbered.
+    orders = open_arrow(paths["orders"])
+    orders = orders.slice(orders.num_rows - BATCH_ORDERS)
+    items = open_arrow(paths["orders_items"])
+    items = items.filter(pc.greater_equal(items["orderid"], orders["orderid"][0]))
+    offset = 10 ** len(str(orders["orderid"][-1].as_py()))
+    batch = {}
+    for name, table in (("orders", orders), ("orders_items", items)):
+        table = table.set_column(0, "orderid", pc.add(table["orderid"], offset))
+        batch[name] = tmp_path / f"{name}-batch.csv"
+        csv.write_csv(table, batch[name])
+    return batch
+
+
+def assert_appended(paths: dict[str, Path], batch: dict[str, Path]) -> None:
+    derived = build_derived(paths)
+    orders = open_segments(paths["orders"])
+    lines = open_segments(derived["order_lines"])
+    batch_ids = csv.read_csv(batch["orders"])["orderid"].combine_chunks()
+    for table, n in ((orders, BATCH_ORDERS), (lines, 1)):
+        found = table["orderid"].filter(pc.is_in(table["orderid"], batch_ids))
+        assert pc.count_distinct(found).as_py() == BATCH_ORDERS
+        assert len(found) >= n
+    counts = open_arrow(derived["customer_counts"])
+    assert counts.equals(customer_counts(orders, lines).cast(counts.schema))
+
+
+def test_append(paths, batch):
+    assert append_orders(paths, batch["orders"], batch["orders_items"]) == {
+        "orders": BATCH_ORDERS,
+        "orders_items": csv.read_csv(batch["orders_items"]).num_rows,
+    }
+    assert_appended(paths, batch)
+    assert append_orders(paths, batch["orders"], batch["orders_items"]) == {
+        "orders": 0,
+        "orders_items": 0,
+    }
+    assert_appended(paths, batch)
+
+
+def test_retry_after_failed_derived_update(paths, batch, monkeypatch):
+    def fail(*args):
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(ingest, "_derived_batch", fail)
+    with pytest.raises(OSError):
+        append_orders(paths, batch["orders"], batch["orders_items"])
+    monkeypatch.undo()
+
+    appended = append_orders(paths, batch["orders"], batch["orders_items"])
+    assert appended["orders"] == BATCH_ORDERS
+    assert_appended(paths, batch)
+
+
+def test_retry_after_interrupted_commit(paths, batch, monkeypatch):
+    # Interrupted after placing everything but the orders segment.
+    replace = Path.replace
+
+    def crash(self, target):
+        if self.name.startswith(Path(paths["orders"]).stem + "+"):
+            raise KeyboardInterrupt
+        return replace(self, target)
+
+    monkeypatch.setattr(Path, "replace", crash)
+    monkeypatch.setattr(ingest, "_discard_partial", lambda *args: None)
+    with pytest.raises(KeyboardInterrupt):
+        append_orders(paths, batch["orders"], batch["orders_items"])
+    monkeypatch.undo()
+
+    appended = append_orders(paths, batch["orders"], batch["orders_items"])
+    assert appended["orders"] == BATCH_ORDERS
+    assert_appended(paths, batch)
@@ -0,0 +1,33 @@
+"""
+Order line margins per customer.
+"""
+
+import pyarrow as pa
+
+from noahs_market.margins import CustomerMargins
+
+
+def test_product_listed_twice_in_an_order():
+    lines = pa.table(
+        {
+            "customerid": [1, 1, 1, 2],
+            "orderid": [10, 10, 11, 12],
+            "sku": ["A", "A", "A", "A"],
+            "qty": [1, 2, 1, 1],
+            "unit_price": [4.0, 5.0, 5.0, 4.0],
+            "wholesale_cost": [5.0, 5.0, 5.0, 5.0],
+        }
+    )
+    margins = CustomerMargins(lines, at_cost=False)
+    assert margins.table.to_pylist()[0] == {
+        "customerid": 1,
+        "lines": 2,
+        "loss_lines": 1,
+        "discount": 1.0,
+        "margin": -1.0,
+        "loss_share": 0.5,
+    }
+    assert CustomerMargins(lines, at_cost=True).table["loss_lines"].to_pylist() == [
+        2,
+        1,
+    ]
@@ -0,0 +1,39 @@
+"""
+Parsing customer names, including missing and one-word names.
+"""
+
+import pyarrow as pa
+
+from noahs_market.names import InitialsIndex, parse_names
+from noahs_market.phonewords import PhoneWordIndex
+
+CUSTOMERS = pa.table(
+    {
+        "customerid": [1, 2, 3, 4],
+        "name": pa.chunked_array([["Donald James Smith Jr.", None], ["Cher", None]]),
+        "phone": ["555-111-2222", "555-333-4444", "212-555-2437", "555-555-5555"],
+    }
+)
+
+
+def test_parse_names():
+    assert parse_names(CUSTOMERS["name"]).to_pylist() == [
+        {"first": "Donald", "last": "Smith", "suffix": "Jr.", "initials": "DS"},
+        {"first": None, "last": None, "suffix": None, "initials": None},
+        {"first": "Cher", "last": "Cher", "suffix": None, "initials": "CC"},
+        {"first": None, "last": None, "suffix": None, "initials": None},
+    ]
+
+
+def test_initials():
+    initials = InitialsIndex(CUSTOMERS)
+    assert list(initials["DS"]) == [1]
+    assert list(initials["CC"]) == [3]
+
+
+def test_name_tokens():
+    index = PhoneWordIndex(CUSTOMERS)
+    assert set(index.tokens["customerid"].to_pylist()) == {1, 3}
+    assert index.lookup("76484", ["last"]) == [1]
+    assert index.lookup("52637", ["middle"]) == [1]
+    assert index.spellers(["first"], n_digits=4) == [3]
@@ -0,0 +1,64 @@
+"""
+Memoized puzzle results, and solvers registered again.
+"""
+
+from noahs_market.puzzles import PuzzleGraph
+
+
+class Database:
+    # Stands in for a NoahsDatabase: results are memoized per database.
+    pass
+
+
+def constant(name: str, value: int, calls: list[str]):
+    # A solver returning `value`, as if its notebook cell was edited.
+    def solve(db):
+        calls.append(name)
+        return value
+
+    solve.__name__ = name
+    return solve
+
+
+def test_register_again_forgets_descendants():
+    db = Database()
+    puzzles = PuzzleGraph()
+    calls = []
+    puzzles.puzzle()(constant("a", 1, calls))
+
+    @puzzles.puzzle("a")
+    def b(db, a):
+        calls.append("b")
+        return a + 1
+
+    puzzles.puzzle()(constant("c", 3, calls))
+    assert puzzles.run(db).results == {"a": 1, "c": 3, "b": 2}
+
+    calls.clear()
+    puzzles.puzzle()(constant("a", 10, calls))
+    puzzles.puzzle()(constant("c", 3, calls))
+    assert calls == []
+    assert puzzles.solve(db, "b") == 11
+    assert puzzles.solve(db, "a") == 10
+    assert puzzles.solve(db, "c") == 3
+    assert calls == ["a", "b", "c"]
+
+
+def test_solve_once():
+    db = Database()
+    puzzles = PuzzleGraph()
+    calls = []
+
+    @puzzles.puzzle()
+    def a(db):
+        calls.append("a")
+        return 1
+
+    @puzzles.puzzle("a")
+    def b(db, a):
+        calls.append("b")
+        return a + 1
+
+    assert puzzles.solve(db, "b") == 2
+    assert puzzles.solve(db, "a") == 1
+    assert calls == ["a", "b"]
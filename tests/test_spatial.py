@@ -0,0 +1,38 @@
+"""
+Nearest customers and coordinates, on small and empty indexes.
+"""
+
+import numpy as np
+import pyarrow as pa
+import pytest
+
+from noahs_market.spatial import LocationIndex
+
+CUSTOMERS = pa.table(
+    {
+        "customerid": [1, 2, 3],
+        "lat": [40.70, 40.80, 41.00],
+        "long": [-74.00, -73.90, -73.50],
+    }
+)
+
+
+def test_nearest_caps_k():
+    index = LocationIndex(CUSTOMERS)
+    ids, km = index.nearest(40.75, -73.95, k=5)
+    assert ids.tolist() == [2, 1, 3]
+    assert np.isfinite(km).all()
+    ids, _ = index.nearest(np.array([40.75, 41.0]), np.array([-73.95, -73.5]), k=5)
+    assert ids.shape == (2, 3)
+    with pytest.raises(ValueError):
+        index.nearest(40.75, -73.95, k=0)
+
+
+def test_empty_index():
+    index = LocationIndex(CUSTOMERS.slice(0, 0))
+    with pytest.raises(KeyError):
+        index.locate([1])
+    lat, _ = index.locate([])
+    assert len(lat) == 0
+    ids, km = index.nearest(40.75, -73.95, k=2)
+    assert len(ids) == len(km) == 0